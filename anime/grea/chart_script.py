@@ -1,9 +1,14 @@
-import pandas as pd
+import os
+import sys
+
 import plotly.graph_objects as go
 import plotly.io as pio
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "utils", "datasets"))
+from dataset_store import read_dataset
+
 # Load the data
-df = pd.read_csv('grea_character_development.csv')
+df = read_dataset('grea_character_development')
 
 # Create the figure
 fig = go.Figure()
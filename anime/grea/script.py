@@ -1,5 +1,11 @@
+import os
+import sys
+
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "utils", "datasets"))
+from dataset_store import write_dataset
+
 # Create a comprehensive dataset of Grea's character development throughout Manaria Friends episodes
 episode_data = {
     'Episode': [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
@@ -63,8 +69,8 @@ print("Manaria Friends: Grea's Character Development Analysis")
 print("=" * 60)
 print(df.to_string(index=False))
 
-# Save as CSV for potential chart creation
-df.to_csv('grea_character_development.csv', index=False)
+# Save to the dataset store for chart creation
+write_dataset('grea_character_development', df)
 
 print("\n\nSummary Statistics:")
 print("=" * 30)
@@ -1,5 +1,11 @@
+import os
+import sys
+
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "utils", "datasets"))
+from dataset_store import write_dataset
+
 # Create a comprehensive character development timeline for Rei Ayanami
 rei_development_data = {
     'Phase': [
@@ -59,6 +65,6 @@ print("Rei Ayanami Character Development Timeline")
 print("=" * 50)
 print(rei_df.to_string(index=False))
 
-# Save as CSV
-rei_df.to_csv('rei_ayanami_character_development.csv', index=False)
-print("\nCharacter development data saved as CSV file.")
\ No newline at end of file
+# Save to the dataset store
+write_dataset('rei_ayanami_character_development', rei_df)
+print("\nCharacter development data saved to the dataset store.")
\ No newline at end of file
@@ -1,6 +1,13 @@
 # Create a comprehensive data structure for Rei's different incarnations
+
+import os
+import sys
+
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "utils", "datasets"))
+from dataset_store import write_dataset
+
 rei_incarnations = {
     'Incarnation': [
         'Rei I',
@@ -64,5 +71,5 @@ for i, row in rei_incarnations_df.iterrows():
     print(f"  With Shinji: {row['Relationship with Shinji']}")
 
 # Save the data
-rei_incarnations_df.to_csv('rei_incarnations_complete.csv', index=False)
-print(f"\n\nIncarnations data saved to CSV file.")
\ No newline at end of file
+write_dataset('rei_incarnations_complete', rei_incarnations_df)
+print(f"\n\nIncarnations data saved to the dataset store.")
\ No newline at end of file
@@ -40,4 +40,4 @@ fig.update_yaxes(
 )
 
 # Save the chart
-fig.write_image("vegeta_power_levels.png")
\ No newline at end of file
+fig.write_image("vegeta_power_levels_1.png")
\ No newline at end of file
@@ -1,6 +1,12 @@
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "utils", "datasets"))
+from dataset_store import write_dataset
+
 # Create a DataFrame for Vegeta's transformations and power levels
 vegeta_transformations = pd.DataFrame({
     'Transformation': ['Base Form', 'Super Saiyan', 'Super Saiyan 2', 'Super Saiyan God', 
@@ -33,9 +39,9 @@ frieza_transformations = pd.DataFrame({
     ]
 })
 
-# Save the DataFrames to CSV files
-vegeta_transformations.to_csv('vegeta_transformations.csv', index=False)
-frieza_transformations.to_csv('frieza_transformations.csv', index=False)
+# Save the DataFrames to the dataset store
+write_dataset('vegeta_transformations', vegeta_transformations)
+write_dataset('frieza_transformations', frieza_transformations)
 
 print("Vegeta's Transformations:")
 print(vegeta_transformations[['Transformation', 'Power Level (Relative)']])
@@ -76,11 +82,34 @@ frieza_abilities = pd.DataFrame({
     ]
 })
 
-# Save the DataFrames to CSV files
-vegeta_abilities.to_csv('vegeta_abilities.csv', index=False)
-frieza_abilities.to_csv('frieza_abilities.csv', index=False)
+# Save the DataFrames to the dataset store
+write_dataset('vegeta_abilities', vegeta_abilities)
+write_dataset('frieza_abilities', frieza_abilities)
 
 print("\nVegeta's Abilities:")
 print(vegeta_abilities[['Ability', 'Type']])
 print("\nFrieza's Abilities:")
-print(frieza_abilities[['Ability', 'Type']])
\ No newline at end of file
+print(frieza_abilities[['Ability', 'Type']])
+
+# Create a timeline of Vegeta and Frieza's rivalry
+timeline_events = [
+    {'Year': 'Age 737', 'Event': 'Frieza destroys Planet Vegeta, killing King Vegeta and most Saiyans'},
+    {'Year': 'Age 762', 'Event': 'Vegeta defects from Frieza Force and fights on Earth'},
+    {'Year': 'Age 762', 'Event': 'Vegeta travels to Namek seeking Dragon Balls'},
+    {'Year': 'Age 762', 'Event': 'Vegeta is killed by Frieza on Namek'},
+    {'Year': 'Age 762', 'Event': 'Goku defeats Frieza on Namek'},
+    {'Year': 'Age 764', 'Event': 'Frieza returns as a cyborg and is defeated by Future Trunks'},
+    {'Year': 'Age 779', 'Event': 'Frieza is resurrected and achieves Golden Form'},
+    {'Year': 'Age 779', 'Event': 'Vegeta defeats Golden Frieza (after Goku)'},
+    {'Year': 'Age 780', 'Event': 'Tournament of Power - Vegeta and Frieza fight as allies'},
+    {'Year': 'Age 781', 'Event': 'Granolah arc - Vegeta achieves Ultra Ego transformation'},
+    {'Year': 'Age 781', 'Event': 'Frieza returns with Black Frieza form, defeats Goku and Vegeta'},
+]
+
+# Create DataFrame
+timeline_df = pd.DataFrame(timeline_events)
+
+# Save the timeline to the dataset store
+write_dataset('vegeta_frieza_timeline', timeline_df)
+
+print("Timeline created and saved.")
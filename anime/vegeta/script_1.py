@@ -1,107 +1,65 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "utils", "charts"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "utils", "datasets"))
+from dataset_store import read_dataset
+from mpl_service import get_service
+
+charts = get_service()
 
 # Load the transformations data
-vegeta_df = pd.read_csv('vegeta_transformations.csv')
-frieza_df = pd.read_csv('frieza_transformations.csv')
-
-# Create bar chart comparing power levels
-plt.figure(figsize=(12, 8))
-
-# Create positions for the bars
-vegeta_pos = np.arange(len(vegeta_df))
-frieza_pos = np.arange(len(frieza_df))
-
-# Plot Vegeta's transformations in blue
-plt.bar(vegeta_pos, vegeta_df['Power Level (Relative)'], color='blue', alpha=0.7, label='Vegeta')
-for i, v in enumerate(vegeta_df['Power Level (Relative)']):
-    plt.text(i, v + 500, f"{v}", ha='center', fontweight='bold')
-
-# Add transformation labels
-plt.xticks(vegeta_pos, vegeta_df['Transformation'], rotation=45, ha='right')
-
-plt.title('Power Level Comparison: Vegeta\'s Transformations')
-plt.xlabel('Transformation')
-plt.ylabel('Relative Power Level')
-plt.tight_layout()
-plt.legend()
-plt.savefig('vegeta_power_levels.png')
-plt.close()
-
-# Plot Frieza's transformations in purple
-plt.figure(figsize=(12, 8))
-plt.bar(frieza_pos, frieza_df['Power Level (Relative)'], color='purple', alpha=0.7, label='Frieza')
-for i, v in enumerate(frieza_df['Power Level (Relative)']):
-    plt.text(i, v + 1000, f"{v}", ha='center', fontweight='bold')
-
-# Add transformation labels
-plt.xticks(frieza_pos, frieza_df['Transformation'], rotation=45, ha='right')
-
-plt.title('Power Level Comparison: Frieza\'s Transformations')
-plt.xlabel('Transformation')
-plt.ylabel('Relative Power Level')
-plt.tight_layout()
-plt.legend()
-plt.savefig('frieza_power_levels.png')
-plt.close()
-
-# Create a final comparison chart of the top forms
-plt.figure(figsize=(10, 6))
-
-# Select the highest transformations
+vegeta_df = read_dataset('vegeta_transformations')
+frieza_df = read_dataset('frieza_transformations')
+
+# Bar chart comparing Vegeta's power levels
+charts.render_to_file({
+    'kind': 'bar', 'size': [12, 8], 'dpi': 300,
+    'labels': list(vegeta_df['Transformation']),
+    'values': vegeta_df['Power Level (Relative)'].tolist(),
+    'color': 'blue', 'alpha': 0.7, 'label': 'Vegeta',
+    'value_labels': {'offset': 500, 'fontweight': 'bold'},
+    'xtick_rotation': 45,
+    'title': 'Power Level Comparison: Vegeta\'s Transformations',
+    'xlabel': 'Transformation',
+    'ylabel': 'Relative Power Level',
+    'legend': True,
+}, 'vegeta_power_levels.png')
+
+# Frieza's transformations in purple
+charts.render_to_file({
+    'kind': 'bar', 'size': [12, 8], 'dpi': 300,
+    'labels': list(frieza_df['Transformation']),
+    'values': frieza_df['Power Level (Relative)'].tolist(),
+    'color': 'purple', 'alpha': 0.7, 'label': 'Frieza',
+    'value_labels': {'offset': 1000, 'fontweight': 'bold'},
+    'xtick_rotation': 45,
+    'title': 'Power Level Comparison: Frieza\'s Transformations',
+    'xlabel': 'Transformation',
+    'ylabel': 'Relative Power Level',
+    'legend': True,
+}, 'frieza_power_levels.png')
+
+# Final comparison chart of the top forms
 top_vegeta = vegeta_df.iloc[-2:] # Ultra Ego and SSB Evolved
 top_frieza = frieza_df.iloc[-2:] # Black Frieza and Golden Frieza
 
-# Combined positions
-labels = list(top_vegeta['Transformation']) + list(top_frieza['Transformation'])
-values = list(top_vegeta['Power Level (Relative)']) + list(top_frieza['Power Level (Relative)'])
-colors = ['blue', 'blue', 'purple', 'purple']
-
-# Create bar plot
-bars = plt.bar(range(len(values)), values, color=colors, alpha=0.7)
-
-# Add value labels
-for i, v in enumerate(values):
-    plt.text(i, v + 500, f"{v}", ha='center', fontweight='bold')
-
-# Add labels
-plt.xticks(range(len(labels)), labels, rotation=45, ha='right')
-plt.title('Ultimate Forms: Vegeta vs. Frieza')
-plt.ylabel('Relative Power Level')
-
-# Add a horizontal line to show Black Frieza's power
-plt.axhline(y=30000, color='red', linestyle='--', label='Current Black Frieza Level')
-
-plt.legend(['Black Frieza Level', 'Vegeta', 'Frieza'])
-plt.tight_layout()
-plt.savefig('ultimate_forms_comparison.png')
+charts.render_to_file({
+    'kind': 'bar', 'size': [10, 6], 'dpi': 300,
+    'labels': list(top_vegeta['Transformation']) + list(top_frieza['Transformation']),
+    'values': top_vegeta['Power Level (Relative)'].tolist() + top_frieza['Power Level (Relative)'].tolist(),
+    'color': ['blue', 'blue', 'purple', 'purple'], 'alpha': 0.7,
+    'value_labels': {'offset': 500, 'fontweight': 'bold'},
+    'xtick_rotation': 45,
+    'title': 'Ultimate Forms: Vegeta vs. Frieza',
+    'ylabel': 'Relative Power Level',
+    # Horizontal line to show Black Frieza's power
+    'hlines': [{'y': 30000, 'color': 'red', 'linestyle': '--', 'label': 'Current Black Frieza Level'}],
+    'legend': ['Black Frieza Level', 'Vegeta', 'Frieza'],
+}, 'ultimate_forms_comparison.png')
 
 print("Power level comparison charts created.")
 
-# Create a timeline of Vegeta and Frieza's rivalry
-timeline_events = [
-    {'Year': 'Age 737', 'Event': 'Frieza destroys Planet Vegeta, killing King Vegeta and most Saiyans'},
-    {'Year': 'Age 762', 'Event': 'Vegeta defects from Frieza Force and fights on Earth'},
-    {'Year': 'Age 762', 'Event': 'Vegeta travels to Namek seeking Dragon Balls'},
-    {'Year': 'Age 762', 'Event': 'Vegeta is killed by Frieza on Namek'},
-    {'Year': 'Age 762', 'Event': 'Goku defeats Frieza on Namek'},
-    {'Year': 'Age 764', 'Event': 'Frieza returns as a cyborg and is defeated by Future Trunks'},
-    {'Year': 'Age 779', 'Event': 'Frieza is resurrected and achieves Golden Form'},
-    {'Year': 'Age 779', 'Event': 'Vegeta defeats Golden Frieza (after Goku)'},
-    {'Year': 'Age 780', 'Event': 'Tournament of Power - Vegeta and Frieza fight as allies'},
-    {'Year': 'Age 781', 'Event': 'Granolah arc - Vegeta achieves Ultra Ego transformation'},
-    {'Year': 'Age 781', 'Event': 'Frieza returns with Black Frieza form, defeats Goku and Vegeta'},
-]
-
-# Create DataFrame
-timeline_df = pd.DataFrame(timeline_events)
-
-# Save the timeline
-timeline_df.to_csv('vegeta_frieza_timeline.csv', index=False)
-
-print("Timeline created and saved.")
-
 # Create a final key information file for the fanfiction
 key_info = """
 # Key Information for "Vegeta Defeats Black Frieza" Fanfiction
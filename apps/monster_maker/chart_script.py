@@ -1,10 +1,15 @@
-import pandas as pd
+import os
+import sys
+
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "utils", "datasets"))
+from dataset_store import read_dataset
+
 # Load the data
-df = pd.read_csv('dnd_cr_chart_data.csv')
+df = read_dataset('dnd_cr_chart_data')
 
 # Define colors for monster categories
 colors = ['#1FB8CD', '#FFC185', '#ECEBD5', '#5D878F', '#D2BA4C', 
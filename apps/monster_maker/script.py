@@ -1,6 +1,13 @@
 # Create data for D&D Challenge Rating and Monster Type analysis
+
+import os
+import sys
+
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "utils", "datasets"))
+from dataset_store import write_dataset
+
 # Create a dataset of typical CR ranges for different monster categories
 cr_data = {
     'Challenge_Rating': ['0', '1/8', '1/4', '1/2', '1', '2', '3', '4', '5', '6-8', '9-12', '13-16', '17-20', '21+'],
@@ -48,7 +55,7 @@ print("D&D 5e Challenge Rating Reference Guide")
 print("="*50)
 print(df.to_string(index=False))
 
-# Save as CSV for the chart
-df.to_csv('dnd_challenge_ratings.csv', index=False)
+# Save to the dataset store for the chart
+write_dataset('dnd_challenge_ratings', df)
 
-print("\nCSV file created successfully!")
\ No newline at end of file
+print("\nDataset stored successfully!")
\ No newline at end of file
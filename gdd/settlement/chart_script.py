@@ -1,7 +1,13 @@
+import os
+import sys
+
 import plotly.graph_objects as go
 import pandas as pd
 from plotly.subplots import make_subplots
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "utils", "datasets"))
+from schemas import parse_range
+
 # Create the data
 data = {
     "Settlement Tier": ["Hamlet", "Village", "Town", "City"],
@@ -16,11 +22,7 @@ data = {
 df = pd.DataFrame(data)
 
 # Extract population numbers for visualization
-pop_ranges = []
-for pop_slot in df["Population Slots"]:
-    range_parts = pop_slot.split("-")
-    max_pop = int(range_parts[1])
-    pop_ranges.append(max_pop)
+pop_ranges = parse_range(df["Population Slots"])["max"].tolist()
 
 # Map infrastructure to symbols
 infra_symbols = {
@@ -39,6 +41,10 @@ colors = ['#ECEBD5', '#D2BA4C', '#5D878F', '#1FB8CD']  # Light green to strong c
 # Create a figure with subplot to add the game-like border effect
 fig = make_subplots(rows=1, cols=1)
 
+# Passed to update_layout() at the end (see utils/charts/benchmark_figure_build.py)
+annotations = []
+shapes = []
+
 # Add main population bars
 bar = go.Bar(
     x=df["Settlement Tier"],
@@ -67,7 +73,7 @@ fig.add_trace(bar)
 # Add decorative background for game-like feel with rectangles
 for i, tier in enumerate(df["Settlement Tier"]):
     # Add a background rectangle for each tier
-    fig.add_shape(
+    shapes.append(dict(
         type="rect", 
         x0=i-0.4, x1=i+0.4, 
         y0=0, y1=pop_ranges[i]+25, 
@@ -75,22 +81,22 @@ for i, tier in enumerate(df["Settlement Tier"]):
         opacity=0.15, 
         line=dict(width=0),
         layer="below"
-    )
+    ))
     
     # Add border around each section
-    fig.add_shape(
+    shapes.append(dict(
         type="rect", 
         x0=i-0.4, x1=i+0.4, 
         y0=0, y1=pop_ranges[i]+25, 
         fillcolor="rgba(0,0,0,0)", 
         line=dict(color=colors[i], width=2, dash="solid"),
         layer="below"
-    )
+    ))
 
 # Add session requirement labels
 for i, (session, hours) in enumerate(zip(df["Session Requirements"], df["Session Hours"])):
     y_pos = pop_ranges[i] - 15
-    fig.add_annotation(
+    annotations.append(dict(
         x=i, y=y_pos,
         text=f"<b>{session}</b>",
         showarrow=False,
@@ -99,11 +105,11 @@ for i, (session, hours) in enumerate(zip(df["Session Requirements"], df["Session
         opacity=0.9,
         borderpad=4,
         align="center"
-    )
+    ))
 
 # Add infrastructure symbols
 for i, tier in enumerate(df["Settlement Tier"]):
-    fig.add_annotation(
+    annotations.append(dict(
         x=i, y=pop_ranges[i] + 15,
         text=f"<b>Infrastructure</b><br>{infra_symbols[tier]}",
         showarrow=False,
@@ -113,7 +119,7 @@ for i, tier in enumerate(df["Settlement Tier"]):
         borderwidth=2,
         borderpad=4,
         align="center"
-    )
+    ))
 
 # Add role counts with simple icons
 for i, (tier, count) in enumerate(zip(df["Settlement Tier"], role_counts)):
@@ -123,7 +129,7 @@ for i, (tier, count) in enumerate(zip(df["Settlement Tier"], role_counts)):
     else:
         role_icons = "👤 x" + str(count)
         
-    fig.add_annotation(
+    annotations.append(dict(
         x=i, y=pop_ranges[i] - 30,
         text=f"<b>Roles</b><br>{role_icons}",
         showarrow=False,
@@ -133,7 +139,7 @@ for i, (tier, count) in enumerate(zip(df["Settlement Tier"], role_counts)):
         borderwidth=2,
         borderpad=4,
         align="center"
-    )
+    ))
 
 # Add expansion features
 for i, features in enumerate(df["Expansion Features"]):
@@ -149,7 +155,7 @@ for i, features in enumerate(df["Expansion Features"]):
         
     # Add feature text
     y_pos = 10  # Position at the bottom
-    fig.add_annotation(
+    annotations.append(dict(
         x=i, y=y_pos,
         text=f"<b>{feature_text}</b>",
         showarrow=False,
@@ -159,21 +165,21 @@ for i, features in enumerate(df["Expansion Features"]):
         borderwidth=2,
         borderpad=4,
         align="center"
-    )
+    ))
 
 # Add prominent progression arrows
 for i in range(len(df) - 1):
-    fig.add_annotation(
+    annotations.append(dict(
         x=i + 0.5,
         y=max(pop_ranges) * 0.5,
         text="➡️",
         showarrow=False,
         font=dict(size=28),
         xanchor="center"
-    )
+    ))
 
 # Add title with game-like border
-fig.add_annotation(
+annotations.append(dict(
     x=0.5, y=1.12,
     xref="paper", yref="paper",
     text="<b>Settlement Progression System</b>",
@@ -184,7 +190,7 @@ fig.add_annotation(
     bordercolor="#5D878F",
     borderwidth=2,
     borderpad=10
-)
+))
 
 # Update layout
 fig.update_layout(
@@ -193,7 +199,9 @@ fig.update_layout(
     showlegend=False,
     template="perplexity",
     margin=dict(t=100),
-    plot_bgcolor="rgba(240,240,240,0.5)"
+    plot_bgcolor="rgba(240,240,240,0.5)",
+    annotations=annotations,
+    shapes=shapes
 )
 
 # Update axes
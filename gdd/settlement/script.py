@@ -1,6 +1,12 @@
+import os
+import sys
+
 import pandas as pd
 import json
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "utils", "datasets"))
+from dataset_store import write_dataset
+
 # Create a structured data table showing the settlement progression system
 settlement_data = {
     'Settlement Tier': ['Hamlet', 'Village', 'Town', 'City'],
@@ -35,8 +41,8 @@ settlement_df = pd.DataFrame(settlement_data)
 print("Settlement Progression System:")
 print(settlement_df.to_string(index=False))
 
-# Save as CSV for potential chart creation
-settlement_df.to_csv('settlement_progression.csv', index=False)
+# Save to the dataset store for chart creation
+write_dataset('settlement_progression', settlement_df)
 
 print("\n" + "="*80)
 
@@ -85,8 +91,8 @@ role_df = pd.DataFrame(role_mechanics_data)
 print("Role-Based Mechanics System:")
 print(role_df.to_string(index=False))
 
-# Save as CSV
-role_df.to_csv('role_mechanics.csv', index=False)
+# Save to the dataset store
+write_dataset('role_mechanics', role_df)
 
 print("\n" + "="*80)
 
@@ -120,11 +126,11 @@ economic_df = pd.DataFrame(economic_flow)
 print("Economic Flow Model:")
 print(economic_df.to_string(index=False))
 
-# Save as CSV
-economic_df.to_csv('economic_flow.csv', index=False)
+# Save to the dataset store
+write_dataset('economic_flow', economic_df)
 
 print("\n" + "="*80)
-print("Data files created successfully!")
-print("- settlement_progression.csv")
-print("- role_mechanics.csv") 
-print("- economic_flow.csv")
\ No newline at end of file
+print("Datasets stored successfully!")
+print("- settlement_progression")
+print("- role_mechanics")
+print("- economic_flow")
\ No newline at end of file
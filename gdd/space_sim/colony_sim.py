@@ -0,0 +1,395 @@
+# Space colony balance simulator driven by the space_sim GDD tables
+# Usage: python colony_sim.py [--colonies 5000] [--hours 720] [--seed 1]
+#
+# Reads the colonist, resource, tech tree and exploration tables that
+# script.py writes to the dataset store (typed by utils/datasets/schemas.py)
+# and advances many colonies at once in one-hour ticks. Every quantity is a
+# NumPy array with one row per colony (colonies x resources, colonies x
+# colonists), so a tick is a few dozen whole-array operations no matter how
+# many colonies run; thousands of colonies over a 30-day horizon take
+# seconds.
+#
+# Each colony follows its own research order (a priority list: research the
+# first tech whose discoveries are in, saving up for it if needed) and its own
+# exploration plan (a cycle of areas its best explorer visits). By default
+# both are random, which is what balance testing wants; callers can pass
+# their own.
+#
+# What the tables do not say comes from app.js (discovery yields, the
+# expedition discovery chance, 2 real minutes per game day) or is a named
+# tuning constant below.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "utils", "datasets"))
+from dataset_store import STORE_PATH, read_dataset
+
+# app.js: a game day is 120 real seconds, so an expedition's "30 seconds" is 6 game hours
+GAME_HOURS_PER_SECOND = 24 / 120
+
+# app.js processDiscovery(): what each discovery adds to the colony's stock
+DISCOVERY_YIELDS = {
+    "Water Source": ("Water", 5),
+    "Basic Materials": ("Materials", 3),
+    "Organic Samples": ("Food", 2),
+    "Energy Crystals": ("Power", 10),
+    "Solar Crystals": ("Power", 15),
+    "Rare Minerals": ("Rare Elements", 2),
+    "Circuit Components": ("Rare Elements", 1),
+    "Manufacturing Site": ("Materials", 10),
+    "Metal Alloys": ("Materials", 8),
+    "Geothermal Vents": ("Power", 20),
+    "Building Materials": ("Materials", 6),
+    "Alien Technology": ("Rare Elements", 5),
+}
+DISCOVERY_ALIASES = {"Circuits": "Circuit Components"}
+MAX_DISCOVERY_CHANCE = 0.8
+EXPEDITION_FATIGUE = {"rest": 20, "hunger": 15}
+
+# Tech benefits the table only describes in words
+BENEFIT_EFFECTS = {
+    "Reduces morale decay": {"morale_decay": 0.5},
+    "Automated resource gathering": {"Materials": 1.0},
+    "Produces materials from raw resources": {"Materials": 2.0},
+}
+# "Unlock Requirements" of exploration areas -> tech that unlocks them
+AREA_UNLOCKS = {"Requires advanced tech": "Advanced Materials"}
+
+# Storage caps; everything else is unbounded
+CAPACITY = {"Power": 100, "Oxygen": 100}
+
+# Tuning, per game hour
+LIFE_SUPPORT_OXYGEN = 0.6      # oxygen made at full power
+HUNGER_DECAY = 0.5             # doubled while exploring
+FOOD_RECOVERY = 1.0            # at full rations
+REST_RECOVERY = 0.5
+REST_DECAY_EXPLORING = 0.75
+NEED_FLOOR = 20                # hunger/rest below this hurts health and morale
+READY_TO_EXPLORE = 50          # hunger/rest a colonist needs before heading out
+DEPRIVATION_HEALTH_LOSS = 1.0
+SHORTAGE_HEALTH_LOSS = 2.0     # per unit of unmet oxygen/water demand
+HEALTH_RECOVERY = 0.5
+MORALE_DECAY = 1.0
+MORALE_RECOVERY = 0.25
+LOW_MORALE = 20                # halves the discovery chance
+
+PLAN_LENGTH = 16
+NEEDS = ("health", "hunger", "rest", "morale")
+
+
+def mix64(values):
+    """splitmix64 finalizer over a uint64 array."""
+    values = np.asarray(values, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _uniform(keys, counter, salt):
+    # Counter-based draws: colony c's n-th expedition gets the same numbers
+    # whichever other colonies share the arrays, so results can be cached per
+    # colony group
+    bits = mix64(keys ^ mix64(counter.astype(np.uint64) * np.uint64(4) + np.uint64(salt)))
+    return (bits >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+class ColonyRules:
+    """The GDD tables as index-aligned NumPy arrays."""
+
+    def __init__(self, resources, colonists, techs, areas):
+        self.resource_names = resources["Resource"].astype(str).tolist()
+        index = {name: i for i, name in enumerate(self.resource_names)}
+        by_lower = {name.lower(): i for name, i in index.items()}
+        self.power, self.oxygen = index["Power"], index["Oxygen"]
+        self.food, self.water = index["Food"], index["Water"]
+        self.materials, self.rare = index["Materials"], index["Rare Elements"]
+        resource_count = len(self.resource_names)
+
+        self.starting = resources["Starting Amount"].to_numpy(dtype=float)
+        rate = -resources["Consumption Rate Value"].to_numpy(dtype=float, na_value=0.0)
+        per_colonist = resources["Consumption Rate Per Colonist"].to_numpy(dtype=bool, na_value=False)
+        self.base_demand = np.where(per_colonist, 0.0, rate)
+        self.colonist_demand = np.where(per_colonist, rate, 0.0)
+        self.critical = resources["Critical Threshold"].to_numpy(dtype=float, na_value=-np.inf)
+        self.capacity = np.full(resource_count, np.inf)
+        for name, cap in CAPACITY.items():
+            self.capacity[index[name]] = cap
+
+        self.colonist_names = colonists["Colonist"].astype(str).tolist()
+        self.needs = np.stack([colonists[f"Starting {need.title()}"].to_numpy(dtype=float) for need in NEEDS])
+        self.skill = colonists["Exploration Skill"].to_numpy(dtype=float)
+
+        self.discovery_names = list(DISCOVERY_YIELDS)
+        discovery_index = {name: i for i, name in enumerate(self.discovery_names)}
+        self.discovery_resource = np.array([index[resource] for resource, _ in DISCOVERY_YIELDS.values()])
+        self.discovery_amount = np.array([amount for _, amount in DISCOVERY_YIELDS.values()], dtype=float)
+
+        self.tech_names = techs["Technology"].astype(str).tolist()
+        tech_index = {name: i for i, name in enumerate(self.tech_names)}
+        tech_count = len(self.tech_names)
+        self.material_cost = techs["Material Cost"].to_numpy(dtype=float)
+        self.rare_cost = techs["Rare Elements Cost"].to_numpy(dtype=float)
+        self.tech_requires = np.zeros((tech_count, len(self.discovery_names)), dtype=bool)
+        for t, required in enumerate(techs["Required Discovery"].astype(str)):
+            for name in required.split("+"):
+                name = DISCOVERY_ALIASES.get(name.strip(), name.strip())
+                self.tech_requires[t, discovery_index[name]] = True
+        self.tech_yield = np.zeros((tech_count, resource_count))
+        self.tech_capacity = np.zeros((tech_count, resource_count))
+        self.tech_morale_factor = np.ones(tech_count)
+        amounts = techs["Benefits Amount"].to_numpy(dtype=float, na_value=np.nan)
+        for t, (text, amount, resource, unit) in enumerate(zip(
+            techs["Benefits"].astype(str), amounts, techs["Benefits Resource"], techs["Benefits Unit"]
+        )):
+            if not np.isnan(amount):
+                target = self.tech_yield if unit == "hour" else self.tech_capacity
+                target[t, by_lower[resource]] = amount
+            for effect, value in BENEFIT_EFFECTS.get(text, {}).items():
+                if effect == "morale_decay":
+                    self.tech_morale_factor[t] = value
+                else:
+                    self.tech_yield[t, index[effect]] = value
+
+        self.area_names = areas["Area"].astype(str).tolist()
+        self.area_hours = np.rint(
+            areas["Time Required Seconds"].to_numpy(dtype=float) * GAME_HOURS_PER_SECOND
+        ).astype(int)
+        found = [[discovery_index[name.strip()] for name in text.split(",")] for text in areas["Possible Discoveries"].astype(str)]
+        self.area_discovery_count = np.array([len(names) for names in found])
+        self.area_discoveries = np.array([names + names[:1] * (max(map(len, found)) - len(names)) for names in found])
+        self.area_unlock_tech = np.array([
+            tech_index[AREA_UNLOCKS[text]] if text in AREA_UNLOCKS else -1
+            for text in areas["Unlock Requirements"].astype(str)
+        ])
+
+    @classmethod
+    def from_store(cls, path=STORE_PATH):
+        return cls(
+            read_dataset("resource_management", path=path),
+            read_dataset("colonist_management", path=path),
+            read_dataset("tech_tree_progression", path=path),
+            read_dataset("exploration_areas", path=path),
+        )
+
+
+class ColonyState:
+    """Arrays for `colonies` independent colonies; row c is colony c."""
+
+    def __init__(self, rules, colonies):
+        crew = len(rules.colonist_names)
+        self.hour = 0
+        self.resources = np.tile(rules.starting, (colonies, 1))
+        self.capacity = np.tile(rules.capacity, (colonies, 1))
+        self.production = np.zeros_like(self.resources)
+        for need, start in zip(NEEDS, rules.needs):
+            setattr(self, need, np.tile(start, (colonies, 1)))
+        self.skill = np.tile(rules.skill, (colonies, 1))
+        self.alive = np.ones((colonies, crew), dtype=bool)
+        self.discovered = np.zeros((colonies, len(rules.discovery_names)), dtype=bool)
+        # Techs whose required discoveries are all in; only changes when something is found
+        self.tech_open = np.tile(~rules.tech_requires.any(1), (colonies, 1))
+        self.researched = np.zeros((colonies, len(rules.tech_names)), dtype=bool)
+        self.research_hour = np.full((colonies, len(rules.tech_names)), np.nan)
+        # Techs whose cost a colony ever compared against its stock; no other
+        # tech's cost can have changed its history
+        self.cost_read = np.zeros((colonies, len(rules.tech_names)), dtype=bool)
+        self.morale_factor = np.ones(colonies)
+        self.expeditions = np.zeros(colonies, dtype=np.int64)
+        self.expedition_left = np.zeros(colonies, dtype=int)
+        self.explorer = np.zeros(colonies, dtype=int)
+        self.area = np.full(colonies, -1)
+        self.plan_step = np.zeros(colonies, dtype=int)
+        self.critical_hours = np.zeros(colonies, dtype=int)
+        self.death_hour = np.full(colonies, np.nan)
+
+
+class ColonySimulation:
+    """Advances a ColonyState one game hour at a time."""
+
+    def __init__(self, rules, colonies, research_orders=None, exploration_plans=None, seed=None, colony_keys=None):
+        self.rules = rules
+        self.rng = np.random.default_rng(seed)
+        self.state = ColonyState(rules, colonies)
+        if colony_keys is None:
+            colony_keys = self.rng.integers(0, np.iinfo(np.uint64).max, colonies, dtype=np.uint64, endpoint=True)
+        self.colony_keys = np.asarray(colony_keys, dtype=np.uint64)
+        if self.colony_keys.shape != (colonies,):
+            raise ValueError(f"colony_keys must have {colonies} entries")
+        tech_count, area_count = len(rules.tech_names), len(rules.area_names)
+        if research_orders is None:
+            research_orders = self.rng.permuted(np.tile(np.arange(tech_count), (colonies, 1)), axis=1)
+        if exploration_plans is None:
+            exploration_plans = self.rng.integers(0, area_count, (colonies, PLAN_LENGTH))
+        self.research_orders = np.asarray(research_orders)
+        self.exploration_plans = np.asarray(exploration_plans)
+        if self.research_orders.shape != (colonies, tech_count):
+            raise ValueError(f"research_orders must be {colonies} x {tech_count}")
+        if self.exploration_plans.ndim != 2 or len(self.exploration_plans) != colonies:
+            raise ValueError(f"exploration_plans must have {colonies} rows")
+        self._colony = np.arange(colonies)
+        self._crew = np.arange(len(rules.colonist_names))
+
+    def run(self, hours):
+        for _ in range(hours):
+            if not self.state.alive.any():
+                break
+            self.step()
+        return self.state
+
+    def step(self):
+        s, r = self.state, self.rules
+        living = s.alive.any(1)
+        crew = s.alive.sum(1)
+
+        # Resources: production first, then as much of the demand as the stock covers
+        s.resources += s.production * living[:, None]
+        demand = r.base_demand + r.colonist_demand * crew[:, None]
+        demand *= living[:, None]
+        supplied = np.ones_like(demand)
+        np.divide(s.resources, demand, out=supplied, where=demand > 0)
+        np.clip(supplied, 0.0, 1.0, out=supplied)
+        s.resources -= demand * supplied
+        s.resources[:, r.oxygen] += LIFE_SUPPORT_OXYGEN * supplied[:, r.power] * living
+        np.minimum(s.resources, s.capacity, out=s.resources)
+        s.critical_hours += ((s.resources < r.critical).any(1) & living)
+
+        # Colonist needs
+        exploring = (self._crew == s.explorer[:, None]) & (s.expedition_left > 0)[:, None]
+        s.hunger += FOOD_RECOVERY * supplied[:, r.food, None] - HUNGER_DECAY * np.where(exploring, 2.0, 1.0)
+        s.rest += np.where(exploring, -REST_DECAY_EXPLORING, REST_RECOVERY)
+        np.clip(s.hunger, 0.0, 100.0, out=s.hunger)
+        np.clip(s.rest, 0.0, 100.0, out=s.rest)
+        deprived = (s.hunger < NEED_FLOOR) | (s.rest < NEED_FLOOR)
+        shortage = (2.0 - supplied[:, r.oxygen] - supplied[:, r.water])[:, None]
+        s.health += np.where(deprived, -DEPRIVATION_HEALTH_LOSS, HEALTH_RECOVERY * (shortage == 0))
+        s.health -= SHORTAGE_HEALTH_LOSS * shortage
+        s.morale += np.where(deprived, -MORALE_DECAY * s.morale_factor[:, None], MORALE_RECOVERY)
+        np.clip(s.health, 0.0, 100.0, out=s.health)
+        np.clip(s.morale, 0.0, 100.0, out=s.morale)
+        s.alive &= s.health > 0
+        s.death_hour[living & ~s.alive.any(1)] = s.hour + 1
+
+        self._explore()
+        self._research()
+        s.hour += 1
+
+    def _explore(self):
+        s, r = self.state, self.rules
+        away = s.expedition_left > 0
+        s.expedition_left[away] -= 1
+        explorer_alive = s.alive[self._colony, s.explorer]
+        s.expedition_left[away & ~explorer_alive] = 0
+
+        returned = np.flatnonzero(away & explorer_alive & (s.expedition_left == 0))
+        if len(returned):
+            explorer = s.explorer[returned]
+            chance = np.minimum(MAX_DISCOVERY_CHANCE, s.skill[returned, explorer] / 10)
+            chance *= np.where(s.morale[returned, explorer] < LOW_MORALE, 0.5, 1.0)
+            keys, counter = self.colony_keys[returned], s.expeditions[returned]
+            s.expeditions[returned] += 1
+            found = _uniform(keys, counter, 1) < chance
+            area = s.area[returned]
+            slot = (_uniform(keys, counter, 2) * r.area_discovery_count[area]).astype(int)
+            discovery = r.area_discoveries[area, slot][found]
+            colonies = returned[found]
+            s.resources[colonies, r.discovery_resource[discovery]] += r.discovery_amount[discovery]
+            s.discovered[colonies, discovery] = True
+            missing = r.tech_requires[None] & ~s.discovered[colonies, None, :]
+            s.tech_open[colonies] = ~missing.any(2)
+            s.skill[returned, explorer] = np.minimum(10.0, s.skill[returned, explorer] + 0.1)
+            s.rest[returned, explorer] = np.maximum(0.0, s.rest[returned, explorer] - EXPEDITION_FATIGUE["rest"])
+            s.hunger[returned, explorer] = np.maximum(0.0, s.hunger[returned, explorer] - EXPEDITION_FATIGUE["hunger"])
+
+        # Colonies with a rested, fed colonist at home send the most skilled one to
+        # the next area in the plan; a locked area (or -1) means staying home for
+        # that hour
+        ready = s.alive & (s.rest >= READY_TO_EXPLORE) & (s.hunger >= READY_TO_EXPLORE)
+        home = np.flatnonzero((s.expedition_left == 0) & ready.any(1))
+        if len(home):
+            plans = self.exploration_plans
+            area = plans[home, s.plan_step[home] % plans.shape[1]]
+            s.plan_step[home] += 1
+            unlock = r.area_unlock_tech[np.maximum(area, 0)]
+            go = (area >= 0) & ((unlock < 0) | s.researched[home, np.maximum(unlock, 0)])
+            colonies, area = home[go], area[go]
+            s.explorer[colonies] = np.where(ready[colonies], s.skill[colonies], -1.0).argmax(1)
+            s.area[colonies] = area
+            s.expedition_left[colonies] = r.area_hours[area]
+
+    def _research(self):
+        s, r = self.state, self.rules
+        # Each colony saves for the first open tech in its research order
+        ordered = np.take_along_axis(s.tech_open & ~s.researched, self.research_orders, 1)
+        target = self.research_orders[self._colony, ordered.argmax(1)]
+        saving = ordered.any(1) & s.alive.any(1)
+        s.cost_read[saving, target[saving]] = True
+        ready = (
+            saving
+            & (s.resources[:, r.materials] >= r.material_cost[target])
+            & (s.resources[:, r.rare] >= r.rare_cost[target])
+        )
+        colonies = np.flatnonzero(ready)
+        if not len(colonies):
+            return
+        tech = target[colonies]
+        s.resources[colonies, r.materials] -= r.material_cost[tech]
+        s.resources[colonies, r.rare] -= r.rare_cost[tech]
+        s.researched[colonies, tech] = True
+        s.research_hour[colonies, tech] = s.hour
+        s.production[colonies] += r.tech_yield[tech]
+        s.capacity[colonies] += r.tech_capacity[tech]
+        s.morale_factor[colonies] *= r.tech_morale_factor[tech]
+
+
+def _percent(share):
+    # One decimal, but a rare outcome must not print as 0.0% (or a near-certain one as 100.0%)
+    if 0 < share < 0.001:
+        return "<0.1%"
+    if 0.999 < share < 1:
+        return ">99.9%"
+    return f"{100 * share:.1f}%"
+
+
+def summarize(rules, state, hours):
+    """Printable report of how the colonies fared."""
+    died = ~np.isnan(state.death_hour)
+    if not len(died):
+        return f"0 colonies, {hours} hours: nothing to report"
+    lines = [f"{len(died)} colonies, {hours} hours: {_percent(1 - died.mean())} survived"]
+    if died.any():
+        p10, p50, p90 = np.percentile(state.death_hour[died], [10, 50, 90])
+        lines.append(f"  hours to collapse (failed colonies): p10 {p10:.0f}, median {p50:.0f}, p90 {p90:.0f}")
+    lines.append(f"  hours with a resource below its critical threshold: mean {state.critical_hours.mean():.1f}")
+    lines.append(f"  {'technology':<24}{'researched':>11}{'median hour':>13}")
+    for t, name in enumerate(rules.tech_names):
+        share = state.researched[:, t].mean()
+        median = f"{np.nanmedian(state.research_hour[:, t]):.0f}" if share else "-"
+        lines.append(f"  {name:<24}{_percent(share):>11}{median:>13}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate many space colonies from the GDD tables")
+    parser.add_argument("--colonies", type=int, default=5000)
+    parser.add_argument("--hours", type=int, default=720, help="Game hours to simulate (720 = 30 days)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--store", default=STORE_PATH, help="SQLite dataset store")
+    args = parser.parse_args(argv)
+
+    rules = ColonyRules.from_store(args.store)
+    started = time.perf_counter()
+    simulation = ColonySimulation(rules, args.colonies, seed=args.seed)
+    state = simulation.run(args.hours)
+    seconds = time.perf_counter() - started
+    print(summarize(rules, state, args.hours))
+    print(f"Simulated {args.colonies} colonies for {state.hour} hours in {seconds:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
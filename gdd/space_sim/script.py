@@ -1,5 +1,11 @@
+import os
+import sys
+
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "utils", "datasets"))
+from dataset_store import write_dataset
+
 # Create a comprehensive colonist management table
 colonist_data = {
     'Colonist': ['Dr. Sarah Chen', 'Engineer Rodriguez', 'Scout Williams'],
@@ -74,11 +80,11 @@ resource_data = {
 
 resource_df = pd.DataFrame(resource_data)
 
-# Save all tables to CSV files
-colonist_df.to_csv('colonist_management.csv', index=False)
-tech_df.to_csv('tech_tree_progression.csv', index=False)
-exploration_df.to_csv('exploration_areas.csv', index=False)
-resource_df.to_csv('resource_management.csv', index=False)
+# Save all tables to the dataset store
+write_dataset('colonist_management', colonist_df)
+write_dataset('tech_tree_progression', tech_df)
+write_dataset('exploration_areas', exploration_df)
+write_dataset('resource_management', resource_df)
 
 print("Game Mechanics Summary Tables Created:")
 print("\n1. COLONIST MANAGEMENT:")
@@ -0,0 +1,337 @@
+# Monte Carlo balance sweep over space_sim research orders and exploration plans
+# Usage: python sweep.py [--orders 24] [--plan-length 3] [--runs 50] [--hours 720]
+#        python sweep.py --set-cost "Solar Panels=6"          (what-if, store untouched)
+#        python sweep.py --set-cost "Geothermal=15,1" --workers 4
+#        python sweep.py --force                              (ignore the sweep cache)
+#
+# A strategy is a research order (the priority list colony_sim.py follows)
+# plus an exploration plan (the cycle of areas the colony's explorer visits).
+# The sweep samples research orders, enumerates every plan of the given
+# length, runs each strategy --runs times with colony_sim.py and reports the
+# distribution of survival times: overall, for the best strategies, and per
+# plan and per first research pick. Strategies are simulated in chunks across
+# a process pool, one worker per core; each chunk is one vectorized
+# ColonySimulation.
+#
+# Results are cached per strategy in .sweep_cache.json. Every run of a
+# strategy draws from its own random stream, keyed on the strategy alone, so
+# its outcome does not depend on the rest of the sweep. The simulation records
+# which techs' costs a run ever compared against its stock. A cached strategy
+# stays valid while those techs' costs are unchanged; other tables and
+# colony_sim.py are part of the key. Re-running after one cost change only
+# re-simulates the strategies that saved up for that tech.
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from colony_sim import STORE_PATH, ColonyRules, ColonySimulation, mix64, read_dataset
+
+SIM_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "colony_sim.py")
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sweep_cache.json")
+# Bump when a change here alters what a cached strategy result means
+CACHE_VERSION = 1
+COST_COLUMNS = ["Material Cost", "Rare Elements Cost"]
+# Colonies per simulation chunk handed to a worker
+CHUNK_COLONIES = 4096
+
+
+def load_tables(path=STORE_PATH, cost_overrides=None):
+    """The four GDD tables colony_sim.py reads, with optional {tech: (material, rare)} cost overrides."""
+    tables = [read_dataset(name, path=path) for name in (
+        "resource_management", "colonist_management", "tech_tree_progression", "exploration_areas"
+    )]
+    techs = tables[2]
+    for tech, costs in (cost_overrides or {}).items():
+        rows = techs["Technology"] == tech
+        if not rows.any():
+            raise ValueError(f"Unknown technology '{tech}'")
+        for column, cost in zip(COST_COLUMNS, costs):
+            techs.loc[rows, column] = cost
+    return tables
+
+
+def positive_int(text):
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer, got '{text}'") from None
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def parse_cost(text):
+    """'Solar Panels=6' or 'Geothermal=15,1' -> ('Solar Panels', (6,) / (15, 1))."""
+    tech, separator, costs = text.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"expected TECH=MATERIAL[,RARE], got '{text}'")
+    try:
+        values = tuple(int(value) for value in costs.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"costs must be integers: '{text}'") from None
+    if not 1 <= len(values) <= 2:
+        raise argparse.ArgumentTypeError(f"expected one or two costs: '{text}'")
+    return tech.strip(), values
+
+
+def rules_digest(tables):
+    """Hash of everything a run depends on except tech costs, which are tracked per strategy."""
+    digest = hashlib.sha256(f"v{CACHE_VERSION}".encode("utf-8"))
+    with open(SIM_PATH, "rb") as handle:
+        digest.update(handle.read())
+    for table in tables:
+        digest.update(table.drop(columns=COST_COLUMNS, errors="ignore").to_csv(index=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def research_orders(rules, count, seed):
+    """The table's own order, then up to count-1 distinct random permutations."""
+    tech_count = len(rules.tech_names)
+    rng = np.random.default_rng(seed)
+    orders = [tuple(range(tech_count))]
+    seen = set(orders)
+    # Cap the attempts so asking for more orders than exist still terminates
+    for _ in range(count * 20):
+        if len(orders) >= count:
+            break
+        order = tuple(int(tech) for tech in rng.permutation(tech_count))
+        if order not in seen:
+            seen.add(order)
+            orders.append(order)
+    return orders
+
+
+def exploration_plans(rules, length):
+    return list(itertools.product(range(len(rules.area_names)), repeat=length))
+
+
+class Strategy:
+    def __init__(self, rules, order, plan, runs, hours, seed):
+        self.order = order
+        self.plan = plan
+        self.label = {
+            "order": [rules.tech_names[tech] for tech in order],
+            "plan": [rules.area_names[area] for area in plan],
+            "runs": runs,
+            "hours": hours,
+            "seed": seed,
+        }
+        self.key = hashlib.sha256(json.dumps(self.label, sort_keys=True).encode("utf-8")).hexdigest()
+        # The random stream depends on the strategy only, never on costs or chunking
+        self.colony_keys = mix64(np.uint64(int(self.key[:16], 16)) ^ np.arange(runs, dtype=np.uint64))
+
+
+class SweepCache:
+    """Per-strategy survival times, valid while the costs each strategy read are unchanged."""
+
+    def __init__(self, path, digest):
+        self.path = path
+        self.digest = digest
+        try:
+            with open(path, encoding="utf-8") as handle:
+                cache = json.load(handle)
+        except (OSError, ValueError):
+            cache = {}
+        valid = cache.get("version") == CACHE_VERSION and cache.get("rules") == digest
+        self.entries = cache.get("strategies", {}) if valid else {}
+        self._used = {}
+
+    def lookup(self, strategy, rules):
+        entry = self.entries.get(strategy.key)
+        if entry is None:
+            return None
+        costs = dict(zip(rules.tech_names, zip(rules.material_cost.tolist(), rules.rare_cost.tolist())))
+        if any(tuple(costs.get(tech, ())) != tuple(read) for tech, read in entry["costs"].items()):
+            return None
+        self._used[strategy.key] = entry
+        return entry["death_hours"]
+
+    def record(self, strategy, rules, cost_read, death_hours):
+        self._used[strategy.key] = {
+            "costs": {
+                rules.tech_names[tech]: [float(rules.material_cost[tech]), float(rules.rare_cost[tech])]
+                for tech in cost_read
+            },
+            "death_hours": death_hours,
+        }
+
+    def save(self):
+        # Only strategies of this sweep are kept, so the file does not grow without bound
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump({"version": CACHE_VERSION, "rules": self.digest, "strategies": self._used}, handle)
+        os.replace(temp_path, self.path)
+
+
+def simulate_chunk(rules, strategies, runs, hours):
+    """Run `runs` colonies per strategy in one simulation; returns [(death_hours, cost_read)]."""
+    orders = np.repeat([strategy.order for strategy in strategies], runs, axis=0)
+    plans = np.repeat([strategy.plan for strategy in strategies], runs, axis=0)
+    keys = np.concatenate([strategy.colony_keys for strategy in strategies])
+    state = ColonySimulation(rules, len(keys), orders, plans, colony_keys=keys).run(hours)
+    results = []
+    for i in range(len(strategies)):
+        rows = slice(i * runs, (i + 1) * runs)
+        death_hours = [None if np.isnan(hour) else int(hour) for hour in state.death_hour[rows]]
+        results.append((death_hours, np.flatnonzero(state.cost_read[rows].any(0)).tolist()))
+    return results
+
+
+_worker_rules = None
+
+
+def _start_worker(rules):
+    global _worker_rules
+    _worker_rules = rules
+
+
+def _simulate_in_worker(strategies, runs, hours):
+    return simulate_chunk(_worker_rules, strategies, runs, hours)
+
+
+def run_sweep(rules, strategies, runs, hours, workers=None, cache=None):
+    """Survival times for every strategy, simulating only what the cache cannot answer."""
+    death_hours = {}
+    pending = []
+    for strategy in strategies:
+        cached = cache.lookup(strategy, rules) if cache is not None else None
+        if cached is None:
+            pending.append(strategy)
+        else:
+            death_hours[strategy.key] = cached
+
+    size = max(1, CHUNK_COLONIES // runs)
+    chunks = [pending[start:start + size] for start in range(0, len(pending), size)]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+
+    def collect(chunk, results):
+        for strategy, (times, cost_read) in zip(chunk, results):
+            death_hours[strategy.key] = times
+            if cache is not None:
+                cache.record(strategy, rules, cost_read, times)
+
+    if workers <= 1:
+        for chunk in chunks:
+            collect(chunk, simulate_chunk(rules, chunk, runs, hours))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_start_worker, initargs=(rules,)) as pool:
+            futures = {pool.submit(_simulate_in_worker, chunk, runs, hours): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                collect(futures[future], future.result())
+    return death_hours, len(pending)
+
+
+def survival_times(death_hours, hours):
+    # Colonies still alive at the horizon are censored at it
+    return np.array([hours if hour is None else hour for hour in death_hours], dtype=float)
+
+
+def _hours_text(value, hours):
+    return f"{hours}+" if value >= hours else f"{value:.0f}"
+
+
+def report(rules, strategies, death_hours, runs, hours, top):
+    lines = []
+    all_times = np.concatenate([survival_times(death_hours[strategy.key], hours) for strategy in strategies])
+    survived = all_times >= hours
+    lines.append(f"All runs: {100 * survived.mean():.1f}% of {len(all_times)} colonies survived {hours} hours")
+    p10, p50, p90 = np.percentile(all_times, [10, 50, 90])
+    lines.append(
+        f"  survival time: p10 {_hours_text(p10, hours)}, median {_hours_text(p50, hours)}, p90 {_hours_text(p90, hours)}"
+    )
+    day_edges = np.arange(0, hours + 120, 120)
+    counts, _ = np.histogram(np.minimum(all_times, hours - 1), bins=day_edges)
+    for start, count in zip(day_edges, counts):
+        bar = "#" * int(round(50 * count / len(all_times)))
+        lines.append(f"  day {start // 24:>3}-{(start + 120) // 24:<3} {100 * count / len(all_times):>5.1f}% {bar}")
+
+    rows = []
+    for strategy in strategies:
+        times = survival_times(death_hours[strategy.key], hours)
+        rows.append((np.mean(times >= hours), np.median(times), np.percentile(times, 10), strategy))
+    rows.sort(key=lambda row: (row[0], row[1], row[2]), reverse=True)
+
+    lines.append("")
+    lines.append(f"Best {min(top, len(rows))} strategies ({runs} runs each)")
+    lines.append(f"  {'survived':>8}{'median':>8}{'p10':>6}  plan / research order")
+    for share, median, p10, strategy in rows[:top]:
+        plan = " > ".join(rules.area_names[area] for area in strategy.plan)
+        order = ", ".join(rules.tech_names[tech] for tech in strategy.order[:4])
+        lines.append(f"  {100 * share:>7.1f}%{_hours_text(median, hours):>8}{_hours_text(p10, hours):>6}  {plan}")
+        lines.append(f"  {'':>22}  {order}, ...")
+
+    for title, group in (
+        ("exploration plan", lambda strategy: " > ".join(rules.area_names[area] for area in strategy.plan)),
+        ("first research pick", lambda strategy: rules.tech_names[strategy.order[0]]),
+    ):
+        groups = {}
+        for strategy in strategies:
+            groups.setdefault(group(strategy), []).append(survival_times(death_hours[strategy.key], hours))
+        lines.append("")
+        lines.append(f"By {title}")
+        summary = sorted(
+            ((np.mean(np.concatenate(times) >= hours), np.median(np.concatenate(times)), name)
+             for name, times in groups.items()),
+            reverse=True,
+        )
+        for share, median, name in summary[:top]:
+            lines.append(f"  {100 * share:>7.1f}%{_hours_text(median, hours):>8}  {name}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep space_sim research orders and exploration plans")
+    parser.add_argument("--orders", type=positive_int, default=24, help="Research orders to sample (table order included)")
+    parser.add_argument("--plan-length", type=positive_int, default=3, help="Every exploration plan of this many areas")
+    parser.add_argument("--runs", type=positive_int, default=50, help="Monte Carlo runs per strategy")
+    parser.add_argument("--hours", type=positive_int, default=720, help="Game hours per run (720 = 30 days)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--set-cost", type=parse_cost, action="append", default=[], metavar="TECH=MATERIAL[,RARE]",
+                        help="Override a tech's cost for this sweep only")
+    parser.add_argument("--top", type=int, default=10, help="Rows per report table")
+    parser.add_argument("--workers", type=positive_int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--cache", default=CACHE_PATH, help="Sweep cache file ('' to disable)")
+    parser.add_argument("--force", action="store_true", help="Re-simulate every strategy")
+    parser.add_argument("--store", default=STORE_PATH, help="SQLite dataset store")
+    args = parser.parse_args(argv)
+
+    try:
+        tables = load_tables(args.store, dict(args.set_cost))
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+    rules = ColonyRules(*tables)
+    strategies = [
+        Strategy(rules, order, plan, args.runs, args.hours, args.seed)
+        for order in research_orders(rules, args.orders, args.seed)
+        for plan in exploration_plans(rules, args.plan_length)
+    ]
+    cache = SweepCache(args.cache, rules_digest(tables)) if args.cache else None
+    if cache is not None and args.force:
+        cache.entries = {}
+
+    started = time.perf_counter()
+    death_hours, simulated = run_sweep(rules, strategies, args.runs, args.hours, args.workers, cache)
+    seconds = time.perf_counter() - started
+    if cache is not None:
+        cache.save()
+
+    print(report(rules, strategies, death_hours, args.runs, args.hours, args.top))
+    print()
+    print(
+        f"{len(strategies)} strategies x {args.runs} runs: {simulated} simulated, "
+        f"{len(strategies) - simulated} from cache, in {seconds:.1f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
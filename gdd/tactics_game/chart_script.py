@@ -6,6 +6,10 @@ import pandas as pd
 # Create the comprehensive Fire Emblem mechanics diagram
 fig = go.Figure()
 
+# Passed to update_layout() at the end (see utils/charts/benchmark_figure_build.py)
+annotations = []
+shapes = []
+
 # 1. WEAPON TRIANGLE (Upper Left: x=0-4, y=6-10)
 weapons = [
     {'name': 'Sword', 'x': 2, 'y': 9, 'color': '#4A90E2', 'beats': 'Axe'},
@@ -27,13 +31,13 @@ for weapon in weapons:
     ))
 
 # Add triangle arrows
-fig.add_annotation(x=1.25, y=8, ax=2, ay=9, arrowhead=2, arrowsize=1, arrowcolor='#4A90E2', arrowwidth=3)
-fig.add_annotation(x=2.75, y=7, ax=0.5, ay=7, arrowhead=2, arrowsize=1, arrowcolor='#E74C3C', arrowwidth=3)
-fig.add_annotation(x=2.75, y=8, ax=3.5, ay=7, arrowhead=2, arrowsize=1, arrowcolor='#2ECC71', arrowwidth=3)
+annotations.append(dict(x=1.25, y=8, ax=2, ay=9, arrowhead=2, arrowsize=1, arrowcolor='#4A90E2', arrowwidth=3))
+annotations.append(dict(x=2.75, y=7, ax=0.5, ay=7, arrowhead=2, arrowsize=1, arrowcolor='#E74C3C', arrowwidth=3))
+annotations.append(dict(x=2.75, y=8, ax=3.5, ay=7, arrowhead=2, arrowsize=1, arrowcolor='#2ECC71', arrowwidth=3))
 
 # Weapon triangle title
-fig.add_annotation(x=2, y=10.5, text="<b>Weapon Triangle</b>", showarrow=False, font=dict(size=14))
-fig.add_annotation(x=2, y=6.2, text="+15% Atk/Hit", showarrow=False, font=dict(size=10))
+annotations.append(dict(x=2, y=10.5, text="<b>Weapon Triangle</b>", showarrow=False, font=dict(size=14)))
+annotations.append(dict(x=2, y=6.2, text="+15% Atk/Hit", showarrow=False, font=dict(size=10)))
 
 # 2. COMBAT CALCULATION (Upper Right: x=6-10, y=6-10)
 combat_steps = [
@@ -44,21 +48,21 @@ combat_steps = [
     {'step': 'Double', 'formula': 'Spd ≥ 4 diff', 'y': 6.7}
 ]
 
-fig.add_annotation(x=8, y=10.5, text="<b>Combat Calc</b>", showarrow=False, font=dict(size=14))
+annotations.append(dict(x=8, y=10.5, text="<b>Combat Calc</b>", showarrow=False, font=dict(size=14)))
 
 for i, step in enumerate(combat_steps):
     # Step boxes
-    fig.add_shape(type="rect", x0=6.2, y0=step['y']-0.2, x1=9.8, y1=step['y']+0.2,
-                  fillcolor='#1FB8CD', opacity=0.7, line=dict(width=1, color='white'))
+    shapes.append(dict(type="rect", x0=6.2, y0=step['y']-0.2, x1=9.8, y1=step['y']+0.2,
+                       fillcolor='#1FB8CD', opacity=0.7, line=dict(width=1, color='white')))
     
-    fig.add_annotation(x=6.5, y=step['y'], text=f"{i+1}.", showarrow=False, font=dict(size=10))
-    fig.add_annotation(x=7.2, y=step['y'], text=step['step'], showarrow=False, font=dict(size=10))
-    fig.add_annotation(x=9.5, y=step['y'], text=step['formula'], showarrow=False, font=dict(size=9))
+    annotations.append(dict(x=6.5, y=step['y'], text=f"{i+1}.", showarrow=False, font=dict(size=10)))
+    annotations.append(dict(x=7.2, y=step['y'], text=step['step'], showarrow=False, font=dict(size=10)))
+    annotations.append(dict(x=9.5, y=step['y'], text=step['formula'], showarrow=False, font=dict(size=9)))
     
     # Arrows between steps
     if i < len(combat_steps) - 1:
-        fig.add_annotation(x=8, y=step['y']-0.35, ax=8, ay=step['y']-0.25, 
-                          arrowhead=1, arrowsize=0.8, arrowcolor='#666666')
+        annotations.append(dict(x=8, y=step['y']-0.35, ax=8, ay=step['y']-0.25, 
+                               arrowhead=1, arrowsize=0.8, arrowcolor='#666666'))
 
 # 3. TURN PHASES (Lower Left: x=0-4, y=1-5)
 phases = [
@@ -66,30 +70,30 @@ phases = [
     {'name': 'Enemy Phase', 'color': '#E74C3C', 'x': 2, 'y': 2}
 ]
 
-fig.add_annotation(x=2, y=5.5, text="<b>Turn Structure</b>", showarrow=False, font=dict(size=14))
+annotations.append(dict(x=2, y=5.5, text="<b>Turn Structure</b>", showarrow=False, font=dict(size=14)))
 
 for phase in phases:
-    fig.add_shape(type="rect", x0=0.5, y0=phase['y']-0.4, x1=3.5, y1=phase['y']+0.4,
-                  fillcolor=phase['color'], opacity=0.8, line=dict(width=2, color='white'))
-    fig.add_annotation(x=2, y=phase['y'], text=phase['name'], showarrow=False, 
-                      font=dict(size=12, color='white'))
+    shapes.append(dict(type="rect", x0=0.5, y0=phase['y']-0.4, x1=3.5, y1=phase['y']+0.4,
+                       fillcolor=phase['color'], opacity=0.8, line=dict(width=2, color='white')))
+    annotations.append(dict(x=2, y=phase['y'], text=phase['name'], showarrow=False, 
+                           font=dict(size=12, color='white')))
 
 # Phase transition arrow
-fig.add_annotation(x=2, y=3, ax=2, ay=3.6, arrowhead=2, arrowsize=1.2, arrowcolor='#666666', arrowwidth=3)
-fig.add_annotation(x=1.4, y=3, ax=1.4, ay=1.4, arrowhead=2, arrowsize=1.2, arrowcolor='#666666', arrowwidth=3)
+annotations.append(dict(x=2, y=3, ax=2, ay=3.6, arrowhead=2, arrowsize=1.2, arrowcolor='#666666', arrowwidth=3))
+annotations.append(dict(x=1.4, y=3, ax=1.4, ay=1.4, arrowhead=2, arrowsize=1.2, arrowcolor='#666666', arrowwidth=3))
 
 # Phase actions
 player_actions = ['Select Unit', 'Move', 'Action', 'Execute']
 enemy_actions = ['AI Plan', 'Move', 'Attack', 'End Turn']
 
 for i, action in enumerate(player_actions):
-    fig.add_annotation(x=0.2 + i*0.9, y=4.7, text=action, showarrow=False, font=dict(size=8))
+    annotations.append(dict(x=0.2 + i*0.9, y=4.7, text=action, showarrow=False, font=dict(size=8)))
 
 for i, action in enumerate(enemy_actions):
-    fig.add_annotation(x=0.2 + i*0.9, y=1.3, text=action, showarrow=False, font=dict(size=8))
+    annotations.append(dict(x=0.2 + i*0.9, y=1.3, text=action, showarrow=False, font=dict(size=8)))
 
 # 4. MOVEMENT GRID (Lower Right: x=6-10, y=1-5)
-fig.add_annotation(x=8, y=5.5, text="<b>Movement Grid</b>", showarrow=False, font=dict(size=14))
+annotations.append(dict(x=8, y=5.5, text="<b>Movement Grid</b>", showarrow=False, font=dict(size=14)))
 
 # Grid squares
 grid_size = 0.4
@@ -112,11 +116,11 @@ for i in range(5):
             color = '#ECEBD5'
             opacity = 0.3
         
-        fig.add_shape(type="rect", 
-                     x0=x_pos, y0=y_pos, 
-                     x1=x_pos + grid_size, y1=y_pos + grid_size,
-                     fillcolor=color, opacity=opacity, 
-                     line=dict(width=1, color='#666666'))
+        shapes.append(dict(type="rect", 
+                          x0=x_pos, y0=y_pos, 
+                          x1=x_pos + grid_size, y1=y_pos + grid_size,
+                          fillcolor=color, opacity=opacity, 
+                          line=dict(width=1, color='#666666')))
 
 # Unit marker
 fig.add_trace(go.Scatter(
@@ -128,9 +132,9 @@ fig.add_trace(go.Scatter(
 ))
 
 # Legend for grid
-fig.add_annotation(x=6.3, y=0.8, text="Unit", showarrow=False, font=dict(size=9, color='#4A90E2'))
-fig.add_annotation(x=7.3, y=0.8, text="Move", showarrow=False, font=dict(size=9, color='#4A90E2'))
-fig.add_annotation(x=8.3, y=0.8, text="Attack", showarrow=False, font=dict(size=9, color='#E74C3C'))
+annotations.append(dict(x=6.3, y=0.8, text="Unit", showarrow=False, font=dict(size=9, color='#4A90E2')))
+annotations.append(dict(x=7.3, y=0.8, text="Move", showarrow=False, font=dict(size=9, color='#4A90E2')))
+annotations.append(dict(x=8.3, y=0.8, text="Attack", showarrow=False, font=dict(size=9, color='#E74C3C')))
 
 # Update layout
 fig.update_layout(
@@ -138,7 +142,9 @@ fig.update_layout(
     xaxis=dict(showgrid=False, showticklabels=False, zeroline=False, range=[-0.5, 10.5]),
     yaxis=dict(showgrid=False, showticklabels=False, zeroline=False, range=[0, 11]),
     plot_bgcolor='rgba(0,0,0,0)',
-    showlegend=False
+    showlegend=False,
+    annotations=annotations,
+    shapes=shapes
 )
 
 fig.write_image("fire_emblem_mechanics.png")
\ No newline at end of file
@@ -0,0 +1,91 @@
+# Micro-benchmark for building the annotation-heavy GDD diagrams
+# Usage: python utils/charts/benchmark_figure_build.py [repeats]
+#
+# Runs each chart script with export disabled to capture its figure, then
+# times building the layout's annotations and shapes two ways on the same
+# content: one fig.add_annotation()/add_shape() call per item (what the
+# scripts used to do; every call validates the new object and copies the
+# layout's list) and one update_layout() with plain lists of dicts (what they
+# do now). Also reports the time to run each whole script.
+
+import os
+import sys
+import time
+import timeit
+
+import plotly.basedatatypes
+import plotly.graph_objects as go
+
+from chart_engine import REPO_ROOT, register_theme, run_chart_script
+
+SCRIPTS = (
+    "gdd/settlement/chart_script.py",
+    "gdd/tactics_game/chart_script.py",
+    "gdd/space_sim/chart_script.py",
+)
+
+
+def capture_figure(script):
+    """Run a chart script without exporting; return (figure, seconds)."""
+    captured = []
+    original = plotly.basedatatypes.BaseFigure.write_image
+    plotly.basedatatypes.BaseFigure.write_image = lambda figure, *args, **kwargs: captured.append(figure)
+    try:
+        started = time.perf_counter()
+        run_chart_script(script)
+        seconds = time.perf_counter() - started
+    finally:
+        plotly.basedatatypes.BaseFigure.write_image = original
+    return captured[-1], seconds
+
+
+def split_layout(figure):
+    """Figure JSON without annotations/shapes, plus those as plain dicts."""
+    spec = figure.to_plotly_json()
+    layout = dict(spec["layout"])
+    annotations = layout.pop("annotations", [])
+    shapes = layout.pop("shapes", [])
+    return {"data": spec["data"], "layout": layout}, annotations, shapes
+
+
+def build_per_call(base, annotations, shapes):
+    figure = go.Figure(base)
+    for shape in shapes:
+        figure.add_shape(**shape)
+    for annotation in annotations:
+        figure.add_annotation(**annotation)
+    return figure
+
+
+def build_batched(base, annotations, shapes):
+    figure = go.Figure(base)
+    figure.update_layout(annotations=annotations, shapes=shapes)
+    return figure
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    repeats = int(argv[0]) if argv else 20
+    register_theme()
+
+    print(f"{'chart':<34}{'items':>6}{'per call ms':>13}{'batched ms':>12}{'speedup':>9}{'script ms':>11}")
+    for relative_path in SCRIPTS:
+        script = os.path.join(REPO_ROOT, relative_path)
+        # First run pays the imports; time a warm run
+        capture_figure(script)
+        figure, script_seconds = capture_figure(script)
+        base, annotations, shapes = split_layout(figure)
+
+        per_call, batched = (
+            min(timeit.repeat(lambda: build(base, annotations, shapes), number=1, repeat=repeats))
+            for build in (build_per_call, build_batched)
+        )
+        print(
+            f"{relative_path:<34}{len(annotations) + len(shapes):>6}{per_call * 1000:>13.1f}"
+            f"{batched * 1000:>12.1f}{per_call / batched:>8.1f}x{script_seconds * 1000:>11.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,467 @@
+# Shared chart rendering engine for the site's Plotly/matplotlib charts
+# Usage: python utils/charts/chart_engine.py                 (render every chart)
+#        python utils/charts/chart_engine.py grea_development settlement_progression
+#        python utils/charts/chart_engine.py --list
+#        python utils/charts/chart_engine.py --force               (ignore the build cache)
+#        python utils/charts/chart_engine.py --workers 4           (default: one per core)
+#
+# charts.json declares every chart in the repo: the script (or Plotly figure
+# JSON) that builds it, the files it reads, the images it writes and optional
+# export settings. The engine renders them all in one process:
+#
+# - One exporter for the whole run. With Kaleido 1.x a single sync server
+#   (one headless Chrome) is started up front and reused by every
+#   fig.write_image() call; Kaleido 0.2.x keeps its own persistent
+#   subprocess. Running scripts one by one pays that startup per chart.
+# - Scripts run unchanged through utils/run_script.py: in their own directory,
+#   with the shared utils modules importable, as they run standalone. Their
+#   write_image() calls are captured and exported together per chart with
+#   plotly.io.write_images(), applying the spec's export defaults.
+# - matplotlib scripts run on the Agg backend and their figures are closed
+#   after each chart so nothing leaks into the next one. Scripts that draw
+#   through mpl_service.get_service() share one warm service per process.
+# - theme.json is registered as a named Plotly template (the brand palette
+#   scripts refer to with template="perplexity").
+#
+# Builds are incremental. .chart_cache.json records, per chart, a SHA-256 over
+# its script, declared inputs, the content hashes of the datasets it reads
+# from utils/datasets/datasets.sqlite, theme.json and spec, plus the size and
+# mtime of every output it wrote. A chart whose digest and outputs still match is
+# skipped, and when nothing is stale no exporter is started at all, so
+# rebuilding after one CSV edit only renders the charts that read it.
+#
+# Stale charts are spread over a process pool, one worker per core. Each
+# worker enters its own ChartEngine once, so its exporter stays warm for
+# every chart it renders, and the slowest charts of the previous build are
+# queued first. chart_script*.py files under the chart directories that are
+# missing from charts.json are reported so new charts are not forgotten.
+
+import argparse
+import contextlib
+import hashlib
+import json
+import multiprocessing.util
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "charts.json")
+THEME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "theme.json")
+UTILS_DIR = os.path.join(REPO_ROOT, "utils")
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".chart_cache.json")
+# Bump when the engine changes how charts are rendered so cached builds are redone
+CACHE_VERSION = 1
+# Top-level directories searched for chart_script*.py files
+CHART_DIRS = ("anime", "gdd", "game_apps", "apps")
+SKIPPED_DIRS = {"node_modules", "vendor", "__pycache__"}
+
+
+class ChartSpecError(ValueError):
+    pass
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """Read and validate charts.json; returns the list of chart specs."""
+    with open(path, encoding="utf-8") as handle:
+        charts = json.load(handle)["charts"]
+
+    names, outputs = set(), {}
+    for spec in charts:
+        name = spec.get("name")
+        if not name or name in names:
+            raise ChartSpecError(f"Chart specs need unique names (got {name!r})")
+        names.add(name)
+        if ("script" in spec) == ("figure" in spec):
+            raise ChartSpecError(f"Chart '{name}' needs exactly one of 'script' or 'figure'")
+        if not spec.get("outputs"):
+            raise ChartSpecError(f"Chart '{name}' declares no outputs")
+        for output in spec["outputs"]:
+            if output in outputs:
+                raise ChartSpecError(f"Charts '{outputs[output]}' and '{name}' both write {output}")
+            outputs[output] = name
+    return charts
+
+
+def register_theme(path=THEME_PATH):
+    """Register theme.json as a named Plotly template; no-op if the file is absent."""
+    if not path or not os.path.exists(path):
+        return
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    with open(path, encoding="utf-8") as handle:
+        theme = json.load(handle)
+    pio.templates[theme["name"]] = go.layout.Template(theme["template"])
+
+
+def discover_chart_scripts(repo_root=REPO_ROOT):
+    """Repo-relative paths of every chart_script*.py under CHART_DIRS."""
+    scripts = []
+    for top in CHART_DIRS:
+        for directory, subdirectories, files in os.walk(os.path.join(repo_root, top)):
+            subdirectories[:] = [name for name in subdirectories if name not in SKIPPED_DIRS and not name.startswith(".")]
+            scripts.extend(
+                os.path.relpath(os.path.join(directory, name), repo_root).replace(os.sep, "/")
+                for name in files
+                if name.startswith("chart_script") and name.endswith(".py")
+            )
+    return sorted(scripts)
+
+
+class ChartResult:
+    def __init__(self, name, seconds, outputs, error=None, cached=False):
+        self.name = name
+        self.seconds = seconds
+        self.outputs = outputs
+        self.error = error
+        self.cached = cached
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _output_stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class BuildCache:
+    """Content hashes of each chart's sources and stats of the outputs they produced."""
+
+    def __init__(self, path=CACHE_PATH, repo_root=REPO_ROOT, theme_path=THEME_PATH):
+        self.path = path
+        self.repo_root = repo_root
+        self.theme_digest = _file_digest(theme_path) if theme_path and os.path.exists(theme_path) else None
+        self._file_digests = {}
+        self._dataset_digests = {}
+        try:
+            with open(path, encoding="utf-8") as handle:
+                cache = json.load(handle)
+        except (OSError, ValueError):
+            cache = {}
+        self.charts = cache.get("charts", {}) if cache.get("version") == CACHE_VERSION else {}
+
+    def _source_digest(self, relative_path):
+        if relative_path not in self._file_digests:
+            try:
+                self._file_digests[relative_path] = _file_digest(os.path.join(self.repo_root, relative_path))
+            except OSError:
+                # A missing input is part of the key too; the render reports the error
+                self._file_digests[relative_path] = None
+        return self._file_digests[relative_path]
+
+    def _dataset_digest(self, name):
+        if name not in self._dataset_digests:
+            with _shared_modules():
+                from dataset_store import DatasetError, DatasetStore
+
+            with DatasetStore() as store:
+                try:
+                    self._dataset_digests[name] = store.digest(name)
+                except DatasetError:
+                    self._dataset_digests[name] = None
+        return self._dataset_digests[name]
+
+    def digest(self, spec):
+        sources = [spec.get("script") or spec["figure"]] + list(spec.get("inputs", []))
+        key = {
+            "spec": spec,
+            "theme": self.theme_digest,
+            "sources": {path: self._source_digest(path) for path in sources},
+            "datasets": {name: self._dataset_digest(name) for name in spec.get("datasets", [])},
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def is_fresh(self, spec):
+        entry = self.charts.get(spec["name"])
+        if entry is None or entry["digest"] != self.digest(spec):
+            return False
+        return all(
+            _output_stat(os.path.join(self.repo_root, output)) == entry["outputs"].get(output)
+            for output in spec["outputs"]
+        )
+
+    def record(self, spec, result):
+        """Remember a successful render; failed or incomplete ones are retried next run."""
+        outputs = {output: _output_stat(os.path.join(self.repo_root, output)) for output in spec["outputs"]}
+        if result.error is not None or None in outputs.values():
+            self.charts.pop(spec["name"], None)
+            return
+        self.charts[spec["name"]] = {"digest": self.digest(spec), "outputs": outputs, "seconds": round(result.seconds, 3)}
+
+    def last_seconds(self, spec):
+        return self.charts.get(spec["name"], {}).get("seconds", 0.0)
+
+    def save(self):
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump({"version": CACHE_VERSION, "charts": self.charts}, handle, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+
+@contextlib.contextmanager
+def _shared_modules():
+    # utils/run_script.py owns the list of shared module directories
+    if UTILS_DIR not in sys.path:
+        sys.path.append(UTILS_DIR)
+    import run_script
+
+    previous_path = list(sys.path)
+    sys.path[:0] = run_script.SHARED_MODULE_DIRS
+    try:
+        yield run_script
+    finally:
+        sys.path[:] = previous_path
+
+
+def run_chart_script(script):
+    """Run a chart script as the engine does: in its directory, with the shared utils modules importable."""
+    with _shared_modules() as runner:
+        runner.run_script(script)
+
+
+class ChartEngine:
+    """Renders chart specs in-process with one warm exporter; use as a context manager."""
+
+    def __init__(self, repo_root=REPO_ROOT, theme_path=THEME_PATH):
+        self.repo_root = repo_root
+        self.theme_path = theme_path
+        self.exporter_note = None
+        self._pending = []
+        self._original_write_image = None
+        self._kaleido_server = False
+
+    def __enter__(self):
+        os.environ.setdefault("MPLBACKEND", "Agg")
+        try:
+            import plotly.basedatatypes
+        except ImportError:
+            return self
+
+        # Capture write_image() calls so each chart's figures are exported together
+        self._original_write_image = plotly.basedatatypes.BaseFigure.write_image
+        pending = self._pending
+
+        def deferred_write_image(figure, file, *args, **kwargs):
+            pending.append((figure, os.path.abspath(file) if isinstance(file, str) else file, args, kwargs))
+
+        plotly.basedatatypes.BaseFigure.write_image = deferred_write_image
+        register_theme(self.theme_path)
+        self._start_exporter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._original_write_image is not None:
+            import plotly.basedatatypes
+
+            plotly.basedatatypes.BaseFigure.write_image = self._original_write_image
+        if self._kaleido_server:
+            import kaleido
+
+            kaleido.stop_sync_server(silence_warnings=True)
+        return False
+
+    def _start_exporter(self):
+        try:
+            import kaleido
+        except ImportError:
+            self.exporter_note = "kaleido is not installed; Plotly charts will fail to export"
+            return
+        if not hasattr(kaleido, "start_sync_server"):
+            # Kaleido 0.2.x: the first export starts a subprocess that is reused
+            return
+        try:
+            # The server starts Chrome on a background thread and hangs later
+            # calls if that fails, so check for Chrome here first.
+            kaleido.Kaleido()
+        except RuntimeError as error:
+            self.exporter_note = f"Kaleido cannot export ({error})"
+            return
+        kaleido.start_sync_server(silence_warnings=True)
+        self._kaleido_server = True
+
+    def _flush_plotly(self, defaults):
+        pending, self._pending[:] = list(self._pending), []
+        if not pending:
+            return []
+        import plotly.io as pio
+
+        figures, paths, options = [], [], []
+        for figure, path, args, kwargs in pending:
+            if args:
+                # Positional format/scale/width/height: export this one as written
+                self._original_write_image(figure, path, *args, **kwargs)
+                continue
+            figures.append(figure)
+            paths.append(path)
+            options.append({**defaults, **kwargs})
+
+        keys = sorted({key for option in options for key in option})
+        grouped = {}
+        for figure, path, option in zip(figures, paths, options):
+            grouped.setdefault(tuple((key, option.get(key)) for key in keys), []).append((figure, path))
+        for option, items in grouped.items():
+            kwargs = {key: value for key, value in option if value is not None}
+            if hasattr(pio, "write_images") and len(items) > 1:
+                pio.write_images([figure for figure, _ in items], [path for _, path in items], **kwargs)
+            else:
+                for figure, path in items:
+                    self._original_write_image(figure, path, **kwargs)
+        return [path for _, path, _, _ in pending]
+
+    def render(self, spec):
+        """Render one chart spec; errors are reported in the result, not raised."""
+        started = time.perf_counter()
+        error = None
+        written = []
+        try:
+            if "script" in spec:
+                run_chart_script(os.path.join(self.repo_root, spec["script"]))
+            else:
+                import plotly.io as pio
+
+                figure = pio.read_json(os.path.join(self.repo_root, spec["figure"]))
+                for output in spec["outputs"]:
+                    figure.write_image(os.path.join(self.repo_root, output))
+            written = self._flush_plotly(spec.get("export", {}))
+        except Exception as exception:  # a broken chart must not stop the batch
+            self._pending.clear()
+            error = f"{type(exception).__name__}: {' '.join(str(exception).split())}"
+        finally:
+            if "matplotlib.pyplot" in sys.modules:
+                sys.modules["matplotlib.pyplot"].close("all")
+        return ChartResult(spec["name"], time.perf_counter() - started, written, error)
+
+    def render_all(self, specs, on_result=None):
+        results = []
+        for spec in specs:
+            result = self.render(spec)
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+        return results
+
+
+_worker_engine = None
+
+
+def _start_worker(repo_root, theme_path):
+    global _worker_engine
+    _worker_engine = ChartEngine(repo_root, theme_path).__enter__()
+    # Pool workers leave through multiprocessing's exit hooks, not atexit
+    multiprocessing.util.Finalize(_worker_engine, _worker_engine.__exit__, exitpriority=10)
+
+
+def _render_in_worker(spec):
+    return _worker_engine.render(spec), _worker_engine.exporter_note
+
+
+def render_parallel(specs, workers=None, on_result=None, repo_root=REPO_ROOT, theme_path=THEME_PATH):
+    """
+    Render specs across a process pool whose workers each keep one engine
+    (and exporter) warm; returns (results in completion order, exporter notes).
+    """
+    results, notes = [], set()
+    workers = min(workers or os.cpu_count() or 1, len(specs))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_start_worker, initargs=(repo_root, theme_path)) as pool:
+        futures = [pool.submit(_render_in_worker, spec) for spec in specs]
+        for future in as_completed(futures):
+            result, note = future.result()
+            if note:
+                notes.add(note)
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    return results, sorted(notes)
+
+
+def select_charts(charts, names):
+    if not names:
+        return charts
+    by_name = {spec["name"]: spec for spec in charts}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise ChartSpecError(f"Unknown chart(s): {', '.join(unknown)}")
+    return [by_name[name] for name in names]
+
+
+def print_result(result):
+    if result.cached:
+        status = "up to date"
+    else:
+        status = "ok" if result.error is None else f"FAILED {result.error}"
+    print(f"{result.name:<32}{result.seconds:>8.2f}s  {status}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the repo's charts in one batch")
+    parser.add_argument("charts", nargs="*", help="Chart names to render (default: all)")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Chart spec manifest")
+    parser.add_argument("--list", action="store_true", help="List chart specs and exit")
+    parser.add_argument("--force", action="store_true", help="Render even charts whose outputs are fresh")
+    parser.add_argument("--cache", default=CACHE_PATH, help="Build cache file ('' to disable)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    manifest = load_manifest(args.manifest)
+    listed = {spec.get("script") for spec in manifest}
+    for script in discover_chart_scripts():
+        if script not in listed:
+            print(f"Note: {script} is not in {os.path.basename(args.manifest)}", file=sys.stderr)
+    charts = select_charts(manifest, args.charts)
+    if args.list:
+        for spec in charts:
+            print(f"{spec['name']:<32}{spec.get('script') or spec.get('figure')}")
+        return 0
+
+    started = time.perf_counter()
+    cache = BuildCache(args.cache) if args.cache else None
+    stale = []
+    for spec in charts:
+        if cache is not None and not args.force and cache.is_fresh(spec):
+            print_result(ChartResult(spec["name"], 0.0, spec["outputs"], cached=True))
+        else:
+            stale.append(spec)
+
+    results = []
+    if stale:
+        def on_result(result):
+            print_result(result)
+            if cache is not None:
+                cache.record(by_name[result.name], result)
+
+        by_name = {spec["name"]: spec for spec in stale}
+        if cache is not None:
+            # Longest first, so a slow chart does not start last and hold up the build
+            stale.sort(key=cache.last_seconds, reverse=True)
+        if min(args.workers or os.cpu_count() or 1, len(stale)) > 1:
+            results, notes = render_parallel(stale, args.workers, on_result)
+        else:
+            with ChartEngine() as engine:
+                notes = [engine.exporter_note] if engine.exporter_note else []
+                results = engine.render_all(stale, on_result)
+        for note in notes:
+            print(f"Note: {note}", file=sys.stderr)
+        if cache is not None:
+            cache.save()
+
+    failed = sum(1 for result in results if result.error)
+    chart_seconds = sum(result.seconds for result in results)
+    print(f"Rendered {len(results) - failed}/{len(results)} stale charts "
+          f"({len(charts) - len(stale)} up to date) in {time.perf_counter() - started:.2f}s "
+          f"({chart_seconds:.2f}s of chart time)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+# Headless matplotlib chart service: specs in, PNG/SVG bytes out
+# Usage: python utils/charts/mpl_service.py spec.json out.png
+#        python utils/charts/mpl_service.py --serve --port 8770
+#        (POST a JSON spec to /render[?format=svg], get the image back)
+#
+# Charts are drawn with the object-oriented API straight onto Agg canvases:
+# no pyplot state machine, no GUI backend selection and no global figure
+# registry. One MatplotlibService keeps a Figure per (size, dpi) and clears
+# and redraws it for the next chart instead of creating a new one, and it
+# resolves fonts and draws a throwaway chart when it starts, so the first
+# real render does not pay for the font cache. render() returns bytes from
+# an in-memory buffer; render_to_file() writes atomically for the static
+# pages.
+#
+# A spec is a JSON-able dict:
+#
+#   {"kind": "bar", "size": [12, 8], "dpi": 300,
+#    "labels": [...], "values": [...], "color": "blue" | [...], "alpha": 0.7,
+#    "label": "Vegeta", "value_labels": {"offset": 500, "fontweight": "bold"},
+#    "xtick_rotation": 45, "title": "...", "xlabel": "...", "ylabel": "...",
+#    "hlines": [{"y": 30000, "color": "red", "linestyle": "--", "label": "..."}],
+#    "legend": true | ["label", ...]}
+#
+# New chart kinds are functions of (axes, spec) added to CHART_KINDS.
+
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from matplotlib import font_manager, rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+DEFAULT_SIZE = (10, 6)
+DEFAULT_DPI = 100
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def draw_bar(axes, spec):
+    labels, values = spec["labels"], spec["values"]
+    positions = range(len(values))
+    axes.bar(positions, values, color=spec.get("color"), alpha=spec.get("alpha"), label=spec.get("label"))
+    value_labels = spec.get("value_labels")
+    if value_labels:
+        offset = value_labels.get("offset", 0)
+        for position, value in zip(positions, values):
+            axes.text(position, value + offset, f"{value}", ha="center", fontweight=value_labels.get("fontweight"))
+    axes.set_xticks(list(positions), labels, rotation=spec.get("xtick_rotation", 0),
+                    ha="right" if spec.get("xtick_rotation") else "center")
+
+
+CHART_KINDS = {"bar": draw_bar}
+
+
+class MatplotlibService:
+    """Renders chart specs on reused Agg figures; safe to share between threads."""
+
+    def __init__(self, warm=True):
+        self._figures = {}
+        self._lock = threading.Lock()
+        if warm:
+            self.warm_up()
+
+    def warm_up(self):
+        # Resolving fonts and laying out text the first time is the slow part
+        for weight in ("normal", "bold"):
+            font_manager.findfont(font_manager.FontProperties(family=rcParams["font.family"], weight=weight))
+        self.render({"kind": "bar", "size": [2, 2], "labels": ["a"], "values": [1], "title": "warm-up",
+                     "value_labels": {"fontweight": "bold"}, "legend": ["a"]})
+
+    def _figure(self, size, dpi):
+        key = (tuple(size), dpi)
+        figure = self._figures.get(key)
+        if figure is None:
+            # The tight layout engine runs inside savefig()'s layout pass, which
+            # is cheaper than calling tight_layout() on top of it
+            figure = Figure(figsize=size, dpi=dpi, layout="tight")
+            FigureCanvasAgg(figure)
+            self._figures[key] = figure
+        else:
+            figure.clear()
+        return figure
+
+    def _draw(self, figure, spec):
+        kind = spec.get("kind", "bar")
+        if kind not in CHART_KINDS:
+            raise ValueError(f"Unknown chart kind '{kind}' (known: {', '.join(sorted(CHART_KINDS))})")
+        axes = figure.add_subplot()
+        CHART_KINDS[kind](axes, spec)
+        for line in spec.get("hlines", []):
+            axes.axhline(**line)
+        if spec.get("title"):
+            axes.set_title(spec["title"])
+        if spec.get("xlabel"):
+            axes.set_xlabel(spec["xlabel"])
+        if spec.get("ylabel"):
+            axes.set_ylabel(spec["ylabel"])
+        legend = spec.get("legend")
+        if legend is True:
+            axes.legend()
+        elif legend:
+            axes.legend(legend)
+
+    def render(self, spec, format="png"):
+        """Draw `spec` and return the encoded image bytes."""
+        if format not in FORMATS:
+            raise ValueError(f"Unsupported format '{format}' (known: {', '.join(FORMATS)})")
+        buffer = io.BytesIO()
+        with self._lock:
+            figure = self._figure(spec.get("size", DEFAULT_SIZE), spec.get("dpi", DEFAULT_DPI))
+            self._draw(figure, spec)
+            figure.savefig(buffer, format=format)
+        return buffer.getvalue()
+
+    def render_to_file(self, spec, path):
+        format = os.path.splitext(path)[1].lstrip(".").lower() or "png"
+        data = self.render(spec, format)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as handle:
+            handle.write(data)
+        os.replace(temp_path, path)
+        return len(data)
+
+
+_default_service = None
+_default_lock = threading.Lock()
+
+
+def get_service():
+    """Process-wide warm service, so every chart script run by the engine shares it."""
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            _default_service = MatplotlibService()
+        return _default_service
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    server_version = "MatplotlibService/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/render":
+            self._reply(404, b"not found", "text/plain")
+            return
+        format = parse_qs(url.query).get("format", ["png"])[0]
+        try:
+            spec = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            image = self.server.service.render(spec, format)
+        except (ValueError, KeyError, TypeError) as error:
+            self._reply(400, f"{type(error).__name__}: {error}".encode("utf-8"), "text/plain")
+            return
+        self._reply(200, image, FORMATS[format])
+
+    def _reply(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8770):
+    server = ThreadingHTTPServer((host, port), RenderHandler)
+    server.service = get_service()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render matplotlib chart specs to images")
+    parser.add_argument("spec", nargs="?", help="JSON chart spec file")
+    parser.add_argument("output", nargs="?", help="Image file to write (.png or .svg)")
+    parser.add_argument("--serve", action="store_true", help="Serve POST /render instead")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8770)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        server = serve(args.host, args.port)
+        print(f"Rendering charts on http://{args.host}:{args.port}/render")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+
+    if not args.spec or not args.output:
+        parser.error("spec and output are required unless --serve is given")
+    with open(args.spec, encoding="utf-8") as handle:
+        spec = json.load(handle)
+    size = get_service().render_to_file(spec, args.output)
+    print(f"Wrote {args.output} ({size} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+# Headless batch runner for the random prompt workflows
+# Usage: python batch_runner.py --count 20
+#        python batch_runner.py --workflow simple-random-workflow.json --category space --count 5
+#        python batch_runner.py --server 127.0.0.1:8188 --in-flight 3 --results runs.jsonl
+#
+# Compiles a UI-format workflow (random-prompt-workflow.json or
+# simple-random-workflow.json) once with workflow_compiler.py and submits one
+# job per seed, splicing only the per-job values into the cached prompt. The
+# RandomPromptGenerator seed (and category) is patched per job; workflows
+# without that node get the prompt generated locally and written into the
+# positive CLIPTextEncode instead.
+#
+# Unlike comfyui-generate.ps1, which queues one prompt and waits for it,
+# the runner keeps --in-flight prompts queued on the server at all times,
+# so the next job is already waiting when the GPU finishes the current one.
+# Try it offline against comfyui_stub_server.py.
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import gallery_derivatives
+import random_prompt_generator_node as node
+from image_downloader import GALLERY_DIR, ImageDownloader
+from image_index import INDEX_PATH, ImageIndex, workflow_checkpoint
+from job_metrics import EventStream, MetricsRegistry, format_summary
+from workflow_compiler import compile_workflow
+
+# What one failed job or download can raise (TimeoutError is an OSError, a
+# JSONDecodeError a ValueError); the job is recorded as failed and the batch goes on
+JOB_ERRORS = (OSError, RuntimeError, ValueError, KeyError, http.client.HTTPException)
+
+
+def job_values(compiled, seed, category=None, add_quality_modifiers=None):
+    """
+    Return the per-job values for `compiled` plus the prompt components
+    (category, prompt, ...) the job will render. Every KSampler gets `seed`
+    too so image noise varies per job.
+
+    With no_repeat or a recency penalty the node's output depends on what
+    the server generated before, which the history does not return, so the
+    prompt (and an "all" category) is recorded as None instead of guessed.
+    """
+    values = {"noise_seed": seed} if "noise_seed" in compiled.mutable else {}
+    category = category if category is not None else compiled.defaults.get("category", "all")
+    if add_quality_modifiers is None:
+        add_quality_modifiers = compiled.defaults.get("add_quality_modifiers", True)
+
+    if "prompt_seed" in compiled.mutable:
+        values["prompt_seed"] = seed % 1000000
+        for name, value in (("category", category), ("add_quality_modifiers", add_quality_modifiers)):
+            if name in compiled.mutable:
+                values[name] = value
+        generator = compiled.prompt[compiled.mutable["prompt_seed"][0][0]]["inputs"]
+        if generator.get("no_repeat") or generator.get("recency_penalty", 0.0) != 0.0:
+            return values, {"category": None if category == "all" else category, "prompt": None}
+        components = node.prompt_components(
+            values["prompt_seed"], category, add_quality_modifiers,
+            generator.get("vocabulary", "builtin"), generator.get("template", ""),
+            generator.get("rng_stream", "legacy"), generator.get("category_weights", "")
+        )
+        return values, components
+
+    if "positive_text" not in compiled.mutable:
+        raise ValueError("Workflow has neither a RandomPromptGenerator nor a positive prompt to patch")
+    components = node.prompt_components(seed % 1000000, category, add_quality_modifiers)
+    values["positive_text"] = components["prompt"]
+    return values, components
+
+
+class ComfyUIClient:
+    """Blocking JSON calls to the ComfyUI HTTP API, run off the event loop."""
+
+    def __init__(self, server, timeout=30):
+        self.base_url = f"http://{server}"
+        self.timeout = timeout
+        self.client_id = str(uuid.uuid4())
+
+    def _request(self, path, data=None):
+        request = urllib.request.Request(
+            self.base_url + path, data=data, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as error:
+            detail = error.read().decode("utf-8", "replace")
+            raise RuntimeError(f"ComfyUI returned HTTP {error.code} for {path}: {detail}") from None
+
+    async def queue_prompt(self, compiled, **values):
+        body = compiled.encode(self.client_id, **values)
+        response = await asyncio.to_thread(self._request, "/prompt", body)
+        return response["prompt_id"]
+
+    async def history(self, prompt_id):
+        response = await asyncio.to_thread(self._request, f"/history/{prompt_id}")
+        return response.get(prompt_id)
+
+
+def output_images(history_entry):
+    return [image for output in history_entry.get("outputs", {}).values() for image in output.get("images", [])]
+
+
+class BatchRunner:
+    """Keeps up to `in_flight` jobs queued on the server until every job is done."""
+
+    def __init__(self, client, compiled, in_flight=2, poll_interval=0.5, job_timeout=600,
+                 downloader=None, index=None, events=None, metrics=None):
+        self.client = client
+        self.compiled = compiled
+        self.checkpoint = workflow_checkpoint(compiled.prompt)
+        self.downloader = downloader
+        self.index = index
+        self.events = events
+        self.metrics = metrics
+        self.in_flight = in_flight
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+
+    async def run_job(self, seed, category=None, add_quality_modifiers=None):
+        values, components = job_values(self.compiled, seed, category, add_quality_modifiers)
+        started = time.monotonic()
+        record = {
+            "seed": seed,
+            "prompt_seed": values.get("prompt_seed", seed % 1000000),
+            "category": components["category"],
+            "prompt": components["prompt"],
+            "checkpoint": self.checkpoint,
+            "workflow_hash": self.compiled.source_hash,
+            "queued_at": time.time(),
+            "prompt_id": None,
+            "images": [],
+            "error": None
+        }
+        try:
+            record["prompt_id"] = await self.client.queue_prompt(self.compiled, **values)
+            if self.events is not None and self.events.alive:
+                # Completion arrives over the websocket; history is then fetched once.
+                # If the stream ends meanwhile the wait returns and polling takes over.
+                timings = self.events.job(record["prompt_id"])
+                await asyncio.to_thread(timings.done.wait, self.job_timeout)
+            while True:
+                entry = await self.client.history(record["prompt_id"])
+                if entry is not None:
+                    record["images"] = output_images(entry)
+                    break
+                if time.monotonic() - started > self.job_timeout:
+                    raise TimeoutError(f"job did not finish within {self.job_timeout}s")
+                await asyncio.sleep(self.poll_interval)
+        except JOB_ERRORS as error:
+            record["error"] = str(error) or type(error).__name__
+        record["seconds"] = round(time.monotonic() - started, 3)
+        if self.events is not None and record["prompt_id"]:
+            record["timings"] = self.events.pop(record["prompt_id"]).summarize(record["queued_at"])
+        return record
+
+    async def run(self, seeds, category=None, add_quality_modifiers=None, on_result=None):
+        jobs = asyncio.Queue()
+        for seed in seeds:
+            jobs.put_nowait(seed)
+        results = []
+        finishing = []
+
+        async def finish(record):
+            # Downloads run beside the workers so the next job is queued right away
+            if self.downloader is not None and not record["error"]:
+                started = time.monotonic()
+                try:
+                    record["files"] = await self.downloader.download_all(record["images"])
+                except JOB_ERRORS as error:
+                    record["error"] = f"download failed: {error or type(error).__name__}"
+                record["download_seconds"] = round(time.monotonic() - started, 3)
+                if self.index is not None and not record["error"]:
+                    self.index.add_record(record)
+            if self.metrics is not None and not record["error"]:
+                self.metrics.record_job(record, self.compiled.prompt)
+            results.append(record)
+            if on_result is not None:
+                on_result(record)
+
+        async def worker():
+            while not jobs.empty():
+                seed = jobs.get_nowait()
+                record = await self.run_job(seed, category, add_quality_modifiers)
+                finishing.append(asyncio.create_task(finish(record)))
+
+        await asyncio.gather(*(worker() for _ in range(max(1, self.in_flight))))
+        await asyncio.gather(*finishing)
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run random prompt workflows against a ComfyUI server")
+    parser.add_argument("--server", default="127.0.0.1:8188", help="ComfyUI host:port")
+    parser.add_argument("--workflow", default="random-prompt-workflow.json", help="UI-format workflow file")
+    parser.add_argument("--seed", type=int, default=0, help="First job seed")
+    parser.add_argument("--count", type=int, default=1, help="Number of jobs")
+    parser.add_argument("--category", default=None, help="Override the prompt category")
+    parser.add_argument("--no-quality", action="store_true", help="Omit quality and style modifiers")
+    parser.add_argument("--keep-previews", action="store_true", help="Also run PreviewImage nodes")
+    parser.add_argument("--in-flight", type=int, default=2, help="Prompts kept queued on the server")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between history checks")
+    parser.add_argument("--results", default=None, help="Append one JSON line per job to this file")
+    parser.add_argument("--download", nargs="?", const=GALLERY_DIR, default=None,
+                        help="Download finished images (default directory: gallery/portraits)")
+    parser.add_argument("--index", nargs="?", const=INDEX_PATH, default=None,
+                        help="Record downloaded images in a SQLite index (default: gallery/images.sqlite)")
+    parser.add_argument("--metrics", default=None,
+                        help="Collect per-node timings over the websocket and write histograms to this JSON file")
+    parser.add_argument("--derivatives", action="store_true",
+                        help="After downloading, build gallery thumbnails (needs Pillow)")
+    args = parser.parse_args(argv)
+    if (args.derivatives or args.index) and not args.download:
+        parser.error("--derivatives and --index need --download")
+    if args.derivatives and gallery_derivatives.Image is None:
+        parser.error("--derivatives needs Pillow (pip install pillow)")
+
+    compiled = compile_workflow(args.workflow, keep_previews=args.keep_previews)
+    downloader = ImageDownloader(args.server, args.download) if args.download else None
+    index = ImageIndex(args.index) if args.index else None
+    client = ComfyUIClient(args.server)
+    events = metrics = None
+    if args.metrics:
+        metrics = MetricsRegistry()
+        try:
+            events = EventStream(args.server, client.client_id).start()
+        except OSError as error:
+            print(f"No websocket events ({error}); only download timings will be recorded", file=sys.stderr)
+    runner = BatchRunner(
+        client, compiled, args.in_flight, args.poll_interval,
+        downloader=downloader, index=index, events=events, metrics=metrics
+    )
+    results_file = open(args.results, "a", encoding="utf-8") if args.results else None
+    done = 0
+
+    def report(record):
+        nonlocal done
+        done += 1
+        status = record["error"] or ", ".join(image["filename"] for image in record["images"])
+        duplicates = sum(1 for entry in record.get("files", []) if entry["duplicate"])
+        if duplicates:
+            status += f" ({duplicates} duplicate(s) skipped)"
+        print(f"[{done}/{args.count}] seed {record['seed']} ({record['seconds']:.1f}s): {status}")
+        if results_file is not None:
+            results_file.write(json.dumps(record) + "\n")
+            results_file.flush()
+
+    started = time.monotonic()
+    try:
+        results = asyncio.run(runner.run(
+            range(args.seed, args.seed + args.count),
+            args.category,
+            False if args.no_quality else None,
+            report
+        ))
+    finally:
+        if results_file is not None:
+            results_file.close()
+        if downloader is not None:
+            downloader.close()
+        if index is not None:
+            index.close()
+        if events is not None:
+            events.close()
+    elapsed = time.monotonic() - started
+
+    if args.derivatives:
+        # gallery/portraits -> gallery/derived
+        dest = os.path.join(os.path.dirname(os.path.abspath(args.download)), "derived")
+        counts = gallery_derivatives.build_derivatives(args.download, dest)
+        print(f"Derivatives: {counts['processed']} new, {counts['failed']} failed, {counts['unchanged']} unchanged")
+
+    if metrics is not None:
+        metrics.write(args.metrics)
+        print(format_summary(metrics.to_list()))
+
+    failed = sum(1 for record in results if record["error"])
+    print(f"Finished {len(results) - failed}/{len(results)} jobs in {elapsed:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
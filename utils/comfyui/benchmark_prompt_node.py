@@ -0,0 +1,100 @@
+# Micro-benchmark for the Random Prompt Generator node
+# Usage: python benchmark_prompt_node.py [iterations]
+#
+# Compares the shared module-level vocabulary against the previous behaviour,
+# where every node instance rebuilt its own dicts/lists in __init__, every
+# "all" request rebuilt list(prompt_categories.keys()) and every call reseeded
+# the global `random` module.
+
+import random
+import sys
+import timeit
+import tracemalloc
+
+import random_prompt_generator_node as node
+
+
+class LegacyRandomPromptGenerator(node.RandomPromptGenerator):
+    """The old node: per-instance vocabulary copies and the global `random` module."""
+
+    def __init__(self):
+        self.prompt_categories = {
+            name: list(prompts) for name, prompts in node.PROMPT_CATEGORIES.items()
+        }
+        self.quality_modifiers = list(node.QUALITY_MODIFIERS)
+        self.style_modifiers = list(node.STYLE_MODIFIERS)
+
+    def generate_random_prompt(self, category, add_quality_modifiers, seed):
+        random.seed(seed)
+        if category == "all":
+            selected_category = random.choice(list(self.prompt_categories.keys()))
+        else:
+            selected_category = category
+        base_prompt = random.choice(self.prompt_categories[selected_category])
+        if add_quality_modifiers:
+            quality_mod = random.choice(self.quality_modifiers)
+            style_mod = random.choice(self.style_modifiers)
+            return (f"{base_prompt}, {quality_mod}, {style_mod}",)
+        return (base_prompt,)
+
+
+def instance_memory(node_class, count=1000):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    instances = [node_class() for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del instances
+    return allocated / count
+
+
+def per_call_seconds(node_class, iterations):
+    generator = node_class()
+    seeds = iter(range(10**9))
+    return min(timeit.repeat(
+        lambda: generator.generate_random_prompt("all", True, next(seeds)),
+        number=iterations,
+        repeat=5
+    )) / iterations
+
+
+def init_seconds(node_class, iterations):
+    return min(timeit.repeat(node_class, number=iterations, repeat=5)) / iterations
+
+
+def check_same_prompts(seeds=range(1000)):
+    # The shared node must keep every legacy seed's prompt
+    legacy, shared = LegacyRandomPromptGenerator(), node.RandomPromptGenerator()
+    for seed in seeds:
+        for add_quality_modifiers in (True, False):
+            expected = legacy.generate_random_prompt("all", add_quality_modifiers, seed)
+            if shared.generate_random_prompt("all", add_quality_modifiers, seed) != expected:
+                raise SystemExit(f"Seed {seed} no longer produces {expected[0]!r}")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    print("Random Prompt Generator micro-benchmark")
+    print("=" * 50)
+    print(f"{'':<22}{'legacy':>14}{'shared':>14}")
+    rows = [
+        ("__init__ (us)", init_seconds, 1e6),
+        ("generate 'all' (us)", per_call_seconds, 1e6),
+    ]
+    for label, measure, scale in rows:
+        legacy = measure(LegacyRandomPromptGenerator, iterations) * scale
+        shared = measure(node.RandomPromptGenerator, iterations) * scale
+        print(f"{label:<22}{legacy:>14.3f}{shared:>14.3f}")
+
+    legacy_bytes = instance_memory(LegacyRandomPromptGenerator)
+    shared_bytes = instance_memory(node.RandomPromptGenerator)
+    print(f"{'bytes per instance':<22}{legacy_bytes:>14.0f}{shared_bytes:>14.0f}")
+
+    # After timing, so the node's prompt cache does not serve the timed seeds
+    check_same_prompts()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+# Minimal stand-in for the ComfyUI HTTP API, for exercising the batch tools offline
+# Usage: python comfyui_stub_server.py [--port 8188] [--job-seconds 0.5]
+#
+# Implements the endpoints the PowerShell scripts and batch_runner.py use:
+# POST /prompt, GET /queue, GET /history/{prompt_id}, GET /view and the /ws
+# event websocket (execution_start, executing, executed, execution_success
+# sent to the client_id that queued the prompt). Prompts
+# are checked the way ComfyUI checks them (known node ids, links to existing
+# nodes, at least one output node) and then "rendered" one at a time by a
+# single worker thread, like a single-GPU ComfyUI. Each render sleeps for
+# --job-seconds in total, split across the nodes with KSampler taking most of
+# it, and produces a small solid-colour PNG derived from the KSampler seed, so
+# identical jobs produce identical images.
+#
+# GET /stub/stats reports how long the fake GPU sat idle between the first
+# submission and the last completed job.
+
+import argparse
+import base64
+import hashlib
+import json
+import queue
+import struct
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+OUTPUT_NODE_TYPES = {"SaveImage": "output", "PreviewImage": "temp"}
+# Relative share of the simulated render time spent in each node type
+NODE_COST = {"KSampler": 20.0, "VAEDecode": 2.0, "CheckpointLoaderSimple": 1.0, "SaveImage": 0.5}
+_WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def solid_png(width, height, rgb):
+    """Encode a solid-colour RGB image as PNG bytes."""
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    row = b"\x00" + bytes(rgb) * width
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(row * height))
+        + chunk(b"IEND", b"")
+    )
+
+
+def validate_prompt(prompt):
+    """Return ComfyUI-style node_errors for an API-format prompt ({} if valid)."""
+    errors = {}
+    for node_id, node in prompt.items():
+        if "class_type" not in node or not isinstance(node.get("inputs"), dict):
+            errors[node_id] = "missing class_type or inputs"
+            continue
+        for name, value in node["inputs"].items():
+            if isinstance(value, list) and len(value) == 2 and str(value[0]) not in prompt:
+                errors[node_id] = f"input '{name}' links to missing node {value[0]}"
+    if not any(node.get("class_type") in OUTPUT_NODE_TYPES for node in prompt.values()):
+        errors["prompt"] = "prompt has no outputs"
+    return errors
+
+
+class StubComfyUI:
+    """Queue, history and fake renderer shared by all request handlers."""
+
+    def __init__(self, job_seconds=0.5, image_size=64):
+        self.job_seconds = job_seconds
+        self.image_size = image_size
+        self.pending = queue.Queue()
+        self.history = {}
+        self.images = {}
+        self.lock = threading.Lock()
+        self.number = 0
+        self.counter = 0
+        self.running = None
+        self.first_submit = None
+        self.last_finish = None
+        self.busy_seconds = 0.0
+        self.listeners = {}
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def listen(self, client_id):
+        """Register a websocket client; returns the queue its events arrive on."""
+        events = queue.Queue()
+        with self.lock:
+            self.listeners.setdefault(client_id, []).append(events)
+        return events
+
+    def unlisten(self, client_id, events):
+        with self.lock:
+            self.listeners.get(client_id, []).remove(events)
+
+    def _emit(self, client_id, event_type, data):
+        with self.lock:
+            targets = list(self.listeners.get(client_id, []))
+        for events in targets:
+            events.put({"type": event_type, "data": data})
+
+    def submit(self, prompt, client_id=None):
+        with self.lock:
+            prompt_id = str(uuid.uuid4())
+            number = self.number
+            self.number += 1
+            if self.first_submit is None:
+                self.first_submit = time.monotonic()
+        self.pending.put((prompt_id, number, prompt, client_id))
+        return prompt_id, number
+
+    def queue_state(self):
+        with self.lock:
+            running = [[0, self.running]] if self.running else []
+        pending = [[number, prompt_id] for prompt_id, number, _, _ in list(self.pending.queue)]
+        return {"queue_running": running, "queue_pending": pending}
+
+    def stats(self):
+        with self.lock:
+            span = (self.last_finish or time.monotonic()) - (self.first_submit or time.monotonic())
+            return {
+                "jobs": len(self.history),
+                "busy_seconds": round(self.busy_seconds, 3),
+                "idle_seconds": round(max(0.0, span - self.busy_seconds), 3)
+            }
+
+    def _render(self, prompt):
+        seed = 0
+        for node in prompt.values():
+            if node["class_type"] == "KSampler":
+                seed = node["inputs"].get("seed", 0)
+        digest = hashlib.sha256(str(seed).encode()).digest()
+        data = solid_png(self.image_size, self.image_size, digest[:3])
+
+        outputs = {}
+        for node_id, node in prompt.items():
+            kind = OUTPUT_NODE_TYPES.get(node["class_type"])
+            if kind is None:
+                continue
+            prefix = node["inputs"].get("filename_prefix", "ComfyUI")
+            with self.lock:
+                self.counter += 1
+                filename = f"{prefix}_{self.counter:05}_.png"
+                self.images[(filename, "", kind)] = data
+            outputs[node_id] = {"images": [{"filename": filename, "subfolder": "", "type": kind}]}
+        return outputs
+
+    def _worker(self):
+        while True:
+            prompt_id, _, prompt, client_id = self.pending.get()
+            started = time.monotonic()
+            with self.lock:
+                self.running = prompt_id
+            self._emit(client_id, "execution_start", {"prompt_id": prompt_id})
+            self._emit(client_id, "execution_cached", {"nodes": [], "prompt_id": prompt_id})
+            total_cost = sum(NODE_COST.get(node["class_type"], 0.1) for node in prompt.values())
+            for node_id, node in prompt.items():
+                self._emit(client_id, "executing", {"node": node_id, "display_node": node_id, "prompt_id": prompt_id})
+                time.sleep(self.job_seconds * NODE_COST.get(node["class_type"], 0.1) / total_cost)
+            outputs = self._render(prompt)
+            for node_id, output in outputs.items():
+                self._emit(client_id, "executed", {"node": node_id, "output": output, "prompt_id": prompt_id})
+            self._emit(client_id, "executing", {"node": None, "prompt_id": prompt_id})
+            self._emit(client_id, "execution_success", {"prompt_id": prompt_id})
+            finished = time.monotonic()
+            with self.lock:
+                self.running = None
+                self.busy_seconds += finished - started
+                self.last_finish = finished
+                self.history[prompt_id] = {
+                    "prompt": [0, prompt_id, prompt, {}, list(outputs)],
+                    "outputs": outputs,
+                    "status": {"status_str": "success", "completed": True, "messages": []}
+                }
+
+
+def make_handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, so pooled clients can reuse connections
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, body, content_type="application/json"):
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/":
+                self._send(200, b"<html><body>ComfyUI stub</body></html>", "text/html")
+            elif url.path == "/queue":
+                self._send(200, stub.queue_state())
+            elif url.path == "/ws":
+                self._websocket(parse_qs(url.query).get("clientId", [""])[0])
+            elif url.path == "/stub/stats":
+                self._send(200, stub.stats())
+            elif url.path.startswith("/history/"):
+                prompt_id = url.path[len("/history/"):]
+                with stub.lock:
+                    entry = stub.history.get(prompt_id)
+                self._send(200, {prompt_id: entry} if entry else {})
+            elif url.path == "/view":
+                query = parse_qs(url.query)
+                key = (
+                    query.get("filename", [""])[0],
+                    query.get("subfolder", [""])[0],
+                    query.get("type", ["output"])[0]
+                )
+                with stub.lock:
+                    data = stub.images.get(key)
+                if data is None:
+                    self._send(404, {"error": "image not found"})
+                else:
+                    self._send(200, data, "image/png")
+            else:
+                self._send(404, {"error": "not found"})
+
+        def _websocket(self, client_id):
+            key = self.headers.get("Sec-WebSocket-Key")
+            if not key or self.headers.get("Upgrade", "").lower() != "websocket":
+                self._send(400, {"error": "expected a websocket upgrade"})
+                return
+            accept = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode("ascii")).digest())
+            self.send_response(101, "Switching Protocols")
+            self.send_header("Upgrade", "websocket")
+            self.send_header("Connection", "Upgrade")
+            self.send_header("Sec-WebSocket-Accept", accept.decode("ascii"))
+            self.end_headers()
+            self.close_connection = True
+
+            events = stub.listen(client_id)
+            try:
+                self._send_frame({"type": "status", "data": {"status": {"exec_info": {"queue_remaining": 0}}, "sid": client_id}})
+                while True:
+                    self._send_frame(events.get())
+            except OSError:
+                pass
+            finally:
+                stub.unlisten(client_id, events)
+
+        def _send_frame(self, message):
+            payload = json.dumps(message).encode("utf-8")
+            if len(payload) < 126:
+                header = struct.pack("!BB", 0x81, len(payload))
+            elif len(payload) < 1 << 16:
+                header = struct.pack("!BBH", 0x81, 126, len(payload))
+            else:
+                header = struct.pack("!BBQ", 0x81, 127, len(payload))
+            self.wfile.write(header + payload)
+            self.wfile.flush()
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/prompt":
+                self._send(404, {"error": "not found"})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                prompt = payload["prompt"]
+            except (ValueError, KeyError):
+                self._send(400, {"error": "invalid prompt payload", "node_errors": {}})
+                return
+            node_errors = validate_prompt(prompt)
+            if node_errors:
+                self._send(400, {"error": "Prompt outputs failed validation", "node_errors": node_errors})
+                return
+            prompt_id, number = stub.submit(prompt, payload.get("client_id"))
+            self._send(200, {"prompt_id": prompt_id, "number": number, "node_errors": {}})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8188, job_seconds=0.5, image_size=64):
+    """Start the stub server on a background thread and return it (port 0 picks a free port)."""
+    stub = StubComfyUI(job_seconds, image_size)
+    server = ThreadingHTTPServer((host, port), make_handler(stub))
+    server.daemon_threads = True
+    server.stub = stub
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a fake ComfyUI API for offline testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8188)
+    parser.add_argument("--job-seconds", type=float, default=0.5, help="Simulated render time per prompt")
+    parser.add_argument("--image-size", type=int, default=64, help="Width/height of the generated PNGs")
+    args = parser.parse_args(argv)
+
+    server = serve(args.host, args.port, args.job_seconds, args.image_size)
+    host, port = server.server_address[:2]
+    print(f"ComfyUI stub listening on http://{host}:{port} ({args.job_seconds}s per job)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+# Bulk prompt exporter for the Random Prompt Generator vocabulary
+# Usage: python export_prompts.py --start 0 --stop 1000000 --output prompts.jsonl
+#        python export_prompts.py --category space --no-quality --format txt --output space.txt
+#        python export_prompts.py --rng-stream counter --shard 2/8 --output shard2.jsonl
+#
+# Writes exactly what RandomPromptGenerator produces for every seed in
+# [start, stop), one prompt per line, as JSONL ({"seed", "category", "prompt"})
+# or plain text. Instead of building one random.Random per seed, the exporter
+# seeds a whole chunk of Mersenne Twister states at once in NumPy (the same
+# init_by_array/temper steps CPython uses), draws the category/base/quality/
+# style indices as integer arrays, joins the strings with vectorized object
+# array concatenation and writes each chunk with a single buffered write.
+# With --rng-stream counter every draw is a pure function of (seed, draw
+# number), so no per-seed generator state is built at all.
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+import random_prompt_generator_node as node
+
+# MT19937 parameters (see Modules/_randommodule.c)
+_MT_N = 624
+_MT_M = 397
+_MT_MATRIX_A = np.uint32(0x9908B0DF)
+_MT_UPPER_MASK = np.uint32(0x80000000)
+_MT_LOWER_MASK = np.uint32(0x7FFFFFFF)
+_MT_INIT_SEED = 19650218
+
+# Outputs drawn per seed; seeds whose rejection sampling runs past this are
+# recomputed through the node itself.
+_OUTPUTS_PER_SEED = 24
+_DEFAULT_CHUNK_SIZE = 16384
+
+
+def _init_genrand(seed):
+    state = [0] * _MT_N
+    state[0] = seed
+    for i in range(1, _MT_N):
+        state[i] = (1812433253 * (state[i - 1] ^ (state[i - 1] >> 30)) + i) & 0xFFFFFFFF
+    return np.array(state, dtype=np.uint32)
+
+
+_MT_BASE_STATE = _init_genrand(_MT_INIT_SEED)
+
+
+def mt19937_outputs(seeds, count=_OUTPUTS_PER_SEED):
+    """
+    Return the first `count` 32-bit outputs of random.Random(seed) for each
+    seed, as a (count, len(seeds)) uint32 array. Seeds must lie in [0, 2**32),
+    where CPython seeds with a one-word init_by_array key.
+    """
+    seeds = np.asarray(seeds, dtype=np.uint32)
+    state = np.empty((_MT_N, len(seeds)), dtype=np.uint32)
+    state[:] = _MT_BASE_STATE[:, None]
+
+    # init_by_array with key = [seed]; uint32 arithmetic wraps like the C code
+    i = 1
+    multiplier = np.uint32(1664525)
+    for _ in range(_MT_N):
+        previous = state[i - 1]
+        state[i] = (state[i] ^ ((previous ^ (previous >> np.uint32(30))) * multiplier)) + seeds
+        i += 1
+        if i >= _MT_N:
+            state[0] = state[_MT_N - 1]
+            i = 1
+    multiplier = np.uint32(1566083941)
+    for _ in range(_MT_N - 1):
+        previous = state[i - 1]
+        state[i] = (state[i] ^ ((previous ^ (previous >> np.uint32(30))) * multiplier)) - np.uint32(i)
+        i += 1
+        if i >= _MT_N:
+            state[0] = state[_MT_N - 1]
+            i = 1
+    state[0] = _MT_UPPER_MASK
+
+    # The first twist only needs the old state for the outputs we use
+    rows = np.arange(count)
+    y = (state[rows] & _MT_UPPER_MASK) | (state[rows + 1] & _MT_LOWER_MASK)
+    out = state[rows + _MT_M] ^ (y >> np.uint32(1)) ^ np.where(y & np.uint32(1), _MT_MATRIX_A, np.uint32(0))
+
+    # Tempering
+    out ^= out >> np.uint32(11)
+    out ^= (out << np.uint32(7)) & np.uint32(0x9D2C5680)
+    out ^= (out << np.uint32(15)) & np.uint32(0xEFC60000)
+    out ^= out >> np.uint32(18)
+    return out
+
+
+class _IndexDrawer:
+    """Vectorized random.Random._randbelow over per-seed output streams."""
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.columns = np.arange(outputs.shape[1])
+        self.cursor = np.zeros(outputs.shape[1], dtype=np.int64)
+        self.overflow = np.zeros(outputs.shape[1], dtype=bool)
+
+    def randbelow(self, n):
+        # getrandbits(k) with k = n.bit_length(), rejecting values >= n
+        n = np.broadcast_to(np.asarray(n, dtype=np.int64), self.cursor.shape)
+        shift = (32 - _bit_length(n)).astype(np.uint32)
+        result = np.zeros(self.cursor.shape, dtype=np.int64)
+        limit = self.outputs.shape[0]
+        self.overflow |= self.cursor >= limit
+        pending = ~self.overflow
+        while pending.any():
+            columns = self.columns[pending]
+            values = (self.outputs[self.cursor[columns], columns] >> shift[columns]).astype(np.int64)
+            self.cursor[columns] += 1
+            accepted = values < n[columns]
+            result[columns[accepted]] = values[accepted]
+            retry = columns[~accepted]
+            exhausted = retry[self.cursor[retry] >= limit]
+            self.overflow[exhausted] = True
+            pending[:] = False
+            pending[retry[self.cursor[retry] < limit]] = True
+        return result
+
+
+class _CounterIndexDrawer:
+    """Vectorized CounterPromptRng.randbelow: draw j of every seed computed directly."""
+
+    def __init__(self, seeds):
+        self.seeds = np.asarray(seeds, dtype=np.int64).astype(np.uint64)
+        self.counter = 0
+        self.overflow = np.zeros(len(self.seeds), dtype=bool)
+
+    def randbelow(self, n):
+        self.counter += 1
+        z = self.seeds + np.uint64((self.counter * node._GOLDEN_GAMMA) & node._MASK64)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z ^= z >> np.uint64(31)
+        n = np.asarray(n, dtype=np.uint64)
+        return (((z >> np.uint64(32)) * n) >> np.uint64(32)).astype(np.int64)
+
+
+def _bit_length(values):
+    lengths = np.zeros(values.shape, dtype=np.int64)
+    remaining = values.copy()
+    while (remaining > 0).any():
+        nonzero = remaining > 0
+        lengths[nonzero] += 1
+        remaining >>= 1
+    return lengths
+
+
+def _json_fragment(text):
+    return json.dumps(text, ensure_ascii=False)[1:-1]
+
+
+class PromptExporter:
+    """Vectorized equivalent of RandomPromptGenerator.generate_random_prompt over seed ranges."""
+
+    def __init__(self, category="all", add_quality_modifiers=True, vocabulary="builtin", rng_stream="legacy"):
+        vocab = node.get_vocabulary(vocabulary)
+        if category != "all" and category not in vocab.categories:
+            raise ValueError(f"Vocabulary '{vocabulary}' has no '{category}' category")
+
+        self.category = category
+        self.add_quality_modifiers = add_quality_modifiers
+        self.vocabulary = vocabulary
+        self.rng_stream = rng_stream
+        # "all" draws from the vocabulary's categories; a fixed category may be a
+        # built-in table a pack falls back to, so only that table is flattened
+        self.category_names = vocab.category_names if category == "all" else (category,)
+
+        # Flatten every category into one table addressed by offset + index
+        phrases = []
+        offsets = []
+        sizes = []
+        for name in self.category_names:
+            table = vocab.categories[name]
+            offsets.append(len(phrases))
+            sizes.append(len(table))
+            phrases.extend(table[i] for i in range(len(table)))
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.sizes = np.array(sizes, dtype=np.int64)
+        self.quality = [vocab.quality_modifiers[i] for i in range(len(vocab.quality_modifiers))]
+        self.style = [vocab.style_modifiers[i] for i in range(len(vocab.style_modifiers))]
+
+        self.text_tables = self._tables(phrases, lambda text: text)
+        self.json_tables = self._tables(phrases, _json_fragment)
+
+    def _tables(self, phrases, encode):
+        return {
+            "category": np.array([encode(name) for name in self.category_names], dtype=object),
+            "base": np.array([encode(phrase) for phrase in phrases], dtype=object),
+            "quality": np.array([", " + encode(phrase) for phrase in self.quality], dtype=object),
+            "style": np.array([", " + encode(phrase) for phrase in self.style], dtype=object)
+        }
+
+    def sample_indices(self, seeds):
+        """Return the node's draws for each seed as integer arrays (category, base, quality, style)."""
+        if self.rng_stream == "counter":
+            drawer = _CounterIndexDrawer(seeds)
+        else:
+            drawer = _IndexDrawer(mt19937_outputs(seeds))
+        if self.category == "all":
+            category = drawer.randbelow(len(self.category_names))
+        else:
+            category = np.zeros(len(seeds), dtype=np.int64)
+        base = drawer.randbelow(self.sizes[category])
+        indices = {"category": category, "base": base}
+        if self.add_quality_modifiers:
+            indices["quality"] = drawer.randbelow(len(self.quality))
+            indices["style"] = drawer.randbelow(len(self.style))
+        return indices, drawer.overflow
+
+    def render_chunk(self, seeds, output_format):
+        seeds = np.asarray(seeds, dtype=np.int64)
+        indices, overflow = self.sample_indices(seeds)
+        tables = self.json_tables if output_format == "jsonl" else self.text_tables
+
+        prompts = tables["base"][self.offsets[indices["category"]] + indices["base"]]
+        if self.add_quality_modifiers:
+            prompts = prompts + tables["quality"][indices["quality"]] + tables["style"][indices["style"]]
+        categories = tables["category"][indices["category"]]
+
+        # Seeds whose rejection sampling ran past the precomputed outputs
+        for position in np.flatnonzero(overflow):
+            prompt, selected_category = self._prompt_via_node(int(seeds[position]))
+            if output_format == "jsonl":
+                prompt, selected_category = _json_fragment(prompt), _json_fragment(selected_category)
+            prompts[position] = prompt
+            categories[position] = selected_category
+
+        if output_format == "jsonl":
+            seed_text = seeds.astype(str).astype(object)
+            lines = '{"seed": ' + seed_text + ', "category": "' + categories + '", "prompt": "' + prompts + '"}\n'
+        else:
+            lines = prompts + "\n"
+        return "".join(lines.tolist())
+
+    def _prompt_via_node(self, seed):
+        components = node.prompt_components(
+            seed, self.category, self.add_quality_modifiers, self.vocabulary, rng_stream=self.rng_stream
+        )
+        return components["prompt"], components["category"]
+
+    def export(self, start, stop, stream, output_format="jsonl", chunk_size=_DEFAULT_CHUNK_SIZE):
+        for chunk_start in range(start, stop, chunk_size):
+            seeds = np.arange(chunk_start, min(chunk_start + chunk_size, stop), dtype=np.int64)
+            stream.write(self.render_chunk(seeds, output_format))
+
+    def verify(self, seeds):
+        """Return the seeds whose exported prompt differs from the node's output."""
+        rendered = self.render_chunk(seeds, "txt").splitlines()
+        return [
+            seed for seed, prompt in zip(seeds, rendered)
+            if prompt != self._prompt_via_node(int(seed))[0]
+        ]
+
+
+def positive_int(text):
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer, got '{text}'") from None
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def parse_shard(text):
+    """'I/N' -> (I, N) with 0 <= I < N."""
+    index, separator, count = text.partition("/")
+    try:
+        shard_index, shard_count = int(index), int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected I/N, got '{text}'") from None
+    if not separator or not 0 <= shard_index < shard_count:
+        raise argparse.ArgumentTypeError(f"expected I/N with 0 <= I < N, got '{text}'")
+    return shard_index, shard_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export RandomPromptGenerator prompts for a seed range")
+    parser.add_argument("--start", type=int, default=0, help="First seed (inclusive)")
+    parser.add_argument("--stop", type=int, default=1000000, help="Last seed (exclusive)")
+    parser.add_argument("--category", default="all", help="Category name or 'all'")
+    parser.add_argument("--vocabulary", default="builtin", help="'builtin' or a vocabulary pack name")
+    parser.add_argument("--no-quality", action="store_true", help="Omit quality and style modifiers")
+    parser.add_argument("--rng-stream", choices=node.RNG_STREAMS, default="legacy", help="Seed -> stream mapping used by the node")
+    parser.add_argument("--shard", type=parse_shard, default=None, metavar="I/N",
+                        help="Export only shard I (0-based) of N of the seed range")
+    parser.add_argument("--format", choices=("jsonl", "txt"), default="jsonl")
+    parser.add_argument("--output", default="-", help="Output file ('-' for stdout)")
+    parser.add_argument("--chunk-size", type=positive_int, default=_DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--buffer-mb", type=positive_int, default=8, help="Write buffer size in MiB")
+    parser.add_argument("--verify", type=int, default=0, help="Check N seeds against the node before exporting")
+    args = parser.parse_args(argv)
+
+    if not 0 <= args.start <= args.stop <= 2 ** 32:
+        parser.error("seeds must satisfy 0 <= start <= stop <= 2**32")
+
+    if args.shard:
+        shard = node.shard_seed_range(args.start, args.stop, *args.shard)
+        args.start, args.stop = shard.start, shard.stop
+
+    exporter = PromptExporter(args.category, not args.no_quality, args.vocabulary, args.rng_stream)
+
+    if args.verify:
+        sample = np.arange(args.start, min(args.start + args.verify, args.stop), dtype=np.int64)
+        mismatches = exporter.verify(sample)
+        if mismatches:
+            print(f"Exporter disagrees with the node for seeds: {mismatches[:10]}", file=sys.stderr)
+            return 1
+
+    started = time.perf_counter()
+    if args.output == "-":
+        exporter.export(args.start, args.stop, sys.stdout, args.format, args.chunk_size)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="\n", buffering=args.buffer_mb * 1024 * 1024) as f:
+            exporter.export(args.start, args.stop, f, args.format, args.chunk_size)
+    elapsed = time.perf_counter() - started
+
+    total = args.stop - args.start
+    rate = total / elapsed if elapsed else float("inf")
+    print(f"Exported {total} prompts in {elapsed:.2f}s ({rate:,.0f} prompts/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+# Thumbnail and WebP/AVIF derivatives for the gallery
+# Usage: python gallery_derivatives.py
+#        python gallery_derivatives.py --source ../../gallery/portraits --widths 320 640 --workers 8
+#
+# For every image in gallery/portraits/ this writes resized copies to
+# gallery/derived/<image file name>/<width>.<format> (WebP always, AVIF when the
+# installed Pillow can encode it) and records source and derivative sizes,
+# dimensions and SHA-256 hashes in gallery/derived/manifest.json.
+#
+# Runs are incremental: an image whose size and mtime match its manifest
+# entry, and whose derivatives were made with the current settings, is not
+# opened at all. Only new or changed images go to the process pool, so
+# re-running over a large gallery just stats the files. Derivatives of
+# deleted images are removed. The directory is named after the whole file
+# name, so a.png and a.jpg never share one. Requires Pillow.
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+from image_downloader import GALLERY_DIR
+
+DERIVED_DIR = os.path.join(os.path.dirname(GALLERY_DIR), "derived")
+MANIFEST_NAME = "manifest.json"
+SOURCE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+DEFAULT_WIDTHS = (320, 640, 1280)
+# Bumped when derivatives move, so manifests from an older layout are rebuilt
+LAYOUT_VERSION = 2
+# Encoder settings per format; AVIF is skipped when Pillow lacks an encoder
+FORMAT_OPTIONS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "avif": {"format": "AVIF", "quality": 55, "speed": 8},
+}
+
+
+def available_formats(requested):
+    if Image is None:
+        return ()
+    return tuple(name for name in requested if features.check(name))
+
+
+def settings_key(widths, formats):
+    return json.dumps([
+        LAYOUT_VERSION, sorted(widths, reverse=True), list(formats), {name: FORMAT_OPTIONS[name] for name in formats}
+    ])
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _save_atomic(image, path, options):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    image.save(temp_path, **options)
+    os.replace(temp_path, path)
+
+
+def make_derivatives(source_path, output_dir, widths, formats):
+    """Worker: resize one image to every width/format and describe the results."""
+    with Image.open(source_path) as image:
+        image.load()
+        os.makedirs(output_dir, exist_ok=True)
+        width, height = image.size
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        derivatives = []
+        # Largest first, each size resized from the previous one, which is
+        # cheaper than resampling the full-size source every time. Never
+        # upscale: an image narrower than every width gets one full-size copy.
+        targets = sorted({target for target in widths if target < width}, reverse=True) or [width]
+        current = image
+        for target in targets:
+            if target < current.width:
+                current = current.resize(
+                    (target, max(1, round(height * target / width))), Image.Resampling.LANCZOS
+                )
+            for name in formats:
+                path = os.path.join(output_dir, f"{current.width}.{name}")
+                _save_atomic(current, path, FORMAT_OPTIONS[name])
+                derivatives.append({
+                    "path": os.path.relpath(path, os.path.dirname(output_dir)),
+                    "format": name,
+                    "width": current.width,
+                    "height": current.height,
+                    "bytes": os.path.getsize(path),
+                    "sha256": _file_sha256(path),
+                })
+    return {"width": width, "height": height, "sha256": _file_sha256(source_path), "derivatives": derivatives}
+
+
+def load_manifest(derived_dir):
+    try:
+        with open(os.path.join(derived_dir, MANIFEST_NAME), encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {"settings": None, "images": {}}
+
+
+def save_manifest(derived_dir, manifest):
+    path = os.path.join(derived_dir, MANIFEST_NAME)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def build_derivatives(source_dir=GALLERY_DIR, derived_dir=DERIVED_DIR, widths=DEFAULT_WIDTHS,
+                      formats=("webp", "avif"), workers=None):
+    """
+    Bring `derived_dir` up to date with `source_dir`; return counts of
+    processed, failed, unchanged and removed images.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is required to build gallery derivatives (pip install pillow)")
+    formats = available_formats(formats)
+    if not formats:
+        raise RuntimeError("Pillow has no encoder for any of the requested formats")
+
+    os.makedirs(derived_dir, exist_ok=True)
+    manifest = load_manifest(derived_dir)
+    settings = settings_key(widths, formats)
+    if manifest.get("settings") != settings:
+        # Drop what the old settings made, wherever its layout put it
+        for entry in manifest.get("images", {}).values():
+            for directory in {os.path.dirname(item["path"]) for item in entry.get("derivatives", [])}:
+                if directory:
+                    shutil.rmtree(os.path.join(derived_dir, directory), ignore_errors=True)
+        manifest = {"settings": settings, "images": {}}
+    images = manifest["images"]
+
+    current = {}
+    with os.scandir(source_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(SOURCE_EXTENSIONS):
+                stat = entry.stat()
+                current[entry.name] = (stat.st_size, stat.st_mtime_ns)
+
+    pending = [
+        name for name, (size, mtime_ns) in current.items()
+        if (images.get(name, {}).get("size"), images.get(name, {}).get("mtime_ns")) != (size, mtime_ns)
+    ]
+
+    removed = [name for name in images if name not in current]
+    for name in removed:
+        shutil.rmtree(os.path.join(derived_dir, name), ignore_errors=True)
+        del images[name]
+
+    failed = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                name: pool.submit(
+                    make_derivatives,
+                    os.path.join(source_dir, name),
+                    os.path.join(derived_dir, name),
+                    widths,
+                    formats
+                )
+                for name in pending
+            }
+            for name, future in futures.items():
+                try:
+                    result = future.result()
+                except (OSError, ValueError) as error:
+                    # Left out of the manifest, so the next run retries it
+                    print(f"Skipping {name}: {error}", file=sys.stderr)
+                    failed += 1
+                    continue
+                size, mtime_ns = current[name]
+                images[name] = {"size": size, "mtime_ns": mtime_ns, **result}
+
+    if pending or removed or not os.path.exists(os.path.join(derived_dir, MANIFEST_NAME)):
+        save_manifest(derived_dir, manifest)
+    return {
+        "processed": len(pending) - failed,
+        "failed": failed,
+        "unchanged": len(current) - len(pending),
+        "removed": len(removed)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build thumbnails and WebP/AVIF derivatives for the gallery")
+    parser.add_argument("--source", default=GALLERY_DIR, help="Directory of full-size images")
+    parser.add_argument("--dest", default=DERIVED_DIR, help="Directory for derivatives and manifest.json")
+    parser.add_argument("--widths", type=int, nargs="+", default=list(DEFAULT_WIDTHS), help="Thumbnail widths")
+    parser.add_argument("--formats", nargs="+", choices=sorted(FORMAT_OPTIONS), default=["webp", "avif"])
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if Image is None:
+        print("Pillow is required: pip install pillow", file=sys.stderr)
+        return 1
+    skipped = sorted(set(args.formats) - set(available_formats(args.formats)))
+    if skipped:
+        print(f"Skipping {', '.join(skipped)}: not supported by this Pillow build", file=sys.stderr)
+
+    started = time.perf_counter()
+    counts = build_derivatives(args.source, args.dest, args.widths, args.formats, args.workers)
+    elapsed = time.perf_counter() - started
+    print(f"Processed {counts['processed']}, failed {counts['failed']}, unchanged {counts['unchanged']}, "
+          f"removed {counts['removed']} in {elapsed:.2f}s")
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
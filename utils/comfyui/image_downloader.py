@@ -0,0 +1,167 @@
+# Async image downloader for finished ComfyUI jobs
+# Usage: python image_downloader.py --results runs.jsonl
+#        python image_downloader.py --server 127.0.0.1:8188 --results runs.jsonl --dest ../../gallery/portraits
+#
+# Fetches generated images from /view over a small pool of persistent
+# HTTP/1.1 connections (instead of one Invoke-WebRequest per image), hashes
+# each body with SHA-256 while it streams to a temporary file, and then either
+# drops it (a byte-identical image is already in the gallery) or atomically
+# renames it into place as <sha256 prefix>.png. Files are named by content, so
+# duplicates are detected from the directory listing without re-reading any
+# image. batch_runner.py --download uses this to fetch each job's images as
+# soon as the job finishes.
+
+import argparse
+import asyncio
+import hashlib
+import http.client
+import json
+import os
+import queue
+import sys
+import uuid
+from urllib.parse import urlencode
+
+GALLERY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "gallery", "portraits")
+HASH_PREFIX_LENGTH = 16
+_CHUNK_SIZE = 64 * 1024
+
+
+class ConnectionPool:
+    """Reusable keep-alive connections to one host, shared by worker threads."""
+
+    def __init__(self, server, size=4, timeout=60):
+        host, _, port = server.partition(":")
+        self.host = host
+        self.port = int(port or 80)
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = asyncio.Semaphore(size)
+
+    def _connection(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _fetch_to(self, path, handle):
+        # A pooled connection may have been closed by the server while idle;
+        # retry once on a fresh one.
+        for attempt in range(2):
+            connection = self._connection() if attempt == 0 else \
+                http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                connection.request("GET", path)
+                response = connection.getresponse()
+                if response.status != 200:
+                    response.read()
+                    self._idle.put(connection)
+                    raise RuntimeError(f"ComfyUI returned HTTP {response.status} for {path}")
+                handle.seek(0)
+                handle.truncate()
+                hasher = hashlib.sha256()
+                size = 0
+                while True:
+                    chunk = response.read(_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    handle.write(chunk)
+                    size += len(chunk)
+                if response.will_close:
+                    connection.close()
+                else:
+                    self._idle.put(connection)
+                return hasher.hexdigest(), size
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if attempt:
+                    raise
+
+    async def fetch_to(self, path, handle):
+        """Stream GET `path` into `handle`; return (sha256 hexdigest, byte count)."""
+        async with self._slots:
+            return await asyncio.to_thread(self._fetch_to, path, handle)
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class ImageDownloader:
+    """Downloads job outputs into a content-addressed directory, skipping duplicates."""
+
+    def __init__(self, server, dest_dir=GALLERY_DIR, pool_size=4, image_types=("output",)):
+        self.pool = ConnectionPool(server, pool_size)
+        self.dest_dir = os.path.abspath(dest_dir)
+        self.image_types = set(image_types)
+        os.makedirs(self.dest_dir, exist_ok=True)
+        self.known = {
+            name[:HASH_PREFIX_LENGTH]
+            for name in os.listdir(self.dest_dir)
+            if len(name) > HASH_PREFIX_LENGTH and name[HASH_PREFIX_LENGTH] == "."
+        }
+        self._claim_lock = asyncio.Lock()
+
+    async def download(self, image):
+        """
+        Fetch one history image entry ({"filename", "subfolder", "type"}) and
+        return {"source", "sha256", "path", "bytes", "duplicate"}.
+        """
+        query = urlencode({
+            "filename": image["filename"],
+            "subfolder": image.get("subfolder", ""),
+            "type": image.get("type", "output")
+        })
+        extension = os.path.splitext(image["filename"])[1].lower() or ".png"
+        temp_path = os.path.join(self.dest_dir, f".{image['filename']}.{uuid.uuid4().hex}.part")
+        try:
+            with open(temp_path, "wb") as handle:
+                digest, size = await self.pool.fetch_to(f"/view?{query}", handle)
+            key = digest[:HASH_PREFIX_LENGTH]
+            path = os.path.join(self.dest_dir, key + extension)
+            async with self._claim_lock:
+                duplicate = key in self.known
+                if not duplicate:
+                    os.replace(temp_path, path)
+                    self.known.add(key)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        return {"source": image["filename"], "sha256": digest, "path": path, "bytes": size, "duplicate": duplicate}
+
+    async def download_all(self, images):
+        wanted = [image for image in images if image.get("type", "output") in self.image_types]
+        return list(await asyncio.gather(*(self.download(image) for image in wanted)))
+
+    def close(self):
+        self.pool.close()
+
+
+async def download_results(server, results_path, dest_dir, pool_size):
+    with open(results_path, encoding="utf-8") as handle:
+        records = [json.loads(line) for line in handle if line.strip()]
+    downloader = ImageDownloader(server, dest_dir, pool_size)
+    try:
+        images = [image for record in records for image in record.get("images", [])]
+        return await downloader.download_all(images)
+    finally:
+        downloader.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download finished ComfyUI images into the gallery")
+    parser.add_argument("--server", default="127.0.0.1:8188", help="ComfyUI host:port")
+    parser.add_argument("--results", required=True, help="JSONL job records written by batch_runner.py")
+    parser.add_argument("--dest", default=GALLERY_DIR, help="Destination directory")
+    parser.add_argument("--connections", type=int, default=4, help="Persistent connections in the pool")
+    args = parser.parse_args(argv)
+
+    files = asyncio.run(download_results(args.server, args.results, args.dest, args.connections))
+    saved = [entry for entry in files if not entry["duplicate"]]
+    print(f"Saved {len(saved)} new image(s), skipped {len(files) - len(saved)} duplicate(s) into {os.path.abspath(args.dest)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+# SQLite sidecar index of generated images
+# Usage: python image_index.py                       (summary of the index)
+#        python image_index.py --import-results runs.jsonl --workflow random-prompt-workflow.json
+#        python image_index.py --category space --limit 20
+#
+# One row per distinct image (keyed by the SHA-256 the downloader names files
+# after) with the prompt, category, seeds, checkpoint and workflow that made
+# it and how long the job took, so "which prompt made this wallpaper" and
+# per-category/per-checkpoint analytics are plain SQL over gallery/images.sqlite
+# instead of opening PNGs. batch_runner.py --download --index fills it as
+# jobs finish; --import-results backfills from batch_runner.py --results files.
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from image_downloader import GALLERY_DIR
+
+INDEX_PATH = os.path.join(os.path.dirname(GALLERY_DIR), "images.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    sha256 TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    bytes INTEGER,
+    prompt TEXT,
+    category TEXT,
+    seed INTEGER,
+    prompt_seed INTEGER,
+    checkpoint TEXT,
+    workflow_hash TEXT,
+    prompt_id TEXT,
+    queued_at REAL,
+    job_seconds REAL,
+    download_seconds REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS images_category ON images (category);
+CREATE INDEX IF NOT EXISTS images_checkpoint ON images (checkpoint);
+CREATE INDEX IF NOT EXISTS images_seed ON images (seed);
+"""
+
+COLUMNS = (
+    "sha256", "path", "bytes", "prompt", "category", "seed", "prompt_seed", "checkpoint",
+    "workflow_hash", "prompt_id", "queued_at", "job_seconds", "download_seconds"
+)
+
+# Columns added after the first release, for indexes created before them
+MIGRATIONS = (("prompt_seed", "INTEGER"),)
+
+
+def workflow_checkpoint(prompt):
+    """Checkpoint name(s) loaded by an API-format prompt, comma separated."""
+    names = [
+        api_node["inputs"]["ckpt_name"]
+        for api_node in prompt.values()
+        if isinstance(api_node["inputs"].get("ckpt_name"), str)
+    ]
+    return ", ".join(names) or None
+
+
+class ImageIndex:
+    """Append-mostly SQLite index; the first job that produced an image keeps its row."""
+
+    def __init__(self, path=INDEX_PATH):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        existing = {row[1] for row in self.connection.execute("PRAGMA table_info(images)")}
+        for column, kind in MIGRATIONS:
+            if column not in existing:
+                self.connection.execute(f"ALTER TABLE images ADD COLUMN {column} {kind}")
+
+    def add_record(self, record, compiled=None):
+        """Index every downloaded file of one batch_runner job record; return rows added."""
+        checkpoint = workflow_checkpoint(compiled.prompt) if compiled is not None else record.get("checkpoint")
+        workflow_hash = compiled.source_hash if compiled is not None else record.get("workflow_hash")
+        rows = [
+            (
+                entry["sha256"],
+                os.path.basename(entry["path"]),
+                entry.get("bytes"),
+                record.get("prompt"),
+                record.get("category"),
+                record.get("seed"),
+                record.get("prompt_seed"),
+                checkpoint,
+                workflow_hash,
+                record.get("prompt_id"),
+                record.get("queued_at"),
+                record.get("seconds"),
+                record.get("download_seconds"),
+            )
+            for entry in record.get("files", [])
+        ]
+        with self.connection:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                f"INSERT OR IGNORE INTO images ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows
+            )
+            return self.connection.total_changes - before
+
+    def query(self, category=None, checkpoint=None, limit=50):
+        sql = f"SELECT {', '.join(COLUMNS)} FROM images"
+        clauses, params = [], []
+        if category:
+            clauses.append("category = ?")
+            params.append(category)
+        if checkpoint:
+            clauses.append("checkpoint = ?")
+            params.append(checkpoint)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY queued_at DESC LIMIT ?"
+        params.append(limit)
+        return [dict(zip(COLUMNS, row)) for row in self.connection.execute(sql, params)]
+
+    def summary(self):
+        return self.connection.execute(
+            "SELECT category, checkpoint, COUNT(*), AVG(job_seconds) FROM images "
+            "GROUP BY category, checkpoint ORDER BY COUNT(*) DESC"
+        ).fetchall()
+
+    def close(self):
+        self.connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query or fill the generated image index")
+    parser.add_argument("--index", default=INDEX_PATH, help="SQLite index file")
+    parser.add_argument("--import-results", default=None, help="JSONL job records from batch_runner.py --download")
+    parser.add_argument("--workflow", default=None, help="Workflow the imported jobs ran (for checkpoint/hash)")
+    parser.add_argument("--category", default=None, help="List images of this category")
+    parser.add_argument("--checkpoint", default=None, help="List images made with this checkpoint")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    index = ImageIndex(args.index)
+    try:
+        if args.import_results:
+            compiled = None
+            if args.workflow:
+                from workflow_compiler import compile_workflow
+
+                compiled = compile_workflow(args.workflow)
+            added = 0
+            with open(args.import_results, encoding="utf-8") as handle:
+                for line in handle:
+                    if line.strip():
+                        added += index.add_record(json.loads(line), compiled)
+            print(f"Indexed {added} new image(s)")
+        elif args.category or args.checkpoint:
+            for row in index.query(args.category, args.checkpoint, args.limit):
+                print(f"{row['path']}  seed {row['seed']}  prompt seed {row['prompt_seed']}  {row['category']}  {row['prompt']}")
+        else:
+            print(f"{'category':<14}{'checkpoint':<44}{'images':>8}{'avg job s':>11}")
+            for category, checkpoint, count, seconds in index.summary():
+                print(f"{category or '-':<14}{checkpoint or '-':<44}{count:>8}{seconds or 0:>11.1f}")
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+# Per-node timing metrics for ComfyUI jobs, from the server's websocket events
+# Usage: python batch_runner.py --count 20 --metrics metrics.json
+#        python job_metrics.py metrics.json
+#
+# ComfyUI pushes execution_start / executing / executed / execution_success
+# events over /ws?clientId=... to the client that queued a prompt. EventStream
+# is a minimal stdlib RFC 6455 client that timestamps those events as they
+# arrive; JobTimings turns one prompt's events into queue wait, compute time
+# and per-node seconds (a node runs from its "executing" event until the
+# next one), and MetricsRegistry aggregates them into fixed-bucket histograms
+# labelled by node type and checkpoint, written as JSON.
+#
+# Running this file prints a summary of a metrics JSON file.
+
+import base64
+import hashlib
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from urllib.parse import quote
+
+_WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OPCODE_CONTINUATION, OPCODE_TEXT, OPCODE_BINARY = 0x0, 0x1, 0x2
+OPCODE_CLOSE, OPCODE_PING, OPCODE_PONG = 0x8, 0x9, 0xA
+
+# Upper bounds in seconds, roughly log-spaced from node overheads to long renders
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class WebSocket:
+    """Client side of an RFC 6455 websocket: text/binary messages, ping replies, close."""
+
+    def __init__(self, host, port, path, timeout=10):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self._buffer = bytearray()
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        self.sock.sendall((
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        ).encode("ascii"))
+
+        while b"\r\n\r\n" not in self._buffer:
+            self._fill()
+        head, _, rest = bytes(self._buffer).partition(b"\r\n\r\n")
+        # The server may send its first frames in the same packet as the handshake
+        self._buffer = bytearray(rest)
+        lines = head.decode("latin-1").split("\r\n")
+        headers = {name.strip().lower(): value.strip() for name, _, value in (line.partition(":") for line in lines[1:])}
+        expected = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        if lines[0].split()[1:2] != ["101"] or headers.get("sec-websocket-accept") != expected:
+            self.sock.close()
+            raise ConnectionError(f"websocket handshake failed: {lines[0]}")
+        self.sock.settimeout(None)
+
+    def _fill(self):
+        chunk = self.sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("websocket closed by server")
+        self._buffer.extend(chunk)
+
+    def _read_exact(self, count):
+        while len(self._buffer) < count:
+            self._fill()
+        data = bytes(self._buffer[:count])
+        del self._buffer[:count]
+        return data
+
+    def send(self, opcode, payload=b""):
+        # Client frames must be masked
+        mask = os.urandom(4)
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, 0x80 | length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, length)
+        masked = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+        self.sock.sendall(header + mask + masked)
+
+    def receive(self):
+        """Return (opcode, payload) of the next complete message, answering pings."""
+        fragments = []
+        message_opcode = None
+        while True:
+            first, second = self._read_exact(2)
+            final, opcode = first & 0x80, first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", self._read_exact(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", self._read_exact(8))[0]
+            mask = self._read_exact(4) if second & 0x80 else None
+            payload = self._read_exact(length)
+            if mask:
+                payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+
+            if opcode == OPCODE_PING:
+                self.send(OPCODE_PONG, payload)
+                continue
+            if opcode == OPCODE_PONG:
+                continue
+            if opcode == OPCODE_CLOSE:
+                return opcode, payload
+            if opcode != OPCODE_CONTINUATION:
+                message_opcode = opcode
+            fragments.append(payload)
+            if final:
+                return message_opcode, b"".join(fragments)
+
+    def close(self):
+        try:
+            self.send(OPCODE_CLOSE)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class JobTimings:
+    """Timestamped execution events of one prompt."""
+
+    def __init__(self):
+        self.events = []
+        self.done = threading.Event()
+
+    def add(self, timestamp, event_type, data):
+        self.events.append((timestamp, event_type, data))
+        if event_type in ("execution_success", "execution_error", "execution_interrupted") or \
+                (event_type == "executing" and data.get("node") is None):
+            self.done.set()
+
+    def summarize(self, queued_at=None):
+        """Return {"queue_wait", "compute", "nodes": {node_id: seconds}, "cached": [...]}."""
+        started = next((stamp for stamp, kind, _ in self.events if kind == "execution_start"), None)
+        nodes = {}
+        cached = []
+        current, current_start = None, None
+        finished = None
+        for stamp, kind, data in self.events:
+            if kind == "execution_cached":
+                cached.extend(data.get("nodes", []))
+            elif kind == "executing":
+                if current is not None:
+                    nodes[current] = nodes.get(current, 0.0) + stamp - current_start
+                current, current_start = data.get("node"), stamp
+                if current is None:
+                    finished = stamp
+            elif kind in ("execution_success", "execution_error", "execution_interrupted"):
+                finished = finished or stamp
+        return {
+            "queue_wait": None if started is None or queued_at is None else max(0.0, started - queued_at),
+            "compute": None if started is None or finished is None else finished - started,
+            "nodes": nodes,
+            "cached": cached,
+        }
+
+
+class EventStream:
+    """Background reader of ComfyUI websocket events, grouped by prompt_id."""
+
+    def __init__(self, server, client_id):
+        host, _, port = server.partition(":")
+        self.host = host
+        self.port = int(port or 80)
+        self.client_id = client_id
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.error = None
+        self.closed = False
+        self.websocket = None
+
+    def start(self):
+        self.websocket = WebSocket(self.host, self.port, f"/ws?clientId={quote(self.client_id)}")
+        threading.Thread(target=self._read_loop, daemon=True).start()
+        return self
+
+    def job(self, prompt_id):
+        """Timings of `prompt_id`; once the stream has ended, their `done` is already set."""
+        with self.lock:
+            timings = self.jobs.get(prompt_id)
+            if timings is None:
+                timings = self.jobs[prompt_id] = JobTimings()
+            if self.closed:
+                timings.done.set()
+            return timings
+
+    def pop(self, prompt_id):
+        with self.lock:
+            return self.jobs.pop(prompt_id, None) or JobTimings()
+
+    def _read_loop(self):
+        try:
+            while True:
+                opcode, payload = self.websocket.receive()
+                if opcode == OPCODE_CLOSE:
+                    self.error = ConnectionError("websocket closed by the server")
+                    break
+                if opcode != OPCODE_TEXT:
+                    # Binary messages are live preview images
+                    continue
+                stamp = time.time()
+                message = json.loads(payload)
+                data = message.get("data") or {}
+                prompt_id = data.get("prompt_id")
+                if prompt_id:
+                    self.job(prompt_id).add(stamp, message.get("type"), data)
+        except (OSError, ValueError) as error:
+            self.error = error
+        finally:
+            # Wake anyone waiting on a job, now or later; they fall back to polling
+            with self.lock:
+                self.closed = True
+                for timings in self.jobs.values():
+                    timings.done.set()
+
+    @property
+    def alive(self):
+        return not self.closed and self.error is None
+
+    def close(self):
+        if self.websocket is not None:
+            self.websocket.close()
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Bucket upper bound below which a fraction `q` of observations fall."""
+        target = q * self.count
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            if running >= target and count:
+                return bound
+        return float("nan")
+
+    def to_dict(self):
+        return {"buckets": list(self.buckets), "counts": self.counts, "count": self.count, "sum": round(self.sum, 6)}
+
+
+class MetricsRegistry:
+    """Histograms keyed by metric name and a sorted tuple of label pairs."""
+
+    def __init__(self):
+        self.histograms = {}
+
+    def observe(self, name, value, **labels):
+        if value is None:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def record_job(self, record, prompt):
+        """Observe the timings of one batch_runner job record."""
+        checkpoint = record.get("checkpoint") or "unknown"
+        timings = record.get("timings") or {}
+        self.observe("comfyui_queue_wait_seconds", timings.get("queue_wait"), checkpoint=checkpoint)
+        self.observe("comfyui_compute_seconds", timings.get("compute"), checkpoint=checkpoint)
+        self.observe("comfyui_download_seconds", record.get("download_seconds"), checkpoint=checkpoint)
+        for node_id, seconds in timings.get("nodes", {}).items():
+            node_type = prompt.get(str(node_id), {}).get("class_type", "unknown")
+            self.observe("comfyui_node_seconds", seconds, node_type=node_type, checkpoint=checkpoint)
+
+    def to_list(self):
+        return [
+            {"name": name, "labels": dict(labels), **histogram.to_dict()}
+            for (name, labels), histogram in sorted(self.histograms.items())
+        ]
+
+    def write(self, path):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(self.to_list(), handle, indent=1)
+        os.replace(temp_path, path)
+
+
+def format_summary(metrics):
+    rows = []
+    for entry in metrics:
+        histogram = Histogram(entry["buckets"])
+        histogram.counts, histogram.count, histogram.sum = entry["counts"], entry["count"], entry["sum"]
+        labels = ",".join(f"{key}={value}" for key, value in entry["labels"].items())
+        rows.append((entry["name"], labels, histogram))
+
+    name_width = max([len("metric")] + [len(name) for name, _, _ in rows]) + 2
+    label_width = max([len("labels")] + [len(labels) for _, labels, _ in rows]) + 2
+    lines = [f"{'metric':<{name_width}}{'labels':<{label_width}}{'count':>7}{'mean s':>9}{'p50<=':>8}{'p95<=':>8}"]
+    for name, labels, histogram in rows:
+        mean = histogram.sum / histogram.count if histogram.count else 0.0
+        lines.append(
+            f"{name:<{name_width}}{labels:<{label_width}}{histogram.count:>7}{mean:>9.3f}"
+            f"{histogram.quantile(0.5):>8g}{histogram.quantile(0.95):>8g}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("Usage: python job_metrics.py metrics.json", file=sys.stderr)
+        return 2
+    with open(argv[0], encoding="utf-8") as handle:
+        print(format_summary(json.load(handle)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
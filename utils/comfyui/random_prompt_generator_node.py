@@ -1,152 +1,1251 @@
 # Random Prompt Generator Node for ComfyUI
 # Place this in ComfyUI/custom_nodes/random_prompt_generator.py
 
-import random
+import bisect
+import hashlib
 import json
+import math
+import mmap
+import os
+import random
+import _random
+import struct
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+
+RNG_STREAMS = ("legacy", "counter")
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def splitmix64(value):
+    """SplitMix64 finalizer: a bijective 64-bit mix of `value`."""
+    z = value & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+def counter_draw(seed, counter):
+    """Draw number `counter` (0-based) of a seed's counter stream, computed directly."""
+    return splitmix64(seed + (counter + 1) * _GOLDEN_GAMMA)
+
+
+class CounterPromptRng:
+    """
+    Counter-based stream: draw j of seed S is splitmix64(S + (j + 1) * gamma),
+    i.e. the SplitMix64 sequence seeded with S. Any draw of any seed can be
+    computed on its own (and vectorized across seeds), with no generator state
+    to build or advance. Integers below n are taken from the high 32 bits as
+    ((x >> 32) * n) >> 32, which NumPy can reproduce in uint64 arithmetic.
+    """
+
+    def __init__(self, seed):
+        self.seed = seed & _MASK64
+        self.counter = 0
+
+    def _next(self):
+        value = counter_draw(self.seed, self.counter)
+        self.counter += 1
+        return value
+
+    def randbelow(self, n):
+        return ((self._next() >> 32) * n) >> 32
+
+    def choice(self, seq):
+        return seq[self.randbelow(len(seq))]
+
+    def random(self):
+        return (self._next() >> 11) * (1.0 / (1 << 53))
+
+
+def make_prompt_rng(seed, rng_stream="legacy"):
+    """
+    Return a private random stream for a prompt seed.
+
+    Seed -> stream mapping:
+    - "legacy" (default): seed N maps to `random.Random(N)`, i.e. the same
+      Mersenne Twister sequence the node used to get from `random.seed(N)` on
+      the global module, so every seed keeps producing the prompt it always did.
+    - "counter": seed N maps to CounterPromptRng(N), whose draws are pure
+      functions of (N, draw number), for O(1) lookups and vectorized export.
+    Each call gets its own generator object, so node executions running in
+    parallel threads need no locks and leave other nodes' randomness untouched.
+    """
+    if rng_stream == "counter":
+        return CounterPromptRng(seed)
+    if rng_stream != "legacy":
+        raise ValueError(f"Unknown rng_stream: {rng_stream}")
+    return random.Random(seed)
+
+
+# Prompt vocabulary, built once at import and shared read-only by every node
+# instance. Category lists are tuples behind a read-only mapping so nothing can
+# mutate the shared table from inside a node execution.
+PROMPT_CATEGORIES = MappingProxyType({
+    "landscape": (
+        "majestic mountain range with snow-capped peaks, golden hour lighting",
+        "serene lake surrounded by autumn trees, misty morning atmosphere",
+        "desert landscape with sand dunes, star-filled night sky, milky way visible",
+        "coastal cliff overlooking turbulent ocean waves, dramatic storm clouds",
+        "rolling green hills with wildflowers, soft afternoon sunlight",
+        "canyon with red rock formations, warm desert lighting",
+        "forest clearing with sunbeams filtering through tall trees",
+        "alpine meadow with colorful wildflowers, mountain backdrop",
+        "rocky coastline with crashing waves, lighthouse in distance",
+        "volcanic landscape with lava flows, dramatic red and orange sky"
+    ),
+
+    "nature": (
+        "ancient oak tree with sprawling branches, ethereal morning mist",
+        "waterfall cascading into crystal clear pool, rainbow in spray",
+        "field of sunflowers under bright blue sky, puffy white clouds",
+        "bamboo forest with filtered green light, zen atmosphere",
+        "cherry blossom tree in full bloom, petals falling gently",
+        "redwood forest with towering trees, dappled sunlight",
+        "tropical rainforest with lush vegetation, exotic birds",
+        "winter forest with snow-covered evergreens, peaceful silence",
+        "meadow with butterflies and wildflowers, warm summer day",
+        "coral reef with colorful fish, underwater paradise"
+    ),
+
+    "fantasy": (
+        "floating islands in the sky, connected by rainbow bridges",
+        "ancient wizard tower surrounded by swirling magical energy",
+        "enchanted forest with glowing mushrooms and fairy lights",
+        "dragon perched on mountain peak, breathing colorful flames",
+        "crystal cave with luminescent gems, mystical atmosphere",
+        "medieval castle on a hill, full moon and stars overhead",
+        "phoenix rising from flames, brilliant orange and gold feathers",
+        "underwater city with mermaids and glowing coral",
+        "magical library with floating books and glowing orbs",
+        "unicorn in moonlit glade, silver horn gleaming"
+    ),
+
+    "space": (
+        "nebula with swirling colors of purple, blue, and pink",
+        "alien planet with multiple moons, exotic landscape",
+        "space station orbiting ringed planet, stars in background",
+        "galaxy spiral with billions of stars, cosmic dust clouds",
+        "astronaut floating in space, Earth visible in distance",
+        "binary star system with twin suns, planetary rings",
+        "asteroid field with mining ships, distant sun",
+        "black hole warping space-time, gravitational lensing effect",
+        "alien civilization with crystalline structures, bioluminescence",
+        "comet with brilliant tail streaking across starfield"
+    ),
+
+    "abstract": (
+        "fluid dynamics with liquid metal, chrome reflections",
+        "geometric patterns in vibrant neon colors, 80s aesthetic",
+        "fractal art with infinite recursive patterns, mathematical beauty",
+        "color explosion with paint splatters, dynamic movement",
+        "minimalist design with simple shapes, negative space",
+        "optical illusion with impossible geometry, mind-bending",
+        "digital glitch art with corrupted pixels, cyberpunk vibes",
+        "flowing fabric in wind, graceful curves and folds",
+        "light trails through darkness, long exposure effect",
+        "crystalline structures with prismatic light refraction"
+    ),
+
+    "animal": (
+        "majestic lion with flowing mane, golden savanna backdrop",
+        "wise owl perched on branch, large amber eyes, moonlight",
+        "playful dolphins jumping through ocean waves, splash",
+        "colorful tropical parrot in rainforest canopy, vibrant plumage",
+        "arctic fox in winter landscape, white fur, snow falling",
+        "butterfly with intricate wing patterns, flower garden",
+        "whale breaching ocean surface, dramatic water spray",
+        "tiger stalking through jungle, dappled sunlight, stealth",
+        "eagle soaring over mountain range, wings spread wide",
+        "panda eating bamboo in peaceful grove, black and white"
+    ),
+
+    "cityscape": (
+        "futuristic cyberpunk city at night, neon lights, rain-slicked streets",
+        "New York skyline at golden hour, urban photography, iconic buildings",
+        "Tokyo street scene with cherry blossoms, urban spring, modern Japan",
+        "Venice canals at sunset, romantic atmosphere, historic architecture",
+        "Dubai skyline with modern skyscrapers, desert metropolis",
+        "London bridge in fog, atmospheric mood, classic British architecture",
+        "San Francisco Golden Gate Bridge, iconic landmark, coastal city",
+        "Paris rooftops at twilight, romantic city, European architecture",
+        "Hong Kong harbor at night, city lights reflection, Asian metropolis",
+        "Chicago architecture along river, urban canyon, modern design"
+    ),
+
+    "seasonal": (
+        "winter wonderland with snow-covered trees, Christmas atmosphere",
+        "spring garden with blooming flowers, fresh growth, renewal theme",
+        "summer beach sunset, warm colors, vacation vibes, tropical paradise",
+        "autumn maple trees with red leaves, fall colors, seasonal transition",
+        "winter mountain cabin with smoke from chimney, cozy atmosphere",
+        "spring rain on flower petals, fresh and clean, nature's renewal",
+        "summer thunderstorm over prairie, dramatic weather, power of nature",
+        "autumn harvest scene with pumpkins, thanksgiving theme, rural setting",
+        "winter aurora over frozen lake, ice formations, arctic beauty",
+        "spring waterfall with melting snow, seasonal flow, mountain runoff"
+    )
+})
+
+QUALITY_MODIFIERS = (
+    "8K ultra high resolution",
+    "professional photography", 
+    "award winning photograph",
+    "masterpiece quality",
+    "highly detailed",
+    "cinematic composition",
+    "photorealistic",
+    "studio lighting",
+    "sharp focus",
+    "vivid colors"
+)
+
+STYLE_MODIFIERS = (
+    "dramatic lighting",
+    "golden hour",
+    "soft ambient light",
+    "volumetric lighting",
+    "natural lighting",
+    "perfect lighting",
+    "moody atmosphere",
+    "ethereal glow",
+    "rim lighting",
+    "chiaroscuro"
+)
+
+
+# Built-in category names, in declaration order
+CATEGORY_NAMES = tuple(PROMPT_CATEGORIES)
+
+
+class Vocabulary:
+    """
+    The phrase tables a prompt is drawn from: category -> phrases, plus the
+    quality and style modifier lists. Phrase tables only need len() and
+    indexing, so packs can serve them straight out of a memory-mapped index.
+    `category_names` are the categories "all" draws from (by default every
+    table in `categories`). `stamp` identifies the exact contents, for cache keys.
+    """
+
+    def __init__(self, categories, quality_modifiers, style_modifiers, stamp="builtin", category_names=None):
+        self.stamp = stamp
+        self.categories = categories
+        self.category_names = tuple(categories) if category_names is None else tuple(category_names)
+        self.quality_modifiers = quality_modifiers
+        self.style_modifiers = style_modifiers
+
+
+BUILTIN_VOCABULARY = Vocabulary(PROMPT_CATEGORIES, QUALITY_MODIFIERS, STYLE_MODIFIERS)
+
+
+# External vocabulary packs
+#
+# Pack files live in prompt_packs/ next to this node, one pack per file:
+#
+#   {
+#     "categories": {"landscape": ["phrase", ...], "space": [...]},
+#     "quality_modifiers": ["..."],   (optional, defaults to the built-in list)
+#     "style_modifiers": ["..."]      (optional, defaults to the built-in list)
+#   }
+#
+# "all" draws from the pack's own categories. A built-in category the pack
+# does not define can still be selected (or used as a template slot) and
+# draws from the built-in table. Category names that are template slots or
+# grammar rules ("all", "subject", "quality", "style", "lighting", ...) are
+# rejected when the pack is loaded.
+#
+# .json files are always supported, .yaml/.yml when PyYAML is installed.
+# The first time a pack generates a prompt it is compiled into
+# prompt_packs/.index/<name>.idx, a flat file of UTF-8 phrases plus an offset
+# table, which is then memory-mapped read-only so every ComfyUI worker process
+# shares the same page-cache pages. The index is rebuilt whenever the pack
+# file's size or modification time changes.
+#
+# Startup never compiles or maps a pack. The node's category list adds the
+# category names stored in the header of each pack's index, and only when
+# that index is current. A new or edited pack has no current index, so its
+# categories are listed once it has generated a prompt (with "all", for
+# example) and the node list is reloaded.
+
+PACKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt_packs")
+PACK_INDEX_DIR = os.path.join(PACKS_DIR, ".index")
+
+_PACK_INDEX_MAGIC = b"RPGIDX01"
+_PACK_HEADER = struct.Struct("<8sI")
+_PACK_OFFSET = struct.Struct("<Q")
+_QUALITY_SECTION = "quality_modifiers"
+_STYLE_SECTION = "style_modifiers"
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+_PACK_EXTENSIONS = (".json", ".yaml", ".yml") if yaml is not None else (".json",)
+
+
+def list_vocabulary_packs(packs_dir=PACKS_DIR):
+    """Return the names of the available packs without opening any of them."""
+    if not os.path.isdir(packs_dir):
+        return []
+    names = set()
+    for entry in os.scandir(packs_dir):
+        name, extension = os.path.splitext(entry.name)
+        if entry.is_file() and extension.lower() in _PACK_EXTENSIONS:
+            names.add(name)
+    return sorted(names)
+
+
+class PackPhrases:
+    """Read-only sequence view over one section of a memory-mapped pack index."""
+
+    def __init__(self, buffer, offsets_start, blob_start, start, count):
+        self._buffer = buffer
+        self._offsets_start = offsets_start
+        self._blob_start = blob_start
+        self._start = start
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("pack phrase index out of range")
+        position = self._offsets_start + (self._start + index) * _PACK_OFFSET.size
+        begin = _PACK_OFFSET.unpack_from(self._buffer, position)[0]
+        end = _PACK_OFFSET.unpack_from(self._buffer, position + _PACK_OFFSET.size)[0]
+        return self._buffer[self._blob_start + begin:self._blob_start + end].decode("utf-8")
+
+
+class VocabularyPack:
+    """
+    A vocabulary pack file, compiled lazily into a memory-mapped offset index.
+    """
+
+    def __init__(self, source_path, index_dir=PACK_INDEX_DIR):
+        self.source_path = source_path
+        self.name = os.path.splitext(os.path.basename(source_path))[0]
+        self.index_path = os.path.join(index_dir, self.name + ".idx")
+        self._vocabulary = None
+        self._buffer = None
+
+    def vocabulary(self):
+        # Re-open when the pack file has been edited since it was mapped
+        if self._vocabulary is None or self._vocabulary.stamp != self._stamp_key(self._source_stamp()):
+            # Windows cannot replace a file that is still mapped
+            self._close()
+            self._vocabulary = self._open_index()
+        return self._vocabulary
+
+    def category_names(self):
+        """Category names from the index header, or None if there is no current index; never builds it."""
+        try:
+            stamp = self._source_stamp()
+            with open(self.index_path, "rb") as f:
+                magic, header_size = _PACK_HEADER.unpack(f.read(_PACK_HEADER.size))
+                header = json.loads(f.read(header_size).decode("utf-8")) if magic == _PACK_INDEX_MAGIC else None
+        except (OSError, ValueError, struct.error):
+            return None
+        if header is None or any(header.get(key) != value for key, value in stamp.items()):
+            return None
+        return tuple(section["name"] for section in header["sections"] if not section["name"].startswith("@"))
+
+    def _close(self):
+        if self._buffer is not None:
+            self._buffer.close()
+        self._vocabulary = self._buffer = None
+
+    @staticmethod
+    def _stamp_key(stamp):
+        return f"{stamp['source_size']}:{stamp['source_mtime_ns']}"
+
+    def _source_stamp(self):
+        stat = os.stat(self.source_path)
+        return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+    def _read_source(self):
+        with open(self.source_path, "r", encoding="utf-8") as f:
+            if self.source_path.lower().endswith(".json"):
+                data = json.load(f)
+            elif yaml is not None:
+                data = yaml.safe_load(f)
+            else:
+                raise RuntimeError(f"PyYAML is required to load vocabulary pack {self.source_path}")
+
+        categories = data.get("categories") if isinstance(data, dict) else None
+        if not isinstance(categories, dict) or not categories:
+            raise ValueError(f"Vocabulary pack {self.source_path} has no 'categories' mapping")
+        reserved = sorted(
+            str(name) for name in categories
+            if name in RESERVED_CATEGORY_NAMES or str(name).startswith("@")
+        )
+        if reserved:
+            raise ValueError(
+                f"Vocabulary pack {self.source_path} uses reserved category names: {', '.join(reserved)} "
+                f"('all', template slots and grammar rules such as 'quality' and 'style' cannot be categories)"
+            )
+
+        sections = [(name, [str(phrase) for phrase in phrases]) for name, phrases in categories.items()]
+        for section in (_QUALITY_SECTION, _STYLE_SECTION):
+            if data.get(section):
+                sections.append(("@" + section, [str(phrase) for phrase in data[section]]))
+        for name, phrases in sections:
+            if not phrases:
+                raise ValueError(f"Vocabulary pack {self.source_path} has an empty '{name}' list")
+        return sections
+
+    def _build_index(self, stamp):
+        sections = self._read_source()
+        header_sections = []
+        offsets = bytearray()
+        blob = bytearray()
+        start = 0
+        for name, phrases in sections:
+            header_sections.append({"name": name, "start": start, "count": len(phrases)})
+            for phrase in phrases:
+                offsets += _PACK_OFFSET.pack(len(blob))
+                blob += phrase.encode("utf-8")
+            start += len(phrases)
+        offsets += _PACK_OFFSET.pack(len(blob))
+
+        header = json.dumps(dict(stamp, sections=header_sections)).encode("utf-8")
+        # Pad the JSON header so the offset table stays 8-byte aligned
+        header += b" " * (-(_PACK_HEADER.size + len(header)) % _PACK_OFFSET.size)
+
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        temp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(_PACK_HEADER.pack(_PACK_INDEX_MAGIC, len(header)))
+            f.write(header)
+            f.write(offsets)
+            f.write(blob)
+        os.replace(temp_path, self.index_path)
+
+    def _map_index(self):
+        with open(self.index_path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_size = _PACK_HEADER.unpack_from(buffer, 0)
+        if magic != _PACK_INDEX_MAGIC:
+            buffer.close()
+            raise ValueError(f"{self.index_path} is not a vocabulary pack index")
+        header_start = _PACK_HEADER.size
+        header = json.loads(buffer[header_start:header_start + header_size].decode("utf-8"))
+        return buffer, header, header_start + header_size
+
+    def _open_index(self):
+        stamp = self._source_stamp()
+        mapped = None
+        if os.path.exists(self.index_path):
+            mapped = self._map_index()
+            if any(mapped[1].get(key) != value for key, value in stamp.items()):
+                mapped[0].close()
+                mapped = None
+        if mapped is None:
+            self._build_index(stamp)
+            mapped = self._map_index()
+
+        buffer, header, offsets_start = mapped
+        self._buffer = buffer
+        total = sum(section["count"] for section in header["sections"])
+        blob_start = offsets_start + (total + 1) * _PACK_OFFSET.size
+        tables = {
+            section["name"]: PackPhrases(buffer, offsets_start, blob_start, section["start"], section["count"])
+            for section in header["sections"]
+        }
+
+        quality_modifiers = tables.pop("@" + _QUALITY_SECTION, QUALITY_MODIFIERS)
+        style_modifiers = tables.pop("@" + _STYLE_SECTION, STYLE_MODIFIERS)
+        # Built-in categories the pack does not define stay selectable
+        categories = MappingProxyType({**PROMPT_CATEGORIES, **tables})
+        return Vocabulary(categories, quality_modifiers, style_modifiers, self._stamp_key(stamp), tuple(tables))
+
+
+_loaded_packs = {}
+_loaded_packs_lock = threading.Lock()
+
+
+def _get_pack(name, packs_dir):
+    # Caller holds _loaded_packs_lock
+    pack = _loaded_packs.get((packs_dir, name))
+    if pack is None:
+        for extension in _PACK_EXTENSIONS:
+            source_path = os.path.join(packs_dir, name + extension)
+            if os.path.isfile(source_path):
+                pack = VocabularyPack(source_path, os.path.join(packs_dir, ".index"))
+                break
+        else:
+            raise ValueError(f"Unknown vocabulary pack: {name}")
+        _loaded_packs[(packs_dir, name)] = pack
+    return pack
+
+
+def get_vocabulary(name, packs_dir=PACKS_DIR):
+    """Return the built-in vocabulary or the named pack, opening it on first use."""
+    if name in (None, "", "builtin"):
+        return BUILTIN_VOCABULARY
+
+    with _loaded_packs_lock:
+        return _get_pack(name, packs_dir).vocabulary()
+
+
+def list_vocabulary_categories(packs_dir=PACKS_DIR):
+    """Built-in category names plus those of every pack with a current index, for the node's category input."""
+    names = dict.fromkeys(CATEGORY_NAMES)
+    for pack_name in list_vocabulary_packs(packs_dir):
+        with _loaded_packs_lock:
+            pack = _get_pack(pack_name, packs_dir)
+        names.update(dict.fromkeys(pack.category_names() or ()))
+    return list(names)
+
+
+# Template grammar
+#
+# A template is plain text with {slot} references, e.g.
+#
+#   "{subject}, {lighting}, {camera}"
+#
+# {subject} is a phrase from the selected category, {<category>} a phrase from
+# that category, {quality} / {style} the modifier lists, and the rules below add
+# more slots. Inline alternatives are written {a|b|c} and may nest slots, e.g.
+# "{subject} {at {time_of_day}|in the rain}". Rule alternatives are either a
+# string (weight 1) or a (string, weight) pair, and may reference other rules.
+#
+# Templates and rules are compiled once into a flat table of integer rule ids
+# whose alternatives are tuples of literal strings and rule ids, so sampling
+# is one weighted pick per rule on the expansion path (O(depth)) with no
+# string parsing per sample.
+
+GRAMMAR_RULES = MappingProxyType({
+    "lighting": (
+        ("golden hour light", 3),
+        ("soft overcast light", 2),
+        "volumetric light rays",
+        "{time_of_day} glow",
+        "neon reflections",
+        "candlelit warmth"
+    ),
+    "time_of_day": ("dawn", "dusk", "midnight", "midday", "twilight", "blue hour"),
+    "camera": (
+        ("wide-angle shot", 2),
+        "aerial view",
+        "low-angle shot",
+        "{lens} lens close-up",
+        "panoramic composition"
+    ),
+    "lens": ("35mm", "50mm", "85mm", "macro", "telephoto"),
+    "mood": ("serene", "dramatic", "mysterious", "whimsical", "melancholic", "triumphant")
+})
+
+_SUBJECT_SLOT = "subject"
+
+# Names a pack category cannot take: the "all" option and every table or rule
+# a template can reference besides the categories themselves
+RESERVED_CATEGORY_NAMES = frozenset({"all", _SUBJECT_SLOT, "quality", "style", *GRAMMAR_RULES})
+
+
+class PromptGrammar:
+    """
+    Compiled rule table for template prompts.
+
+    Every rule is stored at an integer id as (alternatives, cumulative weights).
+    Alternatives are either plain phrases (vocabulary tables are used as-is,
+    so memory-mapped packs stay on disk) or tuples of parts, where a part is a
+    literal string or the id of another rule.
+    """
+
+    def __init__(self, vocab, rules=GRAMMAR_RULES):
+        self.vocab = vocab
+        self._alternatives = []
+        self._cumulative_weights = []
+        self._rule_ids = {}
+        self._templates = {}
+        self._lock = threading.Lock()
+
+        for name, phrases in vocab.categories.items():
+            self._add_table(name, phrases)
+        self._add_table("quality", vocab.quality_modifiers)
+        self._add_table("style", vocab.style_modifiers)
+
+        # Reserve ids first so rules can reference each other in any order
+        pending = []
+        for name, alternatives in rules.items():
+            if name in self._rule_ids:
+                raise ValueError(f"Grammar rule '{name}' clashes with a vocabulary table")
+            self._rule_ids[name] = self._reserve()
+            pending.append((self._rule_ids[name], alternatives))
+        for rule_id, alternatives in pending:
+            self._define(rule_id, alternatives)
+        self._check_acyclic()
+
+    def _reserve(self):
+        self._alternatives.append(())
+        self._cumulative_weights.append(None)
+        return len(self._alternatives) - 1
+
+    def _add_table(self, name, phrases):
+        rule_id = self._reserve()
+        self._alternatives[rule_id] = phrases
+        self._rule_ids[name] = rule_id
+
+    def _define(self, rule_id, alternatives):
+        compiled = []
+        weights = []
+        for alternative in alternatives:
+            if isinstance(alternative, str):
+                text, weight = alternative, 1
+            else:
+                text, weight = alternative
+            if weight <= 0:
+                raise ValueError(f"Grammar alternative '{text}' needs a positive weight")
+            compiled.append(self._compile_text(text))
+            weights.append(weight)
+        if not compiled:
+            raise ValueError("Grammar rules need at least one alternative")
+
+        self._alternatives[rule_id] = tuple(compiled)
+        if len(set(weights)) > 1:
+            total = 0
+            cumulative = []
+            for weight in weights:
+                total += weight
+                cumulative.append(total)
+            self._cumulative_weights[rule_id] = tuple(cumulative)
+
+    def _compile_text(self, text, subject_id=None):
+        parts, position = self._parse_sequence(text, 0, subject_id, inline=False)
+        if position != len(text):
+            raise ValueError(f"Unbalanced '}}' in template: {text!r}")
+        return parts
+
+    def _parse_sequence(self, text, position, subject_id, inline):
+        parts = []
+        literal = []
+        while position < len(text):
+            char = text[position]
+            if char == "{":
+                if literal:
+                    parts.append("".join(literal))
+                    literal = []
+                position, part = self._parse_slot(text, position + 1, subject_id)
+                parts.append(part)
+            elif char == "}" or (inline and char == "|"):
+                break
+            else:
+                literal.append(char)
+                position += 1
+        if literal:
+            parts.append("".join(literal))
+        return tuple(parts), position
+
+    def _parse_slot(self, text, position, subject_id):
+        options = []
+        while True:
+            option, position = self._parse_sequence(text, position, subject_id, inline=True)
+            options.append(option)
+            if position >= len(text):
+                raise ValueError(f"Unclosed '{{' in template: {text!r}")
+            if text[position] == "}":
+                position += 1
+                break
+            position += 1
+
+        if len(options) == 1:
+            name = "".join(part for part in options[0] if isinstance(part, str)).strip()
+            if name == _SUBJECT_SLOT and subject_id is not None:
+                return position, subject_id
+            if name in self._rule_ids and len(options[0]) == 1:
+                return position, self._rule_ids[name]
+            raise ValueError(f"Unknown template slot '{{{name}}}'")
+
+        # Inline {a|b|c} alternatives become an anonymous uniform rule
+        rule_id = self._reserve()
+        self._alternatives[rule_id] = tuple(options)
+        return position, rule_id
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(rule_id):
+            if rule_id in done:
+                return
+            if rule_id in visiting:
+                raise ValueError("Grammar rules must not reference themselves")
+            visiting.add(rule_id)
+            alternatives = self._alternatives[rule_id]
+            if isinstance(alternatives, tuple):
+                for alternative in alternatives:
+                    if isinstance(alternative, tuple):
+                        for part in alternative:
+                            if isinstance(part, int):
+                                visit(part)
+            visiting.discard(rule_id)
+            done.add(rule_id)
+
+        for rule_id in range(len(self._alternatives)):
+            visit(rule_id)
+
+    def compile_template(self, template, category):
+        """Compile (and cache) a template with {subject} bound to `category`."""
+        key = (template, category)
+        compiled = self._templates.get(key)
+        if compiled is None:
+            with self._lock:
+                compiled = self._templates.get(key)
+                if compiled is None:
+                    compiled = self._compile_text(template, self._rule_ids[category])
+                    self._templates[key] = compiled
+        return compiled
+
+    def expand(self, compiled, rng):
+        """Sample one string from a compiled template."""
+        out = []
+        stack = [iter(compiled)]
+        alternatives_table = self._alternatives
+        weights_table = self._cumulative_weights
+        while stack:
+            for part in stack[-1]:
+                if isinstance(part, str):
+                    out.append(part)
+                    continue
+                alternatives = alternatives_table[part]
+                cumulative = weights_table[part]
+                if cumulative is None:
+                    choice = alternatives[int(rng.random() * len(alternatives))]
+                else:
+                    choice = alternatives[bisect.bisect(cumulative, rng.random() * cumulative[-1])]
+                if isinstance(choice, str):
+                    out.append(choice)
+                else:
+                    stack.append(iter(choice))
+                    break
+            else:
+                stack.pop()
+        return "".join(out)
+
+
+_grammars = {}
+_grammars_lock = threading.Lock()
+
+
+def get_prompt_grammar(vocabulary="builtin"):
+    """Return the compiled grammar for a vocabulary, building it on first use."""
+    vocab = get_vocabulary(vocabulary)
+    grammar = _grammars.get(vocabulary)
+    if grammar is None or grammar.vocab is not vocab:
+        with _grammars_lock:
+            grammar = _grammars.get(vocabulary)
+            if grammar is None or grammar.vocab is not vocab:
+                grammar = PromptGrammar(vocab)
+                _grammars[vocabulary] = grammar
+    return grammar
+
+
+# No-repeat history
+#
+# With no_repeat enabled the node remembers what it has emitted and, on a
+# repeat, redraws from a stream keyed on the seed and the last emitted prompt
+# until it finds an unseen one. Results stay reproducible for a given seed and
+# history, and a fixed seed still moves on to new prompts every run. Each
+# (vocabulary, category, modifiers, template) combination has its own history
+# under prompt_history/ so it survives ComfyUI restarts:
+#
+# - Small prompt spaces use an exact LRU of prompt digests holding at most half
+#   the space (so an unseen prompt is always at least as likely as a repeat),
+#   persisted as an append-only log that is compacted when it doubles.
+# - Large or unbounded spaces (templates) use a two-generation Bloom filter in
+#   a memory-mapped file. When the current generation fills up, the older one
+#   is cleared and reused, so memory stays fixed and old prompts age out.
+
+HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt_history")
+NO_REPEAT_MAX_ATTEMPTS = 64
+NO_REPEAT_EXACT_LIMIT = 65536
+NO_REPEAT_BLOOM_CAPACITY = 1000000
+NO_REPEAT_BLOOM_ERROR_RATE = 0.01
+
+_DIGEST_SIZE = 16
+_BLOOM_MAGIC = b"RPGBLM01"
+_BLOOM_HEADER = struct.Struct("<8sIIQQ16s")
+
+
+def prompt_digest(prompt):
+    return hashlib.blake2b(prompt.encode("utf-8"), digest_size=_DIGEST_SIZE).digest()
+
+
+class ExactPromptHistory:
+    """Bounded LRU of prompt digests backed by an append-only log file."""
+
+    def __init__(self, path, capacity):
+        self.path = path
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._logged = 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            for start in range(0, len(data) - _DIGEST_SIZE + 1, _DIGEST_SIZE):
+                self._remember(data[start:start + _DIGEST_SIZE])
+                self._logged += 1
+
+    def _remember(self, digest):
+        self._entries[digest] = None
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def seen(self, digest):
+        return digest in self._entries
+
+    def last(self):
+        return next(reversed(self._entries), b"")
+
+    def add(self, digest):
+        self._remember(digest)
+        if self._logged >= 2 * self.capacity:
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(b"".join(self._entries))
+            os.replace(temp_path, self.path)
+            self._logged = len(self._entries)
+        else:
+            with open(self.path, "ab") as f:
+                f.write(digest)
+            self._logged += 1
+
+
+class BloomPromptHistory:
+    """Two-generation Bloom filter over prompt digests in a memory-mapped file."""
+
+    def __init__(self, path, capacity, error_rate):
+        self.path = path
+        self.capacity = capacity
+        bits = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self._bits = (bits + 7) // 8 * 8
+        self._hashes = max(1, round(self._bits / capacity * math.log(2)))
+        generation_bytes = self._bits // 8
+        size = _BLOOM_HEADER.size + 2 * generation_bytes
+
+        if os.path.exists(path) and os.path.getsize(path) == size:
+            with open(path, "r+b") as f:
+                self._mmap = mmap.mmap(f.fileno(), size)
+            magic, hashes, _, bits, _, _ = _BLOOM_HEADER.unpack_from(self._mmap, 0)
+            if (magic, hashes, bits) != (_BLOOM_MAGIC, self._hashes, self._bits):
+                self._mmap.close()
+                self._mmap = None
+        else:
+            self._mmap = None
+        if self._mmap is None:
+            with open(path, "wb") as f:
+                f.truncate(size)
+            with open(path, "r+b") as f:
+                self._mmap = mmap.mmap(f.fileno(), size)
+            self._write_header(0, 0, b"")
+
+        self._generation_bytes = generation_bytes
+        _, _, self._current, _, self._count, self._last = _BLOOM_HEADER.unpack_from(self._mmap, 0)
+
+    def _write_header(self, current, count, last):
+        _BLOOM_HEADER.pack_into(self._mmap, 0, _BLOOM_MAGIC, self._hashes, current, self._bits, count, last)
+
+    def _positions(self, digest):
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self._bits for i in range(self._hashes)]
+
+    def _contains(self, generation, positions):
+        base = _BLOOM_HEADER.size + generation * self._generation_bytes
+        return all(self._mmap[base + position // 8] & (1 << (position % 8)) for position in positions)
+
+    def seen(self, digest):
+        positions = self._positions(digest)
+        return self._contains(0, positions) or self._contains(1, positions)
+
+    def last(self):
+        return self._last
+
+    def add(self, digest):
+        if self._count >= self.capacity:
+            # Retire the older generation and start filling it afresh
+            self._current = 1 - self._current
+            base = _BLOOM_HEADER.size + self._current * self._generation_bytes
+            self._mmap[base:base + self._generation_bytes] = bytes(self._generation_bytes)
+            self._count = 0
+        base = _BLOOM_HEADER.size + self._current * self._generation_bytes
+        for position in self._positions(digest):
+            self._mmap[base + position // 8] |= 1 << (position % 8)
+        self._count += 1
+        self._last = digest
+        self._write_header(self._current, self._count, digest)
+
+
+class PromptHistory:
+    """Thread-safe no-repeat history choosing exact or Bloom storage by space size."""
+
+    def __init__(self, key, space_size, history_dir=None):
+        history_dir = history_dir or HISTORY_DIR
+        os.makedirs(history_dir, exist_ok=True)
+        name = hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+        self._lock = threading.Lock()
+        if space_size is not None and space_size <= 2 * NO_REPEAT_EXACT_LIMIT:
+            capacity = max(1, space_size // 2)
+            self._store = ExactPromptHistory(os.path.join(history_dir, name + ".lru"), capacity)
+        else:
+            self._store = BloomPromptHistory(
+                os.path.join(history_dir, name + ".bloom"),
+                NO_REPEAT_BLOOM_CAPACITY,
+                NO_REPEAT_BLOOM_ERROR_RATE
+            )
+
+    def claim(self, prompt):
+        """Record `prompt` and return True, or return False if it was already emitted."""
+        digest = prompt_digest(prompt)
+        with self._lock:
+            if self._store.seen(digest):
+                return False
+            self._store.add(digest)
+            return True
+
+    def redraw_rng(self, seed):
+        """
+        Stream used for redraws after a repeat, keyed on the seed and the last
+        prompt emitted, so a fixed seed still walks to fresh prompts each run.
+        """
+        with self._lock:
+            last = self._store.last()
+        return make_prompt_rng(f"{seed}:{last.hex()}")
+
+
+_histories = {}
+_histories_lock = threading.Lock()
+
+
+def get_prompt_history(vocabulary, category, add_quality_modifiers, template):
+    """Return the persistent no-repeat history for one prompt space."""
+    key = json.dumps([vocabulary, category, bool(add_quality_modifiers), template])
+    with _histories_lock:
+        history = _histories.get(key)
+        if history is None:
+            space_size = None
+            if not template:
+                vocab = get_vocabulary(vocabulary)
+                names = vocab.category_names if category == "all" else (category,)
+                space_size = sum(len(vocab.categories[name]) for name in names)
+                if add_quality_modifiers:
+                    space_size *= len(vocab.quality_modifiers) * len(vocab.style_modifiers)
+            history = PromptHistory(key, space_size)
+            _histories[key] = history
+        return history
+
+def draw_prompt_components(rng, vocab, vocabulary, category, add_quality_modifiers, template="", category_sampler=None):
+    """Draw one prompt from `rng` and return it with the pieces it was built from."""
+    # Select category
+    if category == "all" and category_sampler is not None:
+        selected_category = category_sampler.draw(rng)
+    elif category == "all":
+        # Pick a random category from the precomputed index
+        selected_category = rng.choice(vocab.category_names)
+    elif category in vocab.categories:
+        selected_category = category
+    else:
+        raise ValueError(f"Vocabulary '{vocabulary}' has no '{category}' category")
+        
+    # Get base prompt from selected category, or expand the template
+    # with {subject} bound to it
+    if template:
+        grammar = get_prompt_grammar(vocabulary)
+        base_prompt = grammar.expand(grammar.compile_template(template, selected_category), rng)
+    else:
+        base_prompts = vocab.categories[selected_category]
+        base_prompt = rng.choice(base_prompts)
+    
+    components = {"category": selected_category, "base": base_prompt, "quality": None, "style": None}
+    
+    # Add quality and style modifiers if requested
+    if add_quality_modifiers:
+        components["quality"] = rng.choice(vocab.quality_modifiers)
+        components["style"] = rng.choice(vocab.style_modifiers)
+        components["prompt"] = f"{base_prompt}, {components['quality']}, {components['style']}"
+    else:
+        components["prompt"] = base_prompt
+    return components
+
+
+def prompt_components(seed, category="all", add_quality_modifiers=True, vocabulary="builtin", template="", rng_stream="legacy", category_weights=""):
+    """
+    Pure seed -> prompt lookup: the category, base phrase, modifiers and final
+    prompt RandomPromptGenerator emits for `seed` (without no_repeat or a
+    recency penalty), computed without touching any shared state.
+    """
+    rng = make_prompt_rng(seed, rng_stream)
+    vocab = get_vocabulary(vocabulary)
+    category_sampler = build_category_sampler(vocab, category_weights)
+    return draw_prompt_components(rng, vocab, vocabulary, category, add_quality_modifiers, template.strip(), category_sampler)
+
+
+def shard_seed_range(start, stop, shard_index, shard_count):
+    """Contiguous slice of seeds [start, stop) owned by one of `shard_count` workers; shards never overlap."""
+    if not 0 <= shard_index < shard_count:
+        raise ValueError("shard_index must be in [0, shard_count)")
+    total = stop - start
+    return range(start + total * shard_index // shard_count, start + total * (shard_index + 1) // shard_count)
+
+# Weighted "all" category selection
+
+def parse_category_weights(text):
+    """Parse "landscape: 2, space: 0.5" (or name=weight) into {category: weight}."""
+    weights = {}
+    for item in text.replace("\n", ",").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, separator, value = item.replace("=", ":").partition(":")
+        if not separator:
+            raise ValueError(f"Category weight '{item}' must look like name: weight")
+        weight = float(value)
+        if weight < 0:
+            raise ValueError(f"Category weight for '{name.strip()}' must not be negative")
+        weights[name.strip()] = weight
+    return weights
+
+
+class _SumTree:
+    """
+    Binary sum tree over float weights: O(log n) point updates and prefix
+    lookups. Parents are recomputed from their children rather than patched
+    with deltas, so weights spanning many orders of magnitude stay exact.
+    """
+
+    def __init__(self, values):
+        self.values = list(values)
+        self._size = 1 << max(0, len(self.values) - 1).bit_length()
+        self._tree = [0.0] * (2 * self._size)
+        self._tree[self._size:self._size + len(self.values)] = self.values
+        for position in range(self._size - 1, 0, -1):
+            self._tree[position] = self._tree[2 * position] + self._tree[2 * position + 1]
+
+    def set(self, index, value):
+        self.values[index] = value
+        position = self._size + index
+        self._tree[position] = value
+        position >>= 1
+        while position:
+            self._tree[position] = self._tree[2 * position] + self._tree[2 * position + 1]
+            position >>= 1
+
+    def total(self):
+        return self._tree[1]
+
+    def find(self, target):
+        """Index of the entry whose cumulative range contains `target`."""
+        position = 1
+        while position < self._size:
+            left = 2 * position
+            if target < self._tree[left] or self._tree[left + 1] <= 0:
+                position = left
+            else:
+                target -= self._tree[left]
+                position = left + 1
+        # Guard against float drift landing on padding or a zero weight
+        index = min(position - self._size, len(self.values) - 1)
+        while self.values[index] <= 0 and index > 0:
+            index -= 1
+        return index
+
+
+class CategorySampler:
+    """
+    Weighted category picker for "all" mode.
+
+    Static weights use Vose's alias table: one uniform per draw, O(1), and the
+    table is rebuilt only when the weights change. With a recency penalty r a
+    category's effective weight is w * g**age, g = 1 / (1 - r), where age is
+    the number of draws since it was last picked, so recently used categories
+    are damped and long-unused ones recover. Dividing every weight by the
+    shared factor g**now leaves w * g**-last_pick, so each draw changes only
+    the picked entry; those weights live in a sum tree for O(log n) draws
+    and updates with no rejection loop.
+    """
+
+    def __init__(self, names, weights, recency_penalty=0.0):
+        self.names = tuple(names)
+        self.weights = tuple(float(weight) for weight in weights)
+        if len(self.names) != len(self.weights) or not self.names:
+            raise ValueError("CategorySampler needs one weight per category")
+        if sum(self.weights) <= 0:
+            raise ValueError("At least one category weight must be positive")
+        if not 0 <= recency_penalty < 1:
+            raise ValueError("recency_penalty must be in [0, 1)")
+
+        self.recency_penalty = recency_penalty
+        self._lock = threading.Lock()
+        if recency_penalty > 0:
+            self._growth = 1.0 / (1.0 - recency_penalty)
+            # Rescale before growth**-age could underflow (about 1e-100)
+            self._rebase_after = max(1, int(230 / math.log(self._growth)))
+            self._clock = 0
+            self._base = 0
+            self._tree = _SumTree(self.weights)
+        else:
+            self._build_alias_table()
+
+    def _build_alias_table(self):
+        count = len(self.weights)
+        total = sum(self.weights)
+        scaled = [weight * count / total for weight in self.weights]
+        self._probability = [1.0] * count
+        self._alias = list(range(count))
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self._probability[less] = scaled[less]
+            self._alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+
+    def _rebase(self):
+        # Categories idle since before the previous rebase are already ~1e100
+        # times more likely than fresh ones; cap them there instead of overflowing
+        scale = self._growth ** (self._clock - self._base)
+        ceiling = self._growth ** self._rebase_after
+        self._tree = _SumTree(
+            min(value * scale, weight * ceiling)
+            for value, weight in zip(self._tree.values, self.weights)
+        )
+        self._base = self._clock
+
+    def draw(self, rng):
+        if self.recency_penalty <= 0:
+            point = rng.random() * len(self.names)
+            column = int(point)
+            if point - column < self._probability[column]:
+                return self.names[column]
+            return self.names[self._alias[column]]
+
+        with self._lock:
+            index = self._tree.find(rng.random() * self._tree.total())
+            self._clock += 1
+            if self._clock - self._base >= self._rebase_after:
+                self._rebase()
+            self._tree.set(index, self.weights[index] * self._growth ** -(self._clock - self._base))
+            return self.names[index]
+
+
+def build_category_sampler(vocab, category_weights="", recency_penalty=0.0):
+    """Return a CategorySampler for a vocabulary, or None for the default uniform draw."""
+    weights = parse_category_weights(category_weights) if category_weights else {}
+    if not weights and recency_penalty <= 0:
+        return None
+    unknown = set(weights) - set(vocab.category_names)
+    if unknown:
+        raise ValueError(f"Unknown categories in category_weights: {', '.join(sorted(unknown))}")
+    return CategorySampler(
+        vocab.category_names,
+        [weights.get(name, 1.0) for name in vocab.category_names],
+        recency_penalty
+    )
+
+
+# The default node call (built-in vocabulary, legacy stream, no template,
+# weights, penalty or no_repeat) is the common one, so it skips the general
+# path and the prompt cache: one generator per thread is reseeded in C and
+# the built-in tuples are drawn from directly. Almost all of the remaining
+# time is Mersenne Twister seeding, which the old node paid as well.
+_legacy_rngs = threading.local()
+# random.Random.seed() hands int seeds straight to this
+_seed_mersenne_twister = _random.Random.seed
+
+
+def _draw_table(phrases):
+    return phrases, len(phrases), len(phrases).bit_length()
+
+
+_CATEGORY_DRAW_TABLE = _draw_table(CATEGORY_NAMES)
+_BUILTIN_DRAW_TABLES = MappingProxyType({name: _draw_table(phrases) for name, phrases in PROMPT_CATEGORIES.items()})
+_QUALITY_DRAW_TABLE = _draw_table(QUALITY_MODIFIERS)
+_STYLE_DRAW_TABLE = _draw_table(STYLE_MODIFIERS)
+
+
+def _pick(getrandbits, table):
+    # random.Random.choice(): rejection-sample an index from bit_length(n) random bits
+    phrases, size, bits = table
+    index = getrandbits(bits)
+    while index >= size:
+        index = getrandbits(bits)
+    return phrases[index]
+
+
+def _builtin_legacy_prompt(category, add_quality_modifiers, seed):
+    """draw_prompt_components(make_prompt_rng(seed), ...)["prompt"] for the default inputs, or None."""
+    if category == "all":
+        table = None
+    else:
+        table = _BUILTIN_DRAW_TABLES.get(category)
+        if table is None:
+            return None
+    rng = getattr(_legacy_rngs, "rng", None)
+    if rng is None:
+        rng = _legacy_rngs.rng = random.Random()
+    _seed_mersenne_twister(rng, seed)
+    getrandbits = rng.getrandbits
+    if table is None:
+        table = _BUILTIN_DRAW_TABLES[_pick(getrandbits, _CATEGORY_DRAW_TABLE)]
+    base_prompt = _pick(getrandbits, table)
+    if add_quality_modifiers:
+        return f"{base_prompt}, {_pick(getrandbits, _QUALITY_DRAW_TABLE)}, {_pick(getrandbits, _STYLE_DRAW_TABLE)}"
+    return base_prompt
+
+
+# Bounded LRU of generated prompts shared by all node instances, keyed on every
+# input that determines the output (plus the vocabulary stamp, so editing a
+# pack invalidates its entries). no_repeat results are never cached.
+PROMPT_CACHE_SIZE = 4096
+
+_prompt_cache = OrderedDict()
+_prompt_cache_lock = threading.Lock()
+
+
+def _cached_prompt(key):
+    with _prompt_cache_lock:
+        prompt = _prompt_cache.get(key)
+        if prompt is not None:
+            _prompt_cache.move_to_end(key)
+        return prompt
+
+
+def _store_prompt(key, prompt):
+    with _prompt_cache_lock:
+        _prompt_cache[key] = prompt
+        _prompt_cache.move_to_end(key)
+        while len(_prompt_cache) > PROMPT_CACHE_SIZE:
+            _prompt_cache.popitem(last=False)
 
 class RandomPromptGenerator:
     """
     A ComfyUI custom node that generates random prompts for image generation
     """
     
+    # Shared module-level vocabulary; instances carry no per-instance copies
+    prompt_categories = PROMPT_CATEGORIES
+    quality_modifiers = QUALITY_MODIFIERS
+    style_modifiers = STYLE_MODIFIERS
+
     def __init__(self):
-        self.prompt_categories = {
-            "landscape": [
-                "majestic mountain range with snow-capped peaks, golden hour lighting",
-                "serene lake surrounded by autumn trees, misty morning atmosphere",
-                "desert landscape with sand dunes, star-filled night sky, milky way visible",
-                "coastal cliff overlooking turbulent ocean waves, dramatic storm clouds",
-                "rolling green hills with wildflowers, soft afternoon sunlight",
-                "canyon with red rock formations, warm desert lighting",
-                "forest clearing with sunbeams filtering through tall trees",
-                "alpine meadow with colorful wildflowers, mountain backdrop",
-                "rocky coastline with crashing waves, lighthouse in distance",
-                "volcanic landscape with lava flows, dramatic red and orange sky"
-            ],
-            
-            "nature": [
-                "ancient oak tree with sprawling branches, ethereal morning mist",
-                "waterfall cascading into crystal clear pool, rainbow in spray",
-                "field of sunflowers under bright blue sky, puffy white clouds",
-                "bamboo forest with filtered green light, zen atmosphere",
-                "cherry blossom tree in full bloom, petals falling gently",
-                "redwood forest with towering trees, dappled sunlight",
-                "tropical rainforest with lush vegetation, exotic birds",
-                "winter forest with snow-covered evergreens, peaceful silence",
-                "meadow with butterflies and wildflowers, warm summer day",
-                "coral reef with colorful fish, underwater paradise"
-            ],
-            
-            "fantasy": [
-                "floating islands in the sky, connected by rainbow bridges",
-                "ancient wizard tower surrounded by swirling magical energy",
-                "enchanted forest with glowing mushrooms and fairy lights",
-                "dragon perched on mountain peak, breathing colorful flames",
-                "crystal cave with luminescent gems, mystical atmosphere",
-                "medieval castle on a hill, full moon and stars overhead",
-                "phoenix rising from flames, brilliant orange and gold feathers",
-                "underwater city with mermaids and glowing coral",
-                "magical library with floating books and glowing orbs",
-                "unicorn in moonlit glade, silver horn gleaming"
-            ],
-            
-            "space": [
-                "nebula with swirling colors of purple, blue, and pink",
-                "alien planet with multiple moons, exotic landscape",
-                "space station orbiting ringed planet, stars in background",
-                "galaxy spiral with billions of stars, cosmic dust clouds",
-                "astronaut floating in space, Earth visible in distance",
-                "binary star system with twin suns, planetary rings",
-                "asteroid field with mining ships, distant sun",
-                "black hole warping space-time, gravitational lensing effect",
-                "alien civilization with crystalline structures, bioluminescence",
-                "comet with brilliant tail streaking across starfield"
-            ],
-            
-            "abstract": [
-                "fluid dynamics with liquid metal, chrome reflections",
-                "geometric patterns in vibrant neon colors, 80s aesthetic",
-                "fractal art with infinite recursive patterns, mathematical beauty",
-                "color explosion with paint splatters, dynamic movement",
-                "minimalist design with simple shapes, negative space",
-                "optical illusion with impossible geometry, mind-bending",
-                "digital glitch art with corrupted pixels, cyberpunk vibes",
-                "flowing fabric in wind, graceful curves and folds",
-                "light trails through darkness, long exposure effect",
-                "crystalline structures with prismatic light refraction"
-            ],
-            
-            "animal": [
-                "majestic lion with flowing mane, golden savanna backdrop",
-                "wise owl perched on branch, large amber eyes, moonlight",
-                "playful dolphins jumping through ocean waves, splash",
-                "colorful tropical parrot in rainforest canopy, vibrant plumage",
-                "arctic fox in winter landscape, white fur, snow falling",
-                "butterfly with intricate wing patterns, flower garden",
-                "whale breaching ocean surface, dramatic water spray",
-                "tiger stalking through jungle, dappled sunlight, stealth",
-                "eagle soaring over mountain range, wings spread wide",
-                "panda eating bamboo in peaceful grove, black and white"
-            ],
-            
-            "cityscape": [
-                "futuristic cyberpunk city at night, neon lights, rain-slicked streets",
-                "New York skyline at golden hour, urban photography, iconic buildings",
-                "Tokyo street scene with cherry blossoms, urban spring, modern Japan",
-                "Venice canals at sunset, romantic atmosphere, historic architecture",
-                "Dubai skyline with modern skyscrapers, desert metropolis",
-                "London bridge in fog, atmospheric mood, classic British architecture",
-                "San Francisco Golden Gate Bridge, iconic landmark, coastal city",
-                "Paris rooftops at twilight, romantic city, European architecture",
-                "Hong Kong harbor at night, city lights reflection, Asian metropolis",
-                "Chicago architecture along river, urban canyon, modern design"
-            ],
-            
-            "seasonal": [
-                "winter wonderland with snow-covered trees, Christmas atmosphere",
-                "spring garden with blooming flowers, fresh growth, renewal theme",
-                "summer beach sunset, warm colors, vacation vibes, tropical paradise",
-                "autumn maple trees with red leaves, fall colors, seasonal transition",
-                "winter mountain cabin with smoke from chimney, cozy atmosphere",
-                "spring rain on flower petals, fresh and clean, nature's renewal",
-                "summer thunderstorm over prairie, dramatic weather, power of nature",
-                "autumn harvest scene with pumpkins, thanksgiving theme, rural setting",
-                "winter aurora over frozen lake, ice formations, arctic beauty",
-                "spring waterfall with melting snow, seasonal flow, mountain runoff"
-            ]
-        }
-        
-        self.quality_modifiers = [
-            "8K ultra high resolution",
-            "professional photography", 
-            "award winning photograph",
-            "masterpiece quality",
-            "highly detailed",
-            "cinematic composition",
-            "photorealistic",
-            "studio lighting",
-            "sharp focus",
-            "vivid colors"
-        ]
-        
-        self.style_modifiers = [
-            "dramatic lighting",
-            "golden hour",
-            "soft ambient light",
-            "volumetric lighting",
-            "natural lighting",
-            "perfect lighting",
-            "moody atmosphere",
-            "ethereal glow",
-            "rim lighting",
-            "chiaroscuro"
-        ]
+        # Weighted "all" sampler, kept across executions for the recency penalty
+        self._category_sampler = None
+        self._category_sampler_key = None
 
     @classmethod
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "category": (["all", "landscape", "nature", "fantasy", "space", "abstract", "animal", "cityscape", "seasonal"], {
+                "category": (["all", *list_vocabulary_categories()], {
                     "default": "all"
                 }),
                 "add_quality_modifiers": ("BOOLEAN", {
@@ -157,6 +1256,30 @@ class RandomPromptGenerator:
                     "min": 0,
                     "max": 999999
                 })
+            },
+            "optional": {
+                "vocabulary": (["builtin", *list_vocabulary_packs()], {
+                    "default": "builtin"
+                }),
+                "template": ("STRING", {
+                    "default": "",
+                    "multiline": True
+                }),
+                "no_repeat": ("BOOLEAN", {
+                    "default": False
+                }),
+                "rng_stream": (list(RNG_STREAMS), {
+                    "default": "legacy"
+                }),
+                "category_weights": ("STRING", {
+                    "default": ""
+                }),
+                "recency_penalty": ("FLOAT", {
+                    "default": 0.0,
+                    "min": 0.0,
+                    "max": 0.95,
+                    "step": 0.05
+                })
             }
         }
 
@@ -165,38 +1288,107 @@ class RandomPromptGenerator:
     FUNCTION = "generate_random_prompt"
     CATEGORY = "text"
 
-    def generate_random_prompt(self, category, add_quality_modifiers, seed):
-        # Set random seed for reproducible results
-        random.seed(seed)
-        
-        # Select category
+    @classmethod
+    def IS_CHANGED(cls, no_repeat=False, **inputs):
+        # Output is a pure function of the inputs (and the vocabulary contents),
+        # so identical re-queued inputs let ComfyUI reuse this node's output and
+        # every cached downstream result such as CLIPTextEncode. no_repeat
+        # and the recency penalty depend on earlier executions, so they must run
+        # every time.
+        if no_repeat or (inputs.get("recency_penalty", 0) > 0 and inputs.get("category") == "all"):
+            return float("nan")
+        vocab = get_vocabulary(inputs.get("vocabulary", "builtin"))
+        return json.dumps([vocab.stamp, sorted(inputs.items())], default=str)
+
+    def generate_random_prompt(self, category, add_quality_modifiers, seed, vocabulary="builtin", template="", no_repeat=False, rng_stream="legacy", category_weights="", recency_penalty=0.0):
+        if type(seed) is int and vocabulary == "builtin" and rng_stream == "legacy" and \
+                not (template or no_repeat or category_weights or recency_penalty):
+            prompt = _builtin_legacy_prompt(category, add_quality_modifiers, seed)
+            if prompt is not None:
+                return (prompt,)
+        vocab = get_vocabulary(vocabulary)
+        template = template.strip()
+        category_sampler = None
         if category == "all":
-            # Pick a random category
-            available_categories = list(self.prompt_categories.keys())
-            selected_category = random.choice(available_categories)
-        else:
-            selected_category = category
-            
-        # Get base prompt from selected category
-        base_prompts = self.prompt_categories[selected_category]
-        base_prompt = random.choice(base_prompts)
+            category_sampler = self._get_category_sampler(vocab, category_weights.strip(), recency_penalty)
+        stateful = no_repeat or (category_sampler is not None and category_sampler.recency_penalty > 0)
         
-        # Add quality and style modifiers if requested
-        if add_quality_modifiers:
-            quality_mod = random.choice(self.quality_modifiers)
-            style_mod = random.choice(self.style_modifiers)
-            
-            final_prompt = f"{base_prompt}, {quality_mod}, {style_mod}"
-        else:
-            final_prompt = base_prompt
+        cache_key = None
+        if not stateful:
+            cache_key = (category, bool(add_quality_modifiers), seed, vocabulary, vocab.stamp, template, rng_stream, category_weights.strip())
+            cached = _cached_prompt(cache_key)
+            if cached is not None:
+                return (cached,)
+        
+        # Private RNG stream for this call so concurrent executions never share
+        # (or disturb) the process-global `random` state.
+        rng = make_prompt_rng(seed, rng_stream)
+        final_prompt = self._draw_prompt(rng, vocab, vocabulary, category, add_quality_modifiers, template, category_sampler)
+        
+        # Redraw until the prompt has not been emitted before
+        if no_repeat:
+            history = get_prompt_history(vocabulary, category, add_quality_modifiers, template)
+            attempts = 1
+            while not history.claim(final_prompt) and attempts < NO_REPEAT_MAX_ATTEMPTS:
+                if attempts == 1:
+                    rng = history.redraw_rng(seed)
+                final_prompt = self._draw_prompt(rng, vocab, vocabulary, category, add_quality_modifiers, template, category_sampler)
+                attempts += 1
+        elif cache_key is not None:
+            _store_prompt(cache_key, final_prompt)
             
         return (final_prompt,)
 
+    def _draw_prompt(self, rng, vocab, vocabulary, category, add_quality_modifiers, template, category_sampler=None):
+        return draw_prompt_components(rng, vocab, vocabulary, category, add_quality_modifiers, template, category_sampler)["prompt"]
+
+    def _get_category_sampler(self, vocab, category_weights, recency_penalty):
+        # Rebuilt only when the weights, penalty or vocabulary change
+        key = (vocab.stamp, vocab.category_names, category_weights, recency_penalty)
+        if key != self._category_sampler_key:
+            self._category_sampler = build_category_sampler(vocab, category_weights, recency_penalty)
+            self._category_sampler_key = key
+        return self._category_sampler
+
+
+class RandomPromptBatchGenerator(RandomPromptGenerator):
+    """
+    Batch variant of RandomPromptGenerator that emits `count` prompts per execution.
+
+    Prompt i of a batch is exactly what RandomPromptGenerator produces for
+    seed + i, so a batch starting at seed S reproduces single-node seeds S..S+count-1.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        input_types = super().INPUT_TYPES()
+        input_types["required"]["count"] = ("INT", {
+            "default": 8,
+            "min": 1,
+            "max": 1024
+        })
+        return input_types
+
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("prompts",)
+    OUTPUT_IS_LIST = (True,)
+    FUNCTION = "generate_random_prompts"
+    CATEGORY = "text"
+
+    def generate_random_prompts(self, category, add_quality_modifiers, seed, count, **options):
+        prompts = [
+            self.generate_random_prompt(category, add_quality_modifiers, seed + offset, **options)[0]
+            for offset in range(count)
+        ]
+        return (prompts,)
+
 # ComfyUI Node Registration
 NODE_CLASS_MAPPINGS = {
-    "RandomPromptGenerator": RandomPromptGenerator
+    "RandomPromptGenerator": RandomPromptGenerator,
+    "RandomPromptBatchGenerator": RandomPromptBatchGenerator
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
-    "RandomPromptGenerator": "Random Prompt Generator"
+    "RandomPromptGenerator": "Random Prompt Generator",
+    "RandomPromptBatchGenerator": "Random Prompt Generator (Batch)"
 }
@@ -0,0 +1,32 @@
+# Seed compatibility of the shared RandomPromptGenerator
+# Usage: python -m pytest utils/comfyui/tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+import random_prompt_generator_node as node
+from benchmark_prompt_node import LegacyRandomPromptGenerator, check_same_prompts
+
+
+def test_legacy_seeds_keep_their_prompts():
+    check_same_prompts(range(1000))
+
+
+@pytest.mark.parametrize("category", ["all", *node.CATEGORY_NAMES])
+@pytest.mark.parametrize("add_quality_modifiers", [True, False])
+def test_every_category_matches_legacy(category, add_quality_modifiers):
+    legacy, shared = LegacyRandomPromptGenerator(), node.RandomPromptGenerator()
+    for seed in (0, 1, 999999, 2 ** 40, -7):
+        expected = legacy.generate_random_prompt(category, add_quality_modifiers, seed)
+        assert shared.generate_random_prompt(category, add_quality_modifiers, seed) == expected
+
+
+def test_prompt_components_match_the_node():
+    shared = node.RandomPromptGenerator()
+    for seed in range(200):
+        expected = shared.generate_random_prompt("all", True, seed)[0]
+        assert node.prompt_components(seed)["prompt"] == expected
@@ -0,0 +1,36 @@
+# Compiler output against the saved workflow fixtures
+# Usage: python -m pytest utils/comfyui/tests
+
+import json
+import os
+import sys
+
+COMFYUI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, COMFYUI_DIR)
+
+import workflow_compiler
+
+WORKFLOW = os.path.join(COMFYUI_DIR, "fixtures", "saved-random-prompt-workflow.json")
+API_PROMPT = os.path.join(COMFYUI_DIR, "fixtures", "saved-random-prompt-workflow.api.json")
+
+
+def test_fixture_compiles_to_its_api_prompt():
+    assert workflow_compiler.main([WORKFLOW, "--check", API_PROMPT]) == 0
+
+
+def test_check_fails_on_a_different_prompt(tmp_path, capsys):
+    with open(API_PROMPT, encoding="utf-8") as handle:
+        expected = json.load(handle)
+    next(iter(expected.values()))["inputs"]["changed"] = True
+    changed = tmp_path / "changed.api.json"
+    changed.write_text(json.dumps(expected), encoding="utf-8")
+    assert workflow_compiler.main([WORKFLOW, "--check", str(changed)]) == 1
+    assert "does not compile to" in capsys.readouterr().err
+
+
+def test_seed_widgets_are_per_job_values():
+    compiled = workflow_compiler.compile_workflow(WORKFLOW, keep_previews=False, cache_dir=None)
+    assert {"prompt_seed", "noise_seed"} <= set(compiled.mutable)
+    # The editor's control_after_generate widget is UI state, not a node input
+    inputs = [value for api_node in compiled.prompt.values() for value in api_node["inputs"].values()]
+    assert not workflow_compiler.CONTROL_AFTER_GENERATE & {value for value in inputs if isinstance(value, str)}
@@ -0,0 +1,300 @@
+# Compiles UI-format ComfyUI workflows into cached, minimal API prompts
+# Usage: python workflow_compiler.py random-prompt-workflow.json [--keep-previews]
+#        python workflow_compiler.py fixtures/saved-random-prompt-workflow.json --check fixtures/saved-random-prompt-workflow.api.json
+#
+# A UI-format workflow carries editor state (positions, sizes, groups, link
+# arrays) that the server never needs. compile_workflow() converts it once to
+# the API format, drops editor-only nodes and anything that no output node
+# depends on, orders the nodes topologically (rejecting cycles) and caches the
+# result keyed on the SHA-256 of the file, both in memory and on disk under
+# .workflow_cache/.
+#
+# The compiled prompt is also pre-serialized: the JSON is split around the
+# few values that change per job (prompt seed, category, sampler seed,
+# positive text), so building a job is a join of cached byte strings with
+# json.dumps() of just those values instead of re-encoding the whole graph.
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import uuid
+
+import random_prompt_generator_node as node
+
+# Bump when the compiled form changes so stale cache files are ignored
+COMPILER_VERSION = 2
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".workflow_cache")
+
+# Widget order of each node type as saved in UI-format workflows. The editor
+# adds a "control after generate" widget after every INT input named seed or
+# noise_seed; its value is UI state, not a node input, and is skipped when
+# present (hand-written workflows often leave it out).
+WIDGET_INPUTS = {
+    "CheckpointLoaderSimple": ("ckpt_name",),
+    "CLIPTextEncode": ("text",),
+    "EmptyLatentImage": ("width", "height", "batch_size"),
+    "KSampler": ("seed", "steps", "cfg", "sampler_name", "scheduler", "denoise"),
+    "VAEDecode": (),
+    "SaveImage": ("filename_prefix",),
+    "PreviewImage": (),
+    "RandomPromptGenerator": tuple(
+        name
+        for section in ("required", "optional")
+        for name in node.RandomPromptGenerator.INPUT_TYPES().get(section, {})
+    ),
+}
+
+SEED_WIDGETS = {"seed", "noise_seed"}
+CONTROL_AFTER_GENERATE = {"fixed", "increment", "decrement", "randomize"}
+
+# Nodes that only exist in the editor and are never sent to the server
+UI_ONLY_NODES = {"Note", "MarkdownNote", "Reroute", "PrimitiveNode"}
+OUTPUT_NODES = {"SaveImage", "PreviewImage"}
+_MUTED_MODE = 2
+
+
+def workflow_to_prompt(workflow, keep_previews=True):
+    """Convert a UI-format workflow dict into a minimal, topologically sorted API prompt."""
+    links = {link[0]: (str(link[1]), link[2]) for link in workflow.get("links", [])}
+    prompt = {}
+    for ui_node in workflow["nodes"]:
+        class_type = ui_node["type"]
+        if class_type in UI_ONLY_NODES or ui_node.get("mode") == _MUTED_MODE:
+            continue
+        if class_type == "PreviewImage" and not keep_previews:
+            continue
+        if class_type not in WIDGET_INPUTS:
+            raise ValueError(f"Don't know the widget layout of node type '{class_type}'")
+
+        inputs = {}
+        values = ui_node.get("widgets_values") or []
+        position = 0
+        for name in WIDGET_INPUTS[class_type]:
+            if position >= len(values):
+                break
+            inputs[name] = values[position]
+            position += 1
+            if name in SEED_WIDGETS and position < len(values) and \
+                    isinstance(values[position], str) and values[position] in CONTROL_AFTER_GENERATE:
+                position += 1
+        # Linked inputs win over widget values (e.g. a text widget converted to an input)
+        for slot in ui_node.get("inputs") or []:
+            if slot.get("link") is not None:
+                source_id, source_slot = links[slot["link"]]
+                inputs[slot["name"]] = [source_id, source_slot]
+
+        prompt[str(ui_node["id"])] = {"class_type": class_type, "inputs": inputs}
+    return _prune_and_sort(prompt)
+
+
+def _upstream(api_node):
+    return [value[0] for value in api_node["inputs"].values() if isinstance(value, list) and len(value) == 2]
+
+
+def _prune_and_sort(prompt):
+    # Keep only nodes some output depends on
+    needed = set()
+    stack = [node_id for node_id, api_node in prompt.items() if api_node["class_type"] in OUTPUT_NODES]
+    if not stack:
+        raise ValueError("Workflow has no output nodes")
+    while stack:
+        node_id = stack.pop()
+        if node_id in needed:
+            continue
+        if node_id not in prompt:
+            raise ValueError(f"Workflow links to missing or muted node {node_id}")
+        needed.add(node_id)
+        stack.extend(_upstream(prompt[node_id]))
+
+    # Kahn's algorithm, ties broken by numeric id so output is stable
+    def order_key(node_id):
+        return (int(node_id), node_id) if node_id.isdigit() else (float("inf"), node_id)
+
+    dependencies = {node_id: set(_upstream(prompt[node_id])) for node_id in needed}
+    ordered = []
+    ready = sorted((node_id for node_id, deps in dependencies.items() if not deps), key=order_key)
+    while ready:
+        node_id = ready.pop(0)
+        ordered.append(node_id)
+        released = []
+        for other, deps in dependencies.items():
+            if node_id in deps:
+                deps.discard(node_id)
+                if not deps:
+                    released.append(other)
+        ready = sorted(ready + released, key=order_key)
+    if len(ordered) != len(needed):
+        raise ValueError("Workflow graph contains a cycle")
+    return {node_id: prompt[node_id] for node_id in ordered}
+
+
+def find_mutable_inputs(prompt):
+    """Map each per-job value name to the (node_id, input) pairs it sets."""
+    mutable = {}
+
+    def add(name, node_id, input_name):
+        mutable.setdefault(name, []).append((node_id, input_name))
+
+    for node_id, api_node in prompt.items():
+        if api_node["class_type"] == "RandomPromptGenerator":
+            for name in ("seed", "category", "add_quality_modifiers"):
+                if name in api_node["inputs"]:
+                    add("prompt_seed" if name == "seed" else name, node_id, name)
+        elif api_node["class_type"] == "KSampler":
+            add("noise_seed", node_id, "seed")
+            positive = api_node["inputs"].get("positive")
+            if isinstance(positive, list) and positive[0] in prompt:
+                text = prompt[positive[0]]["inputs"].get("text")
+                if not isinstance(text, list):
+                    add("positive_text", positive[0], "text")
+    return mutable
+
+
+class CompiledWorkflow:
+    """An API prompt plus pre-encoded JSON segments around its per-job values."""
+
+    def __init__(self, prompt, source_hash):
+        self.prompt = prompt
+        self.source_hash = source_hash
+        self.mutable = find_mutable_inputs(prompt)
+        self.defaults = {
+            name: prompt[targets[0][0]]["inputs"].get(targets[0][1])
+            for name, targets in self.mutable.items()
+        }
+        self._segments, self._slots = self._split_template()
+
+    def _split_template(self):
+        # Serialize once with unique markers in the mutable slots, then split
+        # the JSON text on them.
+        token = uuid.uuid4().hex
+        template = {node_id: {"class_type": api_node["class_type"], "inputs": dict(api_node["inputs"])}
+                    for node_id, api_node in self.prompt.items()}
+        markers = {}
+        for name, targets in self.mutable.items():
+            for node_id, input_name in targets:
+                marker = f"{token}:{len(markers)}"
+                markers[marker] = name
+                template[node_id]["inputs"][input_name] = marker
+
+        text = json.dumps(template)
+        quoted = {json.dumps(marker): name for marker, name in markers.items()}
+        segments, slots = [], []
+        position = 0
+        for start, marker in sorted((text.index(marker), marker) for marker in quoted):
+            segments.append(text[position:start].encode("utf-8"))
+            slots.append(quoted[marker])
+            position = start + len(marker)
+        segments.append(text[position:].encode("utf-8"))
+        return segments, slots
+
+    def render(self, **values):
+        """Return the API prompt dict with `values` applied (unchanged nodes are shared)."""
+        unknown = set(values) - set(self.mutable)
+        if unknown:
+            raise KeyError(f"Workflow has no per-job value(s): {', '.join(sorted(unknown))}")
+        prompt = dict(self.prompt)
+        for name, value in values.items():
+            for node_id, input_name in self.mutable[name]:
+                if prompt[node_id] is self.prompt[node_id]:
+                    prompt[node_id] = {"class_type": prompt[node_id]["class_type"],
+                                       "inputs": dict(prompt[node_id]["inputs"])}
+                prompt[node_id]["inputs"][input_name] = value
+        return prompt
+
+    def encode(self, client_id=None, **values):
+        """Return the UTF-8 body of a POST /prompt request with `values` applied."""
+        unknown = set(values) - set(self.mutable)
+        if unknown:
+            raise KeyError(f"Workflow has no per-job value(s): {', '.join(sorted(unknown))}")
+        encoded = {
+            name: json.dumps(values.get(name, self.defaults[name])).encode("utf-8")
+            for name in self.mutable
+        }
+        parts = [b'{"prompt": ']
+        for segment, name in zip(self._segments, self._slots):
+            parts.append(segment)
+            parts.append(encoded[name])
+        parts.append(self._segments[-1])
+        if client_id is not None:
+            parts.append(b', "client_id": ' + json.dumps(client_id).encode("utf-8"))
+        parts.append(b"}")
+        return b"".join(parts)
+
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def compile_workflow(path, keep_previews=True, cache_dir=CACHE_DIR):
+    """Return the CompiledWorkflow for a UI-format workflow file, cached by content hash."""
+    with open(path, "rb") as handle:
+        raw = handle.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    key = (digest, keep_previews)
+
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+    if compiled is not None:
+        return compiled
+
+    cache_path = None
+    prompt = None
+    if cache_dir:
+        suffix = "" if keep_previews else "-headless"
+        cache_path = os.path.join(cache_dir, f"{digest}{suffix}.v{COMPILER_VERSION}.json")
+        try:
+            with open(cache_path, encoding="utf-8") as handle:
+                prompt = json.load(handle)
+        except (OSError, ValueError):
+            prompt = None
+
+    if prompt is None:
+        prompt = workflow_to_prompt(json.loads(raw), keep_previews)
+        if cache_path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                temp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as handle:
+                    json.dump(prompt, handle)
+                os.replace(temp_path, cache_path)
+            except OSError:
+                # The cache is only an optimization; a read-only checkout still works
+                pass
+
+    compiled = CompiledWorkflow(prompt, digest)
+    with _compiled_lock:
+        _compiled[key] = compiled
+    return compiled
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile a UI-format workflow to an API prompt")
+    parser.add_argument("workflow", help="UI-format workflow file")
+    parser.add_argument("--keep-previews", action="store_true", help="Keep PreviewImage nodes")
+    parser.add_argument("--check", default=None, metavar="API_JSON",
+                        help="Exit 1 unless the compiled prompt equals this API-format prompt")
+    args = parser.parse_args(argv)
+
+    compiled = compile_workflow(args.workflow, args.keep_previews)
+    if args.check:
+        with open(args.check, encoding="utf-8") as handle:
+            expected = json.load(handle)
+        if compiled.prompt != expected:
+            print(f"{args.workflow} does not compile to {args.check}:", file=sys.stderr)
+            print(json.dumps(compiled.prompt, indent=2), file=sys.stderr)
+            return 1
+        print(f"{args.workflow} compiles to {args.check}")
+        return 0
+    with open(args.workflow, "rb") as handle:
+        ui_size = len(handle.read())
+    print(json.dumps(compiled.prompt, indent=2))
+    print(f"UI workflow {ui_size} bytes -> API prompt {len(compiled.encode())} bytes; "
+          f"per-job values: {', '.join(compiled.mutable) or 'none'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
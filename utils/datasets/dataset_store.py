@@ -0,0 +1,297 @@
+# Canonical store for the site's datasets: one SQLite file of typed tables
+# Usage: python utils/datasets/dataset_store.py                      (list datasets)
+#        python utils/datasets/dataset_store.py --show resource_management
+#        python utils/datasets/dataset_store.py --import-csv apps/monster_maker/dnd_cr_chart_data.csv
+#        python utils/datasets/dataset_store.py --export-csv        (refresh the published CSVs)
+#        python utils/datasets/dataset_store.py --check-csv         (verify they round-trip)
+#
+# Data scripts call write_dataset(name, df) instead of DataFrame.to_csv(), and
+# chart/page builders call read_dataset(name) instead of pd.read_csv(). Each
+# dataset is a real table whose columns keep their SQL type (INTEGER, REAL,
+# TEXT), and the _datasets table records the pandas dtype of every column so
+# ints, floats, nullable ints, booleans and categoricals come back exactly as
+# they were written instead of being re-guessed from text.
+#
+# _datasets also holds a SHA-256 of each dataset's content, so the chart
+# build cache can key a chart on the datasets it reads rather than on the
+# whole file. Writing a dataset whose content and source are unchanged is a
+# no-op, and nothing time-dependent is stored, so re-running data scripts
+# leaves the committed datasets.sqlite byte-identical. Only data scripts
+# write; chart scripts read. The CSVs next to the scripts are kept as
+# downloadable copies: write_dataset() rewrites <name>.csv in the script's
+# directory whenever its content changes, and --export-csv rewrites them all.
+#
+# Datasets listed in schemas.py are parsed on write: "5-10" ranges, rates such
+# as "-0.3/colonist/hour" and "N/A" thresholds are stored as numeric columns.
+# Exports write only the source columns, as the scripts wrote them, and
+# --check-csv verifies that importing each CSV and exporting it again
+# reproduces the file byte for byte.
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+
+from schemas import apply_schema, source_view
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datasets.sqlite")
+
+METADATA_SCHEMA = """
+CREATE TABLE IF NOT EXISTS _datasets (
+    name TEXT PRIMARY KEY,
+    columns TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    source TEXT,
+    rows INTEGER NOT NULL
+)
+"""
+
+
+class DatasetError(KeyError):
+    pass
+
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _column_meta(name, series):
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        meta = {"sql": "TEXT", "dtype": "category", "categories": dtype.categories.tolist(), "ordered": bool(dtype.ordered)}
+        if pd.api.types.is_numeric_dtype(dtype.categories.dtype):
+            meta["sql"] = "REAL" if pd.api.types.is_float_dtype(dtype.categories.dtype) else "INTEGER"
+    elif pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        meta = {"sql": "INTEGER", "dtype": str(dtype)}
+    elif pd.api.types.is_float_dtype(dtype):
+        meta = {"sql": "REAL", "dtype": str(dtype)}
+    elif pd.api.types.is_object_dtype(dtype):
+        meta = {"sql": "TEXT", "dtype": "object"}
+    elif pd.api.types.is_string_dtype(dtype):
+        meta = {"sql": "TEXT", "dtype": str(dtype)}
+    else:
+        raise TypeError(f"Column '{name}' has unsupported dtype {dtype}")
+    return {"name": name, **meta}
+
+
+def _python_rows(frame):
+    # object dtype boxes numpy scalars as Python ints/floats/str; NA becomes None
+    values = frame.astype(object).where(frame.notna(), None)
+    return [tuple(row) for row in values.itertuples(index=False, name=None)]
+
+
+def _restore(frame, columns):
+    restored = {}
+    for meta in columns:
+        series = frame[meta["name"]]
+        if meta["dtype"] == "category":
+            restored[meta["name"]] = pd.Categorical(series, categories=meta["categories"], ordered=meta["ordered"])
+        elif meta["dtype"] == "object":
+            restored[meta["name"]] = series.astype(object).where(series.notna(), None)
+        else:
+            restored[meta["name"]] = series.astype(meta["dtype"])
+    return pd.DataFrame(restored, columns=[meta["name"] for meta in columns])
+
+
+class DatasetStore:
+    """Named, typed DataFrames in one SQLite file."""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(METADATA_SCHEMA)
+
+    def write(self, name, frame, source=None):
+        """Replace dataset `name` with `frame`; returns its content hash."""
+        if name.startswith("_"):
+            raise ValueError("Dataset names starting with '_' are reserved")
+        frame = apply_schema(name, frame)
+        columns = [_column_meta(str(column), frame[column]) for column in frame.columns]
+        rows = _python_rows(frame)
+        digest = hashlib.sha256(json.dumps([columns, rows], default=str).encode("utf-8")).hexdigest()
+        # Re-running a data script must not touch the (versioned) store file
+        unchanged = self.connection.execute(
+            "SELECT 1 FROM _datasets WHERE name = ? AND sha256 = ? AND source IS ?", (name, digest, source)
+        ).fetchone()
+        if unchanged:
+            return digest
+
+        with self.connection:
+            self.connection.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+            self.connection.execute(
+                f"CREATE TABLE {_quote(name)} ("
+                + ", ".join(f"{_quote(meta['name'])} {meta['sql']}" for meta in columns) + ")"
+            )
+            self.connection.executemany(
+                f"INSERT INTO {_quote(name)} VALUES ({', '.join('?' * len(columns))})", rows
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO _datasets (name, columns, sha256, source, rows) VALUES (?, ?, ?, ?, ?)",
+                (name, json.dumps(columns), digest, source, len(rows))
+            )
+        return digest
+
+    def _meta(self, name):
+        row = self.connection.execute(
+            "SELECT columns, sha256, source, rows FROM _datasets WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            raise DatasetError(f"No dataset named '{name}' in {self.path}")
+        return {"columns": json.loads(row[0]), "sha256": row[1], "source": row[2], "rows": row[3]}
+
+    def read(self, name, columns=None):
+        """Return dataset `name` (optionally only `columns`) with its original dtypes."""
+        meta = self._meta(name)["columns"]
+        if columns is not None:
+            by_name = {column["name"]: column for column in meta}
+            missing = [column for column in columns if column not in by_name]
+            if missing:
+                raise DatasetError(f"Dataset '{name}' has no column(s) {', '.join(missing)}")
+            meta = [by_name[column] for column in columns]
+        frame = pd.read_sql_query(
+            f"SELECT {', '.join(_quote(column['name']) for column in meta)} FROM {_quote(name)}", self.connection
+        )
+        return _restore(frame, meta)
+
+    def digest(self, name):
+        return self._meta(name)["sha256"]
+
+    def info(self, name):
+        return self._meta(name)
+
+    def names(self):
+        return [row[0] for row in self.connection.execute("SELECT name FROM _datasets ORDER BY name")]
+
+    def __contains__(self, name):
+        return self.connection.execute("SELECT 1 FROM _datasets WHERE name = ?", (name,)).fetchone() is not None
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def _caller_source():
+    # Repo-relative directory of the running script, used by --export-csv
+    script = os.path.abspath(sys.argv[0]) if sys.argv and sys.argv[0] else None
+    if not script or not script.startswith(REPO_ROOT + os.sep):
+        return None
+    return os.path.relpath(os.path.dirname(script), REPO_ROOT).replace(os.sep, "/")
+
+
+def write_dataset(name, frame, source=None, path=STORE_PATH):
+    """Store `frame` as dataset `name` and refresh its published CSV."""
+    with DatasetStore(path) as store:
+        digest = store.write(name, frame, source or _caller_source())
+        export_csv(store, name)
+        return digest
+
+
+def read_dataset(name, columns=None, path=STORE_PATH):
+    with DatasetStore(path) as store:
+        return store.read(name, columns)
+
+
+def to_csv_text(name, frame):
+    """Dataset `name` as its published CSV: source columns only, NA as the original text."""
+    return source_view(name, frame).to_csv(index=False, lineterminator="\n")
+
+
+def _csv_path(store, name):
+    source = store.info(name)["source"]
+    return None if source is None else os.path.join(REPO_ROOT, source, f"{name}.csv")
+
+
+def export_csv(store, name):
+    """Write dataset `name` to <source dir>/<name>.csv if that changes the file; returns the path or None."""
+    csv_path = _csv_path(store, name)
+    if csv_path is None:
+        return None
+    text = to_csv_text(name, store.read(name))
+    try:
+        with open(csv_path, encoding="utf-8", newline="") as handle:
+            if handle.read() == text:
+                return csv_path
+    except FileNotFoundError:
+        pass
+    with open(csv_path, "w", encoding="utf-8", newline="") as handle:
+        handle.write(text)
+    return csv_path
+
+
+def check_csv(store):
+    """Names of datasets whose CSV does not match the store or does not survive import + export."""
+    mismatched = []
+    for name in store.names():
+        csv_path = _csv_path(store, name)
+        if csv_path is None or not os.path.exists(csv_path):
+            continue
+        with open(csv_path, encoding="utf-8", newline="") as handle:
+            published = handle.read()
+        with DatasetStore(":memory:") as scratch:
+            scratch.write(name, pd.read_csv(csv_path))
+            round_trip = to_csv_text(name, scratch.read(name))
+        if to_csv_text(name, store.read(name)) != published or round_trip != published:
+            mismatched.append(name)
+    return mismatched
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List, show, import or export site datasets")
+    parser.add_argument("--store", default=STORE_PATH, help="SQLite dataset store")
+    parser.add_argument("--show", default=None, help="Print one dataset")
+    parser.add_argument("--import-csv", nargs="+", default=None, metavar="CSV",
+                        help="Store CSV files as datasets named after the file")
+    parser.add_argument("--export-csv", action="store_true",
+                        help="Write every dataset back to <source dir>/<name>.csv")
+    parser.add_argument("--check-csv", action="store_true",
+                        help="Exit 1 if a published CSV differs from the store or does not round-trip")
+    args = parser.parse_args(argv)
+
+    with DatasetStore(args.store) as store:
+        if args.import_csv:
+            for csv_path in args.import_csv:
+                name = os.path.splitext(os.path.basename(csv_path))[0]
+                source = os.path.relpath(os.path.dirname(os.path.abspath(csv_path)), REPO_ROOT).replace(os.sep, "/")
+                store.write(name, pd.read_csv(csv_path), source)
+                print(f"Imported {csv_path} as '{name}'")
+        elif args.export_csv:
+            for name in store.names():
+                csv_path = export_csv(store, name)
+                if csv_path is None:
+                    print(f"Skipping '{name}': no source directory recorded", file=sys.stderr)
+                    continue
+                print(f"Wrote {os.path.relpath(csv_path, REPO_ROOT)}")
+        elif args.check_csv:
+            mismatched = check_csv(store)
+            for name in mismatched:
+                print(f"{name}: {os.path.relpath(_csv_path(store, name), REPO_ROOT)} does not round-trip", file=sys.stderr)
+            if mismatched:
+                return 1
+            print(f"All published CSVs match the store ({len(store.names())} datasets)")
+        elif args.show:
+            frame = store.read(args.show)
+            print(frame.to_string(index=False))
+            print()
+            print(frame.dtypes.to_string())
+        else:
+            print(f"{'dataset':<36}{'rows':>6}  {'source':<24}columns")
+            for name in store.names():
+                info = store.info(name)
+                types = ", ".join(f"{column['name']}:{column['dtype']}" for column in info["columns"])
+                print(f"{name:<36}{info['rows']:>6}  {info['source'] or '-':<24}{types}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+# Typed schemas for the GDD datasets, applied when a dataset is written
+#
+# The design tables are written for people: "5-10" population ranges,
+# "-0.3/colonist/hour" consumption rates, thresholds that mix numbers and
+# "N/A". The parsers below turn such columns into numeric ones with
+# vectorized pandas string operations (no per-row Python loops): nullable
+# Int64 for counts, Float64 for rates, boolean flags and categoricals for
+# repeated labels. Code that simulates or charts the data reads the numeric
+# columns; the descriptive text stays alongside wherever it says more than
+# the numbers do.
+#
+# SCHEMAS maps a dataset name to {column: parser}. DatasetStore.write()
+# runs apply_schema(), so data scripts keep building plain DataFrames.
+# Parsers skip columns that are missing and reparse their source text, so
+# writing back a dataset that was read from the store is a no-op.
+# source_view() undoes the schema for --export-csv, so the published CSVs
+# stay exactly what the data scripts wrote.
+
+import pandas as pd
+
+NA_TOKENS = ("", "N/A", "n/a", "NA", "-", "None")
+# Written back for NA when a parsed column is exported
+NA_TEXT = "N/A"
+
+_RANGE = r"^\s*(?P<min>\d+)\s*(?:-\s*(?P<max>\d+)|(?P<open>\+))?\s*$"
+_RATE = r"^\s*(?P<rate>[+-]?\d+(?:\.\d+)?)\s*/\s*(?P<colonist>colonist\s*/\s*)?(?P<unit>[a-z]+)\s*$"
+_YIELD = r"^(?:Produces|Generates|Stores)\s+(?P<amount>\d+(?:\.\d+)?)\s+(?P<resource>[a-z]+)(?:\s+units)?(?:/(?P<unit>[a-z]+))?"
+_DURATION = r"^\s*(?P<amount>\d+)\s*(?P<unit>second|minute|hour)s?\s*$"
+_BRACKETED = r"\((?P<value>\d+)\)"
+_SECONDS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+def _derived(column, suffix):
+    # Follow the dataset's naming: "Party_Level_Min" vs "Population Slots Min"
+    separator = "_" if "_" in column and " " not in column else " "
+    return f"{column}{separator}{suffix}"
+
+
+def _text(series):
+    return series.astype("string").str.strip()
+
+
+def parse_range(series):
+    """"5-10" / "20+" / "7" -> DataFrame of Int64 "min" and "max" (open ends and "Any" are NA)."""
+    parts = _text(series).str.extract(_RANGE)
+    minimum = pd.to_numeric(parts["min"]).astype("Int64")
+    maximum = pd.to_numeric(parts["max"]).astype("Int64")
+    # A single number is a range of one; "20+" has no upper bound
+    maximum = maximum.mask(parts["max"].isna() & parts["open"].isna(), minimum)
+    return pd.DataFrame({"min": minimum, "max": maximum}, index=series.index)
+
+
+def parse_rate(series):
+    """
+    "-0.3/colonist/hour" -> Float64 "rate", boolean "per_colonist" and
+    categorical "unit"; text that is not a rate ("Used for construction")
+    gives NA in all three.
+    """
+    parts = _text(series).str.extract(_RATE)
+    is_rate = parts["rate"].notna()
+    return pd.DataFrame({
+        "rate": pd.to_numeric(parts["rate"]).astype("Float64"),
+        "per_colonist": parts["colonist"].notna().astype("boolean").mask(~is_rate),
+        "unit": parts["unit"].astype("category"),
+    }, index=series.index)
+
+
+def parse_nullable_int(series):
+    """Integers mixed with "N/A" -> Int64; any other text is an error, not a silent NA."""
+    text = _text(series)
+    missing = text.isna() | text.isin(NA_TOKENS)
+    numbers = pd.to_numeric(text.mask(missing), errors="coerce")
+    bad = numbers.isna() & ~missing
+    if bad.any():
+        raise ValueError(f"Column '{series.name}' has non-numeric values: {sorted(set(text[bad]))}")
+    return numbers.astype("Int64")
+
+
+def parse_yield(series):
+    """"Produces 5 food/hour" -> Float64 "amount", categorical "resource" and "unit"."""
+    parts = _text(series).str.extract(_YIELD)
+    return pd.DataFrame({
+        "amount": pd.to_numeric(parts["amount"]).astype("Float64"),
+        "resource": parts["resource"].astype("category"),
+        "unit": parts["unit"].astype("category"),
+    }, index=series.index)
+
+
+def parse_duration_seconds(series):
+    """"90 seconds" / "2 minutes" -> Int64 seconds."""
+    parts = _text(series).str.extract(_DURATION)
+    return (pd.to_numeric(parts["amount"]) * parts["unit"].map(_SECONDS)).astype("Int64")
+
+
+def parse_bracketed_int(series):
+    """"Medium (2)" -> Int64 2."""
+    return pd.to_numeric(_text(series).str.extract(_BRACKETED)["value"]).astype("Int64")
+
+
+def _range_columns(frame, column):
+    parsed = parse_range(frame[column])
+    frame[_derived(column, "Min")] = parsed["min"]
+    frame[_derived(column, "Max")] = parsed["max"]
+
+
+def _rate_columns(frame, column):
+    parsed = parse_rate(frame[column])
+    frame[_derived(column, "Value")] = parsed["rate"]
+    frame[_derived(column, "Per Colonist")] = parsed["per_colonist"]
+    frame[_derived(column, "Unit")] = parsed["unit"]
+
+
+def _yield_columns(frame, column):
+    parsed = parse_yield(frame[column])
+    frame[_derived(column, "Amount")] = parsed["amount"]
+    frame[_derived(column, "Resource")] = parsed["resource"]
+    frame[_derived(column, "Unit")] = parsed["unit"]
+
+
+def _nullable_int_column(frame, column):
+    frame[column] = parse_nullable_int(frame[column])
+
+
+def _category_column(frame, column):
+    frame[column] = frame[column].astype("category")
+
+
+def _ordered(*levels):
+    def apply(frame, column):
+        frame[column] = pd.Categorical(frame[column], categories=list(levels), ordered=True)
+    return apply
+
+
+def _seconds_column(frame, column):
+    frame[_derived(column, "Seconds")] = parse_duration_seconds(frame[column])
+
+
+def _level_column(frame, column):
+    frame[_derived(column, "Level")] = parse_bracketed_int(frame[column])
+
+
+RANGE = _range_columns
+RATE = _rate_columns
+YIELD = _yield_columns
+NULLABLE_INT = _nullable_int_column
+CATEGORY = _category_column
+SECONDS = _seconds_column
+LEVEL = _level_column
+
+# Columns each parser adds next to its source column (see _derived)
+DERIVED_SUFFIXES = {
+    RANGE: ("Min", "Max"),
+    RATE: ("Value", "Per Colonist", "Unit"),
+    YIELD: ("Amount", "Resource", "Unit"),
+    SECONDS: ("Seconds",),
+    LEVEL: ("Level",),
+}
+
+SCHEMAS = {
+    "resource_management": {
+        "Resource": CATEGORY,
+        "Consumption Rate": RATE,
+        "Critical Threshold": NULLABLE_INT,
+    },
+    "tech_tree_progression": {
+        "Tech Branch": CATEGORY,
+        "Benefits": YIELD,
+    },
+    "exploration_areas": {
+        "Difficulty": LEVEL,
+        "Time Required": SECONDS,
+        "Risk Level": _ordered("Low", "Medium", "High"),
+    },
+    "colonist_management": {
+        "Specialization": CATEGORY,
+    },
+    "settlement_progression": {
+        "Settlement Tier": _ordered("Hamlet", "Village", "Town", "City"),
+        "Population Slots": RANGE,
+    },
+    "dnd_challenge_ratings": {
+        "Party_Level": RANGE,
+        "Monster_Category": CATEGORY,
+    },
+    "dnd_cr_chart_data": {
+        "Monster_Category": CATEGORY,
+    },
+}
+
+
+def apply_schema(name, frame):
+    """Return a copy of `frame` with the schema of dataset `name` applied."""
+    schema = SCHEMAS.get(name)
+    if not schema:
+        return frame
+    frame = frame.copy()
+    for column, parser in schema.items():
+        if column in frame.columns:
+            parser(frame, column)
+    return frame
+
+
+def source_view(name, frame):
+    """`frame` with the schema of dataset `name` undone: derived columns dropped, NA written as text."""
+    schema = SCHEMAS.get(name)
+    if not schema:
+        return frame
+    derived = {
+        _derived(column, suffix)
+        for column, parser in schema.items()
+        for suffix in DERIVED_SUFFIXES.get(parser, ())
+    }
+    frame = frame.drop(columns=[column for column in frame.columns if column in derived])
+    for column, parser in schema.items():
+        if parser is NULLABLE_INT and column in frame.columns:
+            frame[column] = frame[column].astype(object).where(frame[column].notna(), NA_TEXT)
+    return frame
@@ -0,0 +1,48 @@
+# Dataset store round trips and the published CSVs
+# Usage: python -m pytest utils/datasets/tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pandas as pd
+
+import dataset_store
+from dataset_store import DatasetStore, check_csv, write_dataset
+
+
+def test_published_csvs_round_trip():
+    assert dataset_store.main(["--check-csv"]) == 0
+
+
+def test_dtypes_survive_the_store():
+    frame = pd.DataFrame({
+        "name": ["a", "b", "c"],
+        "count": [1, 2, 3],
+        "ratio": [0.5, 1.25, -2.0],
+        "optional": pd.array([1, None, 3], dtype="Int64"),
+        "flag": [True, False, True],
+        "kind": pd.Categorical(["x", "y", "x"]),
+    })
+    with DatasetStore(":memory:") as store:
+        digest = store.write("sample", frame)
+        pd.testing.assert_frame_equal(store.read("sample"), frame)
+        assert store.write("sample", frame) == digest
+        pd.testing.assert_frame_equal(store.read("sample", ["ratio", "name"]), frame[["ratio", "name"]])
+
+
+def test_write_dataset_keeps_its_csv_in_sync(tmp_path):
+    store_path = str(tmp_path / "datasets.sqlite")
+    csv_path = tmp_path / "sample.csv"
+    frame = pd.DataFrame({"level": [1, 2], "label": ["low", "high"]})
+    write_dataset("sample", frame, str(tmp_path), store_path)
+    assert csv_path.read_text(encoding="utf-8") == "level,label\n1,low\n2,high\n"
+
+    with DatasetStore(store_path) as store:
+        assert check_csv(store) == []
+        csv_path.write_text("level,label\n1,low\n", encoding="utf-8")
+        assert check_csv(store) == ["sample"]
+
+    write_dataset("sample", frame, str(tmp_path), store_path)
+    assert csv_path.read_text(encoding="utf-8") == "level,label\n1,low\n2,high\n"
@@ -0,0 +1,64 @@
+# Run a repo script with the shared utils modules importable
+# Usage: python utils/run_script.py gdd/space_sim/script.py
+#        python utils/run_script.py gdd/space_sim/colony_sim.py --colonies 1000
+#
+# Scripts put the shared utils directory they import from on sys.path
+# themselves, so they also run directly (python gdd/space_sim/script.py).
+# This runner, which the chart engine uses for the scripts in charts.json,
+# runs a script in its own directory so relative output paths keep working,
+# with SHARED_MODULE_DIRS on sys.path and sys.argv as if it had been started
+# directly. PYTHONPATH is extended as well, so worker processes started with
+# "spawn" can import the same modules.
+
+import contextlib
+import os
+import runpy
+import sys
+
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+SHARED_MODULE_DIRS = (
+    os.path.join(UTILS_DIR, "datasets"),
+    os.path.join(UTILS_DIR, "charts"),
+)
+
+
+@contextlib.contextmanager
+def script_environment(script, args=()):
+    """cwd, sys.path, sys.argv and PYTHONPATH for running `script`; restored on exit."""
+    script = os.path.abspath(script)
+    directory = os.path.dirname(script)
+    previous_cwd, previous_path, previous_argv = os.getcwd(), list(sys.path), list(sys.argv)
+    previous_pythonpath = os.environ.get("PYTHONPATH")
+    paths = [directory, *SHARED_MODULE_DIRS]
+    os.chdir(directory)
+    sys.path[:0] = paths
+    sys.argv[:] = [script, *args]
+    os.environ["PYTHONPATH"] = os.pathsep.join(paths + ([previous_pythonpath] if previous_pythonpath else []))
+    try:
+        yield script
+    finally:
+        os.chdir(previous_cwd)
+        sys.path[:] = previous_path
+        sys.argv[:] = previous_argv
+        if previous_pythonpath is None:
+            os.environ.pop("PYTHONPATH", None)
+        else:
+            os.environ["PYTHONPATH"] = previous_pythonpath
+
+
+def run_script(script, args=()):
+    with script_environment(script, args) as path:
+        runpy.run_path(path, run_name="__main__")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print("usage: python utils/run_script.py SCRIPT [ARGS...]", file=sys.stderr)
+        return 2
+    run_script(argv[0], argv[1:])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())